@@ -0,0 +1,6 @@
+from fastapi import APIRouter
+from analytics.views.revenue import get_revenue
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+router.add_api_route("/revenue", get_revenue, methods=["GET"])
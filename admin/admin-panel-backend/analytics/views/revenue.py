@@ -0,0 +1,42 @@
+from fastapi import HTTPException, Query
+from core.database import db
+
+# Maintained by the app backend's rollup job
+ROLLUPS = {
+    "course": db.revenue_by_course,
+    "teacher": db.revenue_by_teacher
+}
+
+async def get_revenue(
+    scope: str = Query("course", regex="^(course|teacher)$"),
+    period: str = Query("day", regex="^(day|month)$"),
+    start: str = Query(None, description="First bucket, YYYY-MM-DD or YYYY-MM"),
+    end: str = Query(None, description="Last bucket, inclusive"),
+    limit: int = Query(500, ge=1, le=5000)
+):
+    """Revenue rollups per course or per teacher, read directly from the materialized views"""
+    try:
+        query = {"period": period}
+        bucket_range = {}
+        if start:
+            bucket_range["$gte"] = start
+        if end:
+            bucket_range["$lte"] = end
+        if bucket_range:
+            query["bucket"] = bucket_range
+
+        rows = await ROLLUPS[scope].find(query, {"_id": 0}).sort("bucket", -1).to_list(length=limit)
+        for row in rows:
+            for field in ("course_id", "teacher_id"):
+                if row.get(field) is not None:
+                    row[field] = str(row[field])
+
+        return {
+            "scope": scope,
+            "period": period,
+            "rows": rows,
+            "gross_cents": sum(row.get("gross_cents", 0) for row in rows),
+            "refund_cents": sum(row.get("refund_cents", 0) for row in rows)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get revenue: {str(e)}")
@@ -1,8 +1,12 @@
 from fastapi import APIRouter
 from Login.LoginRoutes import router as login_router
 from course.courseRoute import router as course_router
+from maintenance.maintenanceRoute import router as maintenance_router
+from analytics.analyticsRoute import router as analytics_router
 
 api_router = APIRouter()
 
 api_router.include_router(login_router, tags=["Authentication"])
-api_router.include_router(course_router, tags=["Courses"])
\ No newline at end of file
+api_router.include_router(course_router, tags=["Courses"])
+api_router.include_router(maintenance_router, tags=["Maintenance"])
+api_router.include_router(analytics_router, tags=["Analytics"])
\ No newline at end of file
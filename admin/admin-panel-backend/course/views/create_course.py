@@ -44,7 +44,8 @@ async def create_course(
             "thumbnail_public_id": thumbnail_public_id,
             "price": price,
             "visible": visible,
-            "created_date": datetime.utcnow()
+            "created_date": datetime.utcnow(),
+            "updated_date": datetime.utcnow()
         }
         
         # Insert into database
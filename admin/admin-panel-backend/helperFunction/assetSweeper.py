@@ -0,0 +1,155 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+import cloudinary
+import cloudinary.api
+import os
+from dotenv import load_dotenv
+from core.database import courses_collection, course_videos_collection
+
+load_dotenv()
+
+# Configure Cloudinary
+cloudinary.config(
+    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+    api_key=os.getenv("CLOUDINARY_API_KEY"),
+    api_secret=os.getenv("CLOUDINARY_API_SECRET")
+)
+
+# Storage folder -> (resource type, collection, field holding the public id)
+SWEEP_TARGETS = {
+    "course_thumbnails": ("image", courses_collection, "thumbnail_public_id"),
+    "course_videos": ("video", course_videos_collection, "video_public_id"),
+}
+
+PAGE_SIZE = 500           # Cloudinary Admin API max per listing call
+DELETE_BATCH_SIZE = 100   # Cloudinary Admin API max per delete_resources call
+REPORT_SAMPLE_SIZE = 50   # Orphan ids listed per folder in the report
+
+
+class RateLimiter:
+    """Spaces out Admin API calls so a sweep never exceeds calls_per_second"""
+
+    def __init__(self, calls_per_second: float):
+        self.interval = 1.0 / calls_per_second if calls_per_second > 0 else 0
+        self._next_call = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        if self._next_call > now:
+            await asyncio.sleep(self._next_call - now)
+        self._next_call = max(now, self._next_call) + self.interval
+
+
+async def _list_folder(folder: str, resource_type: str, limiter: RateLimiter):
+    """Yield pages of (public_id, created_at) stored under a folder"""
+    next_cursor = None
+    while True:
+        await limiter.wait()
+        params = {
+            "type": "upload",
+            "prefix": f"{folder}/",
+            "resource_type": resource_type,
+            "max_results": PAGE_SIZE,
+        }
+        if next_cursor:
+            params["next_cursor"] = next_cursor
+
+        result = await asyncio.to_thread(cloudinary.api.resources, **params)
+        yield [(r["public_id"], r.get("created_at")) for r in result.get("resources", [])]
+
+        next_cursor = result.get("next_cursor")
+        if not next_cursor:
+            break
+
+
+async def _referenced_ids(collection, field: str, public_ids: set) -> set:
+    """Return the subset of public_ids still referenced by documents"""
+    cursor = collection.find({field: {"$in": list(public_ids)}}, {field: 1, "_id": 0})
+    return {doc[field] async for doc in cursor}
+
+
+def _is_recent(created_at: str, cutoff: datetime) -> bool:
+    # Skip fresh uploads whose course/video document may not be written yet
+    if not created_at:
+        return False
+    try:
+        created = datetime.strptime(created_at, "%Y-%m-%dT%H:%M:%SZ")
+    except ValueError:
+        return False
+    return created > cutoff
+
+
+async def _delete_batch(public_ids: list, resource_type: str, limiter: RateLimiter) -> dict:
+    await limiter.wait()
+    result = await asyncio.to_thread(
+        cloudinary.api.delete_resources,
+        public_ids,
+        resource_type=resource_type
+    )
+    return result.get("deleted", {})
+
+
+async def sweep_orphaned_assets(
+    folders: list = None,
+    dry_run: bool = True,
+    calls_per_second: float = 2.0,
+    grace_hours: int = 24
+):
+    """
+    Find and purge media in Cloudinary that no course or video references.
+    Storage is paged per folder; every page is diffed against Mongo with a
+    single $in query, so memory stays bounded by the page size.
+    """
+    folders = folders or list(SWEEP_TARGETS.keys())
+    limiter = RateLimiter(calls_per_second)
+    cutoff = datetime.utcnow() - timedelta(hours=grace_hours)
+    report = {"dry_run": dry_run, "started_at": datetime.utcnow().isoformat(), "folders": {}}
+
+    for folder in folders:
+        if folder not in SWEEP_TARGETS:
+            raise ValueError(f"Unknown folder: {folder}")
+
+        resource_type, collection, field = SWEEP_TARGETS[folder]
+        stats = {"scanned": 0, "referenced": 0, "skipped_recent": 0, "orphaned": 0, "deleted": 0, "sample": []}
+        pending_delete = []
+
+        async for page in _list_folder(folder, resource_type, limiter):
+            stats["scanned"] += len(page)
+            page_ids = {public_id for public_id, _ in page}
+            recent_ids = {public_id for public_id, created_at in page if _is_recent(created_at, cutoff)}
+
+            referenced = await _referenced_ids(collection, field, page_ids)
+            orphans = page_ids - referenced - recent_ids
+
+            stats["referenced"] += len(referenced)
+            stats["skipped_recent"] += len(recent_ids - referenced)
+            stats["orphaned"] += len(orphans)
+            stats["sample"].extend(sorted(orphans)[:REPORT_SAMPLE_SIZE - len(stats["sample"])])
+
+            if dry_run:
+                continue
+
+            pending_delete.extend(orphans)
+            while len(pending_delete) >= DELETE_BATCH_SIZE:
+                batch, pending_delete = pending_delete[:DELETE_BATCH_SIZE], pending_delete[DELETE_BATCH_SIZE:]
+                deleted = await _delete_batch(batch, resource_type, limiter)
+                stats["deleted"] += sum(1 for status in deleted.values() if status == "deleted")
+
+        if pending_delete:
+            deleted = await _delete_batch(pending_delete, resource_type, limiter)
+            stats["deleted"] += sum(1 for status in deleted.values() if status == "deleted")
+
+        report["folders"][folder] = stats
+        print(f"Asset sweep {folder}: {stats['orphaned']} orphaned of {stats['scanned']} scanned")
+
+    report["finished_at"] = datetime.utcnow().isoformat()
+    return report
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    purge = "--purge" in sys.argv
+    print(json.dumps(asyncio.run(sweep_orphaned_assets(dry_run=not purge)), indent=2))
@@ -0,0 +1,6 @@
+from fastapi import APIRouter
+from maintenance.views.sweep_assets import sweep_assets
+
+router = APIRouter(prefix="/maintenance", tags=["Maintenance"])
+
+router.add_api_route("/sweep-assets", sweep_assets, methods=["POST"])
@@ -0,0 +1,25 @@
+from fastapi import HTTPException, Query
+from typing import List
+from helperFunction.assetSweeper import sweep_orphaned_assets, SWEEP_TARGETS
+
+async def sweep_assets(
+    folders: List[str] = Query(None),
+    dry_run: bool = Query(True),
+    calls_per_second: float = Query(2.0, gt=0, le=10),
+    grace_hours: int = Query(24, ge=0)
+):
+    """Report (and optionally purge) Cloudinary assets no course or video references"""
+    if folders:
+        unknown = [folder for folder in folders if folder not in SWEEP_TARGETS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown folders: {unknown}")
+
+    try:
+        return await sweep_orphaned_assets(
+            folders=folders,
+            dry_run=dry_run,
+            calls_per_second=calls_per_second,
+            grace_hours=grace_hours
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Asset sweep failed: {str(e)}")
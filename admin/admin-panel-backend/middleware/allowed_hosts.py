@@ -1,16 +1,28 @@
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import status
+from starlette.responses import JSONResponse
 from core.config import settings
+from middleware.asgi_helpers import get_header
 
-class AllowedHostsMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        host = request.headers.get("host", "").split(":")[0]
-        
-        if host not in settings.ALLOWED_HOSTS:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Host not allowed"
-            )
-        
-        response = await call_next(request)
-        return response
\ No newline at end of file
+class AllowedHostsMiddleware:
+    """Raw ASGI host check against a frozenset built once at startup"""
+
+    def __init__(self, app, allowed_hosts=None):
+        self.app = app
+        self.allowed_hosts = frozenset(allowed_hosts or settings.ALLOWED_HOSTS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        host = (get_header(scope, b"host") or "").split(":")[0]
+
+        if host not in self.allowed_hosts:
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": 1008})
+                return
+            response = JSONResponse({"detail": "Host not allowed"}, status_code=status.HTTP_403_FORBIDDEN)
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
@@ -0,0 +1,35 @@
+from typing import Iterable, Optional
+
+_END = object()
+
+class PathMatcher:
+    """Exact paths in a frozenset plus a segment trie of prefixes, compiled once at startup"""
+
+    def __init__(self, exact_paths: Iterable[str] = (), prefixes: Iterable[str] = ()):
+        self.exact_paths = frozenset(exact_paths)
+        self._trie = {}
+        for prefix in prefixes:
+            node = self._trie
+            for segment in prefix.strip("/").split("/"):
+                node = node.setdefault(segment, {})
+            node[_END] = True
+
+    def matches(self, path: str) -> bool:
+        if path in self.exact_paths:
+            return True
+        # A prefix "/a/b/" matches "/a/b/<anything>", same as str.startswith
+        node = self._trie
+        for segment in path.split("/")[1:]:
+            if _END in node:
+                return True
+            node = node.get(segment)
+            if node is None:
+                return False
+        return False
+
+def get_header(scope, name: bytes) -> Optional[str]:
+    """Read a header straight from the ASGI scope without building a Request"""
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
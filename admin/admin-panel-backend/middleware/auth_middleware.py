@@ -1,38 +1,47 @@
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import HTTPException, status
+from starlette.responses import JSONResponse
 from helperFunction.jwt_helper import verify_token
+from middleware.asgi_helpers import PathMatcher, get_header
+
+# Skip auth for public endpoints
+PUBLIC_PATHS = ["/", "/docs", "/redoc", "/openapi.json", "/api/v1/auth/login"]
+
+# Skip auth for upload endpoints and course creation
+PUBLIC_PREFIXES = ["/api/v1/upload/", "/api/v1/courses/"]
+
+class AuthMiddleware:
+    """Raw ASGI auth: rejects before the app runs and never wraps the response stream"""
+
+    def __init__(self, app, public_paths=PUBLIC_PATHS, public_prefixes=PUBLIC_PREFIXES):
+        self.app = app
+        self.public = PathMatcher(public_paths, public_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or self.public.matches(scope["path"]):
+            await self.app(scope, receive, send)
+            return
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Skip auth for public endpoints
-        public_paths = ["/", "/docs", "/redoc", "/openapi.json", "/api/v1/auth/login"]
-        
-        # Skip auth for upload endpoints and course creation
-        if request.url.path.startswith("/api/v1/upload/") or request.url.path.startswith("/api/v1/courses/"):
-            response = await call_next(request)
-            return response
-        
-        if request.url.path in public_paths:
-            response = await call_next(request)
-            return response
-        
         # Check for authorization header
-        auth_header = request.headers.get("authorization")
+        auth_header = get_header(scope, b"authorization")
         if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authorization header missing or invalid"
-            )
-        
+            await self._reject(scope, receive, send, "Authorization header missing or invalid")
+            return
+
         token = auth_header.split(" ")[1]
         try:
             payload = verify_token(token)
-            request.state.user_id = payload.get("sub")
         except HTTPException:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid or expired token"
-            )
-        
-        response = await call_next(request)
-        return response
\ No newline at end of file
+            await self._reject(scope, receive, send, "Invalid or expired token")
+            return
+
+        scope.setdefault("state", {})["user_id"] = payload.get("sub")
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(scope, receive, send, detail: str):
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1008})
+            return
+        response = JSONResponse({"detail": detail}, status_code=status.HTTP_401_UNAUTHORIZED)
+        await response(scope, receive, send)
@@ -0,0 +1,6 @@
+from fastapi import APIRouter
+from analytics.views.revenue import get_teacher_revenue
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+router.add_api_route("/teacher/{teacher_id}/revenue", get_teacher_revenue, methods=["GET"])
@@ -0,0 +1,207 @@
+import asyncio
+from datetime import datetime, timedelta
+from core.config import ANALYTICS_ROLLUP_SECONDS
+from core.database import db
+from helperFunction.job_lease import acquire_job_lease
+
+payments_collection = db.payments
+course_rollups = db.revenue_by_course
+teacher_rollups = db.revenue_by_teacher
+job_state_collection = db.job_state
+
+JOB_ID = "revenue_rollups"
+# Leave recent writes alone until they've settled, so a late insert can't slip behind the watermark
+SETTLE_SECONDS = 60
+DAYS_PER_PASS = 31
+
+_rollup_task = None
+
+# Single-course payments have no items array; treat them as one item
+ITEMS = {"$ifNull": ["$items", [{"course_id": "$course_id", "amount_cents": "$amount_cents"}]]}
+SUMS = ("gross_cents", "sales_count", "refund_cents", "refund_count")
+
+def _day(field: str) -> dict:
+    return {"$dateToString": {"format": "%Y-%m-%d", "date": field}}
+
+def _sales_lines(days: list, start: datetime, end: datetime) -> list:
+    return [
+        {"$match": {"status": {"$in": ["completed", "refunded"]}, "completed_at": {"$gte": start, "$lt": end}}},
+        {"$project": {"day": _day("$completed_at"), "items": ITEMS}},
+        {"$match": {"day": {"$in": days}}},
+        {"$unwind": "$items"},
+        {"$project": {
+            "day": 1,
+            "course_id": "$items.course_id",
+            "teacher_id": "$items.teacher_id",
+            "gross_cents": "$items.amount_cents",
+            "sales_count": {"$literal": 1},
+            "refund_cents": {"$literal": 0},
+            "refund_count": {"$literal": 0}
+        }}
+    ]
+
+def _refund_lines(days: list, start: datetime, end: datetime) -> list:
+    # Refunds land on the day they happened; the amount is pro-rated across cart items,
+    # and each affected course counts the refund once
+    return [
+        {"$match": {"refunds.refunded_at": {"$gte": start, "$lt": end}}},
+        {"$unwind": "$refunds"},
+        {"$project": {
+            "day": _day("$refunds.refunded_at"),
+            "items": ITEMS,
+            "share": {"$divide": ["$refunds.amount_cents", "$amount_cents"]}
+        }},
+        {"$match": {"day": {"$in": days}}},
+        {"$unwind": "$items"},
+        {"$project": {
+            "day": 1,
+            "course_id": "$items.course_id",
+            "teacher_id": "$items.teacher_id",
+            "gross_cents": {"$literal": 0},
+            "sales_count": {"$literal": 0},
+            "refund_cents": {"$round": [{"$multiply": ["$items.amount_cents", "$share"]}, 0]},
+            "refund_count": {"$literal": 1}
+        }}
+    ]
+
+def _sum_fields() -> dict:
+    return {name: {"$sum": f"${name}"} for name in SUMS}
+
+def _output_fields() -> dict:
+    return {name: 1 for name in SUMS}
+
+async def _touched_days(low: datetime, high: datetime) -> list:
+    """Days with a sale or refund recorded since the watermark"""
+    sales = payments_collection.aggregate([
+        {"$match": {"completed_at": {"$gt": low, "$lte": high}}},
+        {"$group": {"_id": _day("$completed_at")}}
+    ])
+    refunds = payments_collection.aggregate([
+        {"$match": {"refunds.refunded_at": {"$gt": low, "$lte": high}}},
+        {"$unwind": "$refunds"},
+        {"$match": {"refunds.refunded_at": {"$gt": low, "$lte": high}}},
+        {"$group": {"_id": _day("$refunds.refunded_at")}}
+    ])
+    days = {doc["_id"] async for doc in sales} | {doc["_id"] async for doc in refunds}
+    return sorted(days)
+
+async def _rebuild_course_days(days: list):
+    """Recompute per-course daily rows for these days and $merge them over the old ones"""
+    start = datetime.strptime(days[0], "%Y-%m-%d")
+    end = datetime.strptime(days[-1], "%Y-%m-%d") + timedelta(days=1)
+    pipeline = _sales_lines(days, start, end) + [
+        {"$unionWith": {"coll": payments_collection.name, "pipeline": _refund_lines(days, start, end)}},
+        {"$group": {
+            "_id": {"course_id": "$course_id", "day": "$day"},
+            "teacher_id": {"$max": "$teacher_id"},
+            **_sum_fields()
+        }},
+        # Single-course payments don't carry teacher_id; one lookup per row fills it in
+        {"$lookup": {"from": "courses", "localField": "_id.course_id", "foreignField": "_id", "as": "course"}},
+        {"$project": {
+            "_id": 0,
+            "course_id": "$_id.course_id",
+            "teacher_id": {"$ifNull": ["$teacher_id", {"$arrayElemAt": ["$course.teacher_id", 0]}]},
+            "period": "day",
+            "bucket": "$_id.day",
+            **_output_fields()
+        }},
+        {"$merge": {"into": course_rollups.name, "on": ["course_id", "period", "bucket"], "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+    await payments_collection.aggregate(pipeline).to_list(length=None)
+
+async def _rebuild_course_months(months: list):
+    pipeline = [
+        {"$match": {"period": "day", "bucket": {"$gte": months[0], "$lt": months[-1] + "-99"}}},
+        {"$addFields": {"month": {"$substrBytes": ["$bucket", 0, 7]}}},
+        {"$match": {"month": {"$in": months}}},
+        {"$group": {
+            "_id": {"course_id": "$course_id", "month": "$month"},
+            "teacher_id": {"$max": "$teacher_id"},
+            **_sum_fields()
+        }},
+        {"$project": {
+            "_id": 0,
+            "course_id": "$_id.course_id",
+            "teacher_id": 1,
+            "period": "month",
+            "bucket": "$_id.month",
+            **_output_fields()
+        }},
+        {"$merge": {"into": course_rollups.name, "on": ["course_id", "period", "bucket"], "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+    await course_rollups.aggregate(pipeline).to_list(length=None)
+
+async def _rebuild_teacher_rows(days: list, months: list):
+    pipeline = [
+        {"$match": {
+            "teacher_id": {"$ne": None},
+            "$or": [
+                {"period": "day", "bucket": {"$in": days}},
+                {"period": "month", "bucket": {"$in": months}}
+            ]
+        }},
+        {"$group": {
+            "_id": {"teacher_id": "$teacher_id", "period": "$period", "bucket": "$bucket"},
+            "course_count": {"$sum": 1},
+            **_sum_fields()
+        }},
+        {"$project": {
+            "_id": 0,
+            "teacher_id": "$_id.teacher_id",
+            "period": "$_id.period",
+            "bucket": "$_id.bucket",
+            "course_count": 1,
+            **_output_fields()
+        }},
+        {"$merge": {"into": teacher_rollups.name, "on": ["teacher_id", "period", "bucket"], "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+    await course_rollups.aggregate(pipeline).to_list(length=None)
+
+async def refresh_revenue_rollups() -> dict:
+    """Rebuild every rollup bucket touched since the watermark; safe to re-run after a crash"""
+    state = await job_state_collection.find_one({"_id": JOB_ID}) or {}
+    low = state.get("watermark", datetime(1970, 1, 1))
+    high = datetime.utcnow() - timedelta(seconds=SETTLE_SECONDS)
+    if high <= low:
+        return {"days": 0}
+
+    days = await _touched_days(low, high)
+    for offset in range(0, len(days), DAYS_PER_PASS):
+        chunk = days[offset:offset + DAYS_PER_PASS]
+        months = sorted({day[:7] for day in chunk})
+        await _rebuild_course_days(chunk)
+        await _rebuild_course_months(months)
+        await _rebuild_teacher_rows(chunk, months)
+
+    # Buckets are rebuilt whole, so moving the watermark last keeps a crash from losing data
+    await job_state_collection.update_one(
+        {"_id": JOB_ID},
+        {"$set": {"watermark": high, "last_run_at": datetime.utcnow(), "last_result": {"days": len(days)}}},
+        upsert=True
+    )
+    return {"days": len(days)}
+
+async def _rollup_loop():
+    while True:
+        try:
+            if await acquire_job_lease(JOB_ID, ANALYTICS_ROLLUP_SECONDS * 2):
+                await refresh_revenue_rollups()
+        except Exception as e:
+            print(f"Revenue rollup error: {e}")
+        await asyncio.sleep(ANALYTICS_ROLLUP_SECONDS)
+
+def start_revenue_rollups():
+    global _rollup_task
+    if _rollup_task is None and ANALYTICS_ROLLUP_SECONDS > 0:
+        _rollup_task = asyncio.create_task(_rollup_loop())
+
+async def stop_revenue_rollups():
+    global _rollup_task
+    if _rollup_task is not None:
+        _rollup_task.cancel()
+        try:
+            await _rollup_task
+        except asyncio.CancelledError:
+            pass
+        _rollup_task = None
@@ -0,0 +1,48 @@
+from fastapi import HTTPException, Query, Depends
+from bson import ObjectId
+from analytics.rollups import course_rollups, teacher_rollups
+from middleware.user_auth import Principal, get_principal
+
+def _row(row: dict) -> dict:
+    row.pop("_id", None)
+    for field in ("course_id", "teacher_id"):
+        if field in row:
+            row[field] = str(row[field])
+    return row
+
+async def get_teacher_revenue(
+    teacher_id: str,
+    period: str = Query("day", regex="^(day|month)$"),
+    start: str = Query(None, description="First bucket, YYYY-MM-DD or YYYY-MM"),
+    end: str = Query(None, description="Last bucket, inclusive"),
+    principal: Principal = Depends(get_principal)
+):
+    """Sales and refunds for one teacher, overall and per course, straight from the rollups"""
+    try:
+        if principal.user_id != teacher_id and principal.role != "admin":
+            raise HTTPException(status_code=403, detail="Unauthorized to view this teacher's revenue")
+        if not ObjectId.is_valid(teacher_id):
+            raise HTTPException(status_code=400, detail="Invalid teacher id")
+
+        query = {"teacher_id": ObjectId(teacher_id), "period": period}
+        bucket_range = {}
+        if start:
+            bucket_range["$gte"] = start
+        if end:
+            bucket_range["$lte"] = end
+        if bucket_range:
+            query["bucket"] = bucket_range
+
+        totals = await teacher_rollups.find(query).sort("bucket", 1).to_list(length=None)
+        courses = await course_rollups.find(query).sort([("bucket", 1), ("course_id", 1)]).to_list(length=None)
+
+        return {
+            "teacher_id": teacher_id,
+            "period": period,
+            "totals": [_row(row) for row in totals],
+            "courses": [_row(row) for row in courses]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get revenue: {str(e)}")
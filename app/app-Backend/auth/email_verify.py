@@ -1,73 +1,83 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
-from pymongo import MongoClient
 import random
-import smtplib
-from email.mime.text import MIMEText
-from datetime import datetime, timedelta
-from core.config import EMAIL_HOST, EMAIL_PORT, EMAIL_USER, EMAIL_PASSWORD, MONGODB_URL, DB_NAME
+from core.database import db
+from core.redis_client import store_otp, consume_otp, allow_otp_resend
+from helperFunction.email_outbox import enqueue_otp_email
+from helperFunction.counters import count_user_verified
 
 router = APIRouter()
 
-# MongoDB connection from .env
-client = MongoClient(MONGODB_URL)
-db = client[DB_NAME]
-users_collection = db['Users']
-otp_collection = db['OTP']
+users_collection = db.Users
 
 class VerifyEmail(BaseModel):
     email: EmailStr
     otp: str
 
+class ResendOTP(BaseModel):
+    email: EmailStr
+
 def generate_otp():
     return str(random.randint(100000, 999999))
 
-def send_otp_email(email, otp):
-    try:
-        msg = MIMEText(f"Your OTP for email verification is: {otp}")
-        msg['Subject'] = 'Email Verification OTP'
-        msg['From'] = EMAIL_USER
-        msg['To'] = email
-        
-        server = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT)
-        server.starttls()
-        server.login(EMAIL_USER, EMAIL_PASSWORD)
-        server.send_message(msg)
-        server.quit()
-        return True
-    except Exception as e:
-        print(f"Email error: {e}")
-        return False
-
 @router.post('/verify-email')
-def verify_email(data: VerifyEmail):
+async def verify_email(data: VerifyEmail):
     try:
-        otp_record = otp_collection.find_one({
-            'email': data.email,
-            'otp': data.otp,
-            'verified': False,
-            'expiry': {'$gt': datetime.now()}
-        })
+        user = await users_collection.find_one({'email': data.email}, {'email_verified': 1})
+        if not user:
+            raise HTTPException(status_code=404, detail='User not found')
+        
+        # Checked before the OTP is consumed, so a repeated submit (double click, retried request) succeeds
+        if user.get('email_verified', False):
+            return {'message': 'Email already verified'}
         
-        if not otp_record:
+        verified = await consume_otp(data.email, data.otp)
+        if verified is None:
+            raise HTTPException(status_code=503, detail='Could not verify OTP. Please try again later.')
+        if not verified:
             raise HTTPException(status_code=400, detail='Invalid or expired OTP')
         
-        result = users_collection.update_one(
-            {'email': data.email},
+        result = await users_collection.update_one(
+            {'email': data.email, 'email_verified': False},
             {'$set': {'email_verified': True}}
         )
         
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail='User not found')
-        
-        otp_collection.update_one(
-            {'_id': otp_record['_id']},
-            {'$set': {'verified': True}}
-        )
+        await count_user_verified()
         
         return {'message': 'Email verified successfully'}
         
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post('/resend-otp')
+async def resend_otp(data: ResendOTP):
+    try:
+        allowed = await allow_otp_resend(data.email)
+        if allowed is None:
+            raise HTTPException(status_code=503, detail='Could not issue OTP. Please try again later.')
+        if not allowed:
+            raise HTTPException(status_code=429, detail='Too many OTP requests. Please try again later.')
+        
+        user = await users_collection.find_one({'email': data.email}, {'email_verified': 1})
+        if not user:
+            raise HTTPException(status_code=404, detail='User not found')
+        
+        if user.get('email_verified', False):
+            raise HTTPException(status_code=400, detail='Email already verified')
+        
+        otp = generate_otp()
+        if not await store_otp(data.email, otp):
+            raise HTTPException(status_code=503, detail='Could not issue OTP. Please try again later.')
+        
+        await enqueue_otp_email(data.email, otp)
+        
+        return {'message': 'A verification email is on its way.'}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,15 +1,11 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
-from pymongo import MongoClient
-from werkzeug.security import check_password_hash
-from bson import ObjectId
-from core.config import MONGODB_URL, DB_NAME
+from core.database import db
+from helperFunction.user_service import user_login
 from helperFunction.jwt_helper import create_access_token
+from helperFunction.password_hasher import verify_password
 
-# MongoDB connection
-client = MongoClient(MONGODB_URL)
-db = client[DB_NAME]
-users_collection = db['Users']
+users_collection = db.Users
 
 router = APIRouter()
 
@@ -18,10 +14,9 @@ class LoginUser(BaseModel):
     password: str
 
 @router.post('/login')
-def login_user(user: LoginUser):
+async def login_user(user: LoginUser):
     try:
-        # Use sync client for finding user
-        user_data = users_collection.find_one({'email': user.email})
+        user_data = await users_collection.find_one({'email': user.email})
         
         if not user_data:
             raise HTTPException(status_code=404, detail='User not found')
@@ -29,7 +24,7 @@ def login_user(user: LoginUser):
         if not user_data.get('email_verified', False):
             raise HTTPException(status_code=403, detail='Please verify your email first')
         
-        if not check_password_hash(user_data['password'], user.password):
+        if not await verify_password(user_data['password'], user.password):
             raise HTTPException(status_code=401, detail='Invalid password')
         
         user_id = str(user_data['_id'])
@@ -38,20 +33,13 @@ def login_user(user: LoginUser):
         token_data = {
             "user_id": user_id,
             "email": user_data['email'],
-            "role": user_data['role']
+            "role": user_data['role'],
+            "name": user_data['name']
         }
         access_token = create_access_token(token_data)
         
-        # Set user online in Redis
-        from core.redis_client import set_user_online_sync
-        set_user_online_sync(user_id)
-        
-        # Update isActive in database using sync client
-        users_collection.update_one(
-            {"_id": user_data['_id']},
-            {"$set": {"isActive": True}}
-        )
-        print(f"User {user_id} set active in database")
+        # Presence in Redis is the source of truth for isActive
+        await user_login(user_id)
         
         return {
             'message': 'Login successful',
@@ -69,4 +57,4 @@ def login_user(user: LoginUser):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
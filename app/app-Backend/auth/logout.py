@@ -1,38 +1,43 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-from pymongo import MongoClient
-from bson import ObjectId
-from core.config import MONGODB_URL, DB_NAME
+from typing import Optional
+from helperFunction.user_service import user_logout
+from helperFunction.jwt_helper import verify_token
+from helperFunction.token_revocation import revoke_token
 
 router = APIRouter()
 
 class LogoutUser(BaseModel):
     user_id: str
+    token: Optional[str] = None
 
 @router.post('/logout')
-def logout_user(user: LogoutUser):
+async def logout_user(user: LogoutUser, request: Request):
     try:
-        # Set user offline in Redis
-        from core.redis_client import set_user_offline_sync
-        set_user_offline_sync(user.user_id)
-        
-        # Update isActive to False in database using sync client
-        client = MongoClient(MONGODB_URL)
-        db = client[DB_NAME]
-        
-        result = db.Users.update_one(
-            {"_id": ObjectId(user.user_id)},
-            {"$set": {"isActive": False}}
-        )
-        print(f"User {user.user_id} set inactive in database")
-        
-        client.close()
-        
+        # Presence in Redis is the source of truth for isActive
+        await user_logout(user.user_id)
+
+        token = user.token
+        auth_header = request.headers.get("authorization")
+        if not token and auth_header and auth_header.startswith("Bearer "):
+            token = auth_header.split(" ")[1]
+
+        revoked = False
+        if token:
+            try:
+                payload = verify_token(token)
+            except HTTPException:
+                # Already expired or invalid: nothing left to revoke
+                payload = None
+            if payload and payload.get("user_id") == user.user_id:
+                revoked = await revoke_token(payload)
+
         return {
             'message': 'Logout successful',
             'user_id': user.user_id,
-            'isActive': False
+            'isActive': False,
+            'token_revoked': revoked
         }
-        
+
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
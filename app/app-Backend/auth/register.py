@@ -1,19 +1,14 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
-from pymongo import MongoClient
-from werkzeug.security import generate_password_hash
 from typing import Literal
-import random
-import smtplib
-from email.mime.text import MIMEText
-from datetime import datetime, timedelta
-from core.config import EMAIL_HOST, EMAIL_PORT, EMAIL_USER, EMAIL_PASSWORD, MONGODB_URL, DB_NAME
+from core.database import db
+from core.redis_client import store_otp
+from helperFunction.password_hasher import hash_password
+from helperFunction.email_outbox import enqueue_otp_email
+from helperFunction.counters import count_user_registered
+from auth.email_verify import generate_otp
 
-# MongoDB connection
-client = MongoClient(MONGODB_URL)
-db = client[DB_NAME]
-users_collection = db['Users']
-otp_collection = db['OTP']
+users_collection = db.Users
 
 router = APIRouter()
 
@@ -24,40 +19,16 @@ class RegisterUser(BaseModel):
     password: str
     confirm_password: str
 
-def generate_otp():
-    return str(random.randint(100000, 999999))
-
-def send_otp_email(email, otp):
-    try:
-        msg = MIMEText(f"Your OTP for email verification is: {otp}")
-        msg['Subject'] = 'Email Verification OTP'
-        msg['From'] = EMAIL_USER
-        msg['To'] = email
-        
-        server = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT)
-        server.starttls()
-        server.login(EMAIL_USER, EMAIL_PASSWORD)
-        server.send_message(msg)
-        server.quit()
-        return True
-    except Exception as e:
-        print(f"Email error: {e}")
-        return False
-
 @router.post('/register')
-def register_user(user: RegisterUser):
+async def register_user(user: RegisterUser):
     try:
         if user.password != user.confirm_password:
             raise HTTPException(status_code=400, detail='Passwords do not match')
         
-        if users_collection.find_one({'email': user.email}):
+        if await users_collection.find_one({'email': user.email}):
             raise HTTPException(status_code=400, detail='User already exists')
         
-        hashed_password = generate_password_hash(user.password)
-        
-        # Generate OTP
-        otp = generate_otp()
-        otp_expiry = datetime.now() + timedelta(minutes=10)
+        hashed_password = await hash_password(user.password)
         
         # Store user data (unverified)
         user_data = {
@@ -67,30 +38,25 @@ def register_user(user: RegisterUser):
             'password': hashed_password,
             'email_verified': False
         }
-        result = users_collection.insert_one(user_data)
+        result = await users_collection.insert_one(user_data)
+        await count_user_registered(user.role)
         
-        # Store OTP
-        otp_collection.delete_many({'email': user.email})  # Delete old OTPs
-        otp_data = {
-            'email': user.email,
-            'otp': otp,
-            'expiry': otp_expiry,
-            'verified': False
-        }
-        otp_collection.insert_one(otp_data)
-        
-        # Send OTP email
-        if send_otp_email(user.email, otp):
-            return {
-                'message': 'User registered successfully. OTP sent to your email.',
-                'user_id': str(result.inserted_id)
-            }
-        else:
+        # Store OTP in Redis (replaces any previous one, expires on its own)
+        otp = generate_otp()
+        if not await store_otp(user.email, otp):
             return {
                 'message': 'User registered but failed to send OTP. Please request OTP manually.',
                 'user_id': str(result.inserted_id)
             }
         
+        # Queue OTP email; the outbox sender delivers it in the background
+        await enqueue_otp_email(user.email, otp)
+        
+        return {
+            'message': 'User registered successfully. A verification email is on its way.',
+            'user_id': str(result.inserted_id)
+        }
+        
     except HTTPException:
         raise
     except Exception as e:
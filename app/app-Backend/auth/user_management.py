@@ -1,44 +1,42 @@
 from fastapi import APIRouter, HTTPException
-from pymongo import MongoClient
 from bson import ObjectId
-from core.config import MONGODB_URL, DB_NAME
+from core.database import db
+from helperFunction.user_service import annotate_is_active
+from helperFunction.counters import user_stat
 
 router = APIRouter()
 
-# MongoDB connection
-client = MongoClient(MONGODB_URL)
-db = client[DB_NAME]
-users_collection = db['Users']
-enrollments_collection = db['Enrollments']
+users_collection = db.Users
 
 @router.get('/students')
-def get_all_students():
+async def get_all_students():
     """Get all students for teachers to see"""
     try:
-        students = list(users_collection.find(
+        students = await users_collection.find(
             {"role": "student", "email_verified": True},
             {"password": 0}  # Exclude password
-        ))
+        ).to_list(length=None)
+        
+        await annotate_is_active(students)
         
         for student in students:
             student["_id"] = str(student["_id"])
-            
-            # Get enrollment count for each student
-            enrollment_count = enrollments_collection.count_documents({"student_id": str(student["_id"])})
-            student["enrolled_courses"] = enrollment_count
+            student["enrolled_courses"] = user_stat(student, "enrolled_courses")
         
         return {"students": students}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get('/teachers')
-def get_all_teachers():
+async def get_all_teachers():
     """Get all teachers"""
     try:
-        teachers = list(users_collection.find(
+        teachers = await users_collection.find(
             {"role": "Teacher", "email_verified": True},
             {"password": 0}  # Exclude password
-        ))
+        ).to_list(length=None)
+        
+        await annotate_is_active(teachers)
         
         for teacher in teachers:
             teacher["_id"] = str(teacher["_id"])
@@ -48,10 +46,10 @@ def get_all_teachers():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get('/profile/{user_id}')
-def get_user_profile(user_id: str):
+async def get_user_profile(user_id: str):
     """Get user profile details"""
     try:
-        user = users_collection.find_one(
+        user = await users_collection.find_one(
             {"_id": ObjectId(user_id)},
             {"password": 0}  # Exclude password
         )
@@ -59,20 +57,18 @@ def get_user_profile(user_id: str):
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
+        await annotate_is_active([user])
         user["_id"] = str(user["_id"])
         
-        # Add role-specific data
+        # Add role-specific data from the counters kept on the user document
         if user["role"] == "student":
-            # Get enrolled courses count
-            enrollment_count = enrollments_collection.count_documents({"student_id": user_id})
-            user["enrolled_courses"] = enrollment_count
+            user["enrolled_courses"] = user_stat(user, "enrolled_courses")
             
         elif user["role"] == "Teacher":
-            # Get created courses count
-            from course.courseRoute import courses_collection
-            course_count = courses_collection.count_documents({"teacher_id": user_id})
-            user["created_courses"] = course_count
+            user["created_courses"] = user_stat(user, "created_courses")
         
         return {"user": user}
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,47 +1,59 @@
-from fastapi import APIRouter, HTTPException
-from pymongo import MongoClient
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
 from bson import ObjectId
-from core.config import MONGODB_URL, DB_NAME
+from core.database import db
+from core.redis_client import get_online_users_count, get_online_users_page, get_active_users_estimate
+from helperFunction.counters import get_user_counters
 
 router = APIRouter()
 
 @router.get('/users/stats')
-def get_users_stats():
-    """Get total, online, and offline users count with details"""
+async def get_users_stats(offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=200)):
+    """Get total, online, and offline users count with a page of online user details"""
     try:
         # Get online users from Redis
-        from core.redis_client import get_online_users_count_sync, get_all_online_users_sync
+        redis_online_count, redis_online_user_ids, active_estimates, counters = await asyncio.gather(
+            get_online_users_count(),
+            get_online_users_page(offset, limit),
+            get_active_users_estimate(),
+            get_user_counters()
+        )
         
-        redis_online_count = get_online_users_count_sync()
-        redis_online_user_ids = get_all_online_users_sync()
+        total_users = counters["total"]
         
-        client = MongoClient(MONGODB_URL)
-        db = client[DB_NAME]
-        
-        total_users = db.Users.count_documents({})
-        
-        # Get user details for Redis online users
+        # Get user details for this page of online users in one query
         online_users = []
-        for user_id in redis_online_user_ids:
-            user = db.Users.find_one({"_id": ObjectId(user_id)})
-            if user:
-                online_users.append({
-                    "id": str(user["_id"]),
-                    "name": user.get("name"),
-                    "email": user.get("email"),
-                    "role": user.get("role")
-                })
+        if redis_online_user_ids:
+            object_ids = [ObjectId(user_id) for user_id in redis_online_user_ids if ObjectId.is_valid(user_id)]
+            users = await db.Users.find(
+                {"_id": {"$in": object_ids}},
+                {"name": 1, "email": 1, "role": 1}
+            ).to_list(length=None)
+            users_by_id = {str(user["_id"]): user for user in users}
+            for user_id in redis_online_user_ids:
+                user = users_by_id.get(user_id)
+                if user:
+                    online_users.append({
+                        "id": user_id,
+                        "name": user.get("name"),
+                        "email": user.get("email"),
+                        "role": user.get("role")
+                    })
         
         offline_count = total_users - redis_online_count
         
-        client.close()
-        
         return {
             "total_users": total_users,
             "online_users": redis_online_count,
             "offline_users": offline_count,
-            "online_user_details": online_users
+            "verified_users": counters["verified"],
+            "users_by_role": counters["by_role"],
+            "daily_active_users": active_estimates["daily_active_users"],
+            "monthly_active_users": active_estimates["monthly_active_users"],
+            "online_user_details": online_users,
+            "offset": offset,
+            "limit": limit
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
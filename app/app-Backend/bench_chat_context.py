@@ -0,0 +1,94 @@
+import random
+import re
+import time
+from bson import ObjectId
+from chatbot.course_index import CourseIndex
+
+GENERIC_TERMS = ['course', 'courses', 'class', 'tutorial', 'want', 'buy', 'purchase', 'about', 'the', 'how', 'but']
+
+SUBJECTS = [
+    "Python", "JavaScript", "React", "Node.js", "Machine Learning", "Data Analysis", "Docker", "Kubernetes",
+    "AWS", "Flutter", "Swift", "Kotlin", "SQL", "Cybersecurity", "Go", "Rust", "Excel", "Figma"
+]
+LEVELS = ["Beginner", "Intermediate", "Advanced", "Complete", "Practical"]
+MESSAGES = [
+    "I want to learn python for data analysis",
+    "do you have any react or node.js courses for beginners",
+    "what is the price of the advanced kubernetes course",
+    "recommend something about machine learning and deep learning with python",
+    "is there a swift class for building ios apps",
+    "cooking classes",
+    "show me courses about cybersecurity and networking basics for my new job",
+]
+
+def _courses(count: int) -> list:
+    rng = random.Random(7)
+    courses = []
+    for i in range(count):
+        subject = rng.choice(SUBJECTS)
+        other = rng.choice(SUBJECTS)
+        courses.append({
+            "_id": ObjectId(),
+            "title": f"{rng.choice(LEVELS)} {subject} {i}",
+            "description": f"Hands-on {subject} projects, with a look at {other} along the way.",
+            "category": "programming",
+            "price": rng.choice([19, 49, 99])
+        })
+    return courses
+
+def _filtered_terms(message: str) -> list:
+    return [term for term in message.lower().split() if len(term) > 2 and term not in GENERIC_TERMS]
+
+def _regex_loop(courses: list, message: str):
+    """The old per-term lookup, run in-process; returns (matches, Mongo round trips it cost)"""
+    round_trips = 1  # the initial find().to_list(10)
+    matches = []
+    for term in _filtered_terms(message):
+        exact = re.compile(f"^{re.escape(term)}$", re.I)
+        round_trips += 1
+        found = [course for course in courses if exact.search(course["title"])][:5]
+        if not found:
+            partial = re.compile(re.escape(term), re.I)
+            round_trips += 1
+            found = [course for course in courses if partial.search(course["title"]) or partial.search(course["description"])][:3]
+        matches.extend(found)
+    return matches[:5], round_trips
+
+def bench_chat_context(course_count: int = 2000, iterations: int = 200, rtt_ms: float = 1.0):
+    courses = _courses(course_count)
+    index = CourseIndex(backend="numpy")
+    start = time.perf_counter()
+    index.load(courses, version="bench")
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    round_trips = 0
+    for _ in range(iterations):
+        for message in MESSAGES:
+            round_trips += _regex_loop(courses, message)[1]
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for message in MESSAGES:
+            index.keyword_search(" ".join(_filtered_terms(message)))
+    keyword = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for message in MESSAGES:
+            index.retrieve(" ".join(_filtered_terms(message)))
+    retrieve = time.perf_counter() - start
+
+    messages = iterations * len(MESSAGES)
+    per_message_trips = round_trips / messages
+    print(f"Courses: {course_count}, messages: {messages}, index build: {build * 1000:.1f} ms")
+    print(f"Per-term regex loop: {legacy / messages * 1e3:.3f} ms/message in-process, "
+          f"{per_message_trips:.1f} sequential round trips (~{legacy / messages * 1e3 + per_message_trips * rtt_ms:.1f} ms at {rtt_ms} ms RTT)")
+    print(f"Inverted index:      {keyword / messages * 1e3:.3f} ms/message, 0 round trips")
+    print(f"Keyword + vector:    {retrieve / messages * 1e3:.3f} ms/message, 0 round trips")
+    for message in MESSAGES[:3]:
+        print(f"  {message!r} -> {[course['title'] for course in index.retrieve(' '.join(_filtered_terms(message)), k=3)]}")
+
+if __name__ == "__main__":
+    bench_chat_context()
@@ -0,0 +1,74 @@
+import asyncio
+import time
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from middleware.auth_middleware import AuthMiddleware, PUBLIC_PATHS, PUBLIC_PREFIXES
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware pass-through path AuthMiddleware used to take"""
+
+    async def dispatch(self, request: Request, call_next):
+        public_paths = list(PUBLIC_PATHS)
+        if any(request.url.path.startswith(prefix) for prefix in PUBLIC_PREFIXES):
+            return await call_next(request)
+        if request.url.path in public_paths:
+            return await call_next(request)
+        return await call_next(request)
+
+def build_app(middleware_class=None):
+    app = FastAPI()
+
+    @app.get("/api/v1/courses/noop")
+    async def noop():
+        return {}
+
+    if middleware_class:
+        app.add_middleware(middleware_class)
+    return app
+
+async def drive(app, iterations: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/v1/courses/noop",
+        "raw_path": b"/api/v1/courses/noop",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8001),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+async def bench_middleware(iterations: int = 5000):
+    results = {}
+    for label, middleware_class in [
+        ("no middleware", None),
+        ("BaseHTTPMiddleware", LegacyAuthMiddleware),
+        ("pure ASGI", AuthMiddleware),
+    ]:
+        app = build_app(middleware_class)
+        await drive(app, 200)  # warm up
+        results[label] = await drive(app, iterations) / iterations * 1e6
+
+    print(f"Iterations: {iterations} on a no-op route")
+    for label, micros in results.items():
+        print(f"{label:>20}: {micros:.1f} us/request")
+    saved = results["BaseHTTPMiddleware"] - results["pure ASGI"]
+    print(f"Per-request overhead saved: {saved:.1f} us")
+
+if __name__ == "__main__":
+    asyncio.run(bench_middleware())
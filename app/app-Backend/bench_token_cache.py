@@ -0,0 +1,34 @@
+import time
+from helperFunction.jwt_helper import create_access_token, verify_token, token_cache
+
+def bench_token_cache(iterations: int = 20000):
+    token = create_access_token({
+        "user_id": "64b7f0c2a1b2c3d4e5f60718",
+        "email": "bench@example.com",
+        "role": "student",
+        "name": "Bench User"
+    })
+
+    # Decode on every call (cache bypassed)
+    token_cache.clear()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        token_cache.clear()
+        verify_token(token)
+    uncached = time.perf_counter() - start
+
+    # Decode once, then served from the LRU
+    token_cache.clear()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        verify_token(token)
+    cached = time.perf_counter() - start
+
+    print(f"Iterations: {iterations}")
+    print(f"jwt.decode every call: {uncached / iterations * 1e6:.2f} us/verify")
+    print(f"LRU token cache:       {cached / iterations * 1e6:.2f} us/verify")
+    print(f"Speedup: {uncached / cached:.1f}x")
+    print(f"Cache stats: {token_cache.stats()}")
+
+if __name__ == "__main__":
+    bench_token_cache()
@@ -9,10 +9,22 @@ class ChatbotConfig(BaseSettings):
     OPENAI_TEMPERATURE: float = 0.7
     OPENAI_MAX_TOKENS: int = 1000
     
+    # LLM Provider Configuration
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "gemini")  # gemini, fake
+    GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
+    GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    GEMINI_API_BASE: str = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_CONNECT_TIMEOUT: float = 3.0
+    LLM_READ_TIMEOUT: float = 20.0
+    LLM_MAX_RETRIES: int = 2
+    FAKE_LLM_LATENCY_MS: int = 0
+    
     # Vector Store Configuration
     VECTOR_STORE_TYPE: str = "faiss"  # faiss, pinecone, chroma
     EMBEDDING_MODEL: str = "text-embedding-ada-002"
     VECTOR_DIMENSION: int = 1536
+    COURSE_INDEX_SYNC_SECONDS: int = 30
     
     # Memory Configuration
     MEMORY_WINDOW_SIZE: int = 10
@@ -38,6 +50,9 @@ class ChatbotConfig(BaseSettings):
     # Cache Configuration
     ENABLE_CACHE: bool = True
     CACHE_TTL_SECONDS: int = 3600
+    ENABLE_SEMANTIC_CACHE: bool = True
+    SEMANTIC_CACHE_SIZE: int = 512
+    SEMANTIC_CACHE_THRESHOLD: float = 0.85
     
     # Security Configuration
     ENABLE_CONTENT_FILTER: bool = True
@@ -0,0 +1,288 @@
+import asyncio
+import heapq
+import logging
+import math
+from bisect import bisect_left
+from operator import itemgetter
+from typing import Dict, Any, List, Optional
+import numpy as np
+from bson import ObjectId
+from core.database import courses_collection
+from core.redis_client import bump_catalog_version, get_catalog_version
+from .config import chatbot_config
+from .embeddings import DIMENSION, embed, tokenize
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+logger = logging.getLogger(__name__)
+
+PROJECTION = {"title": 1, "description": 1, "category": 1, "price": 1}
+# Title and category say what a course is; descriptions add recall but mostly noise
+TITLE_WEIGHT = 0.65
+DESCRIPTION_WEIGHT = 0.35
+MIN_SCORE = 0.1
+# With no keyword hit, a weak embedding match is usually an unrelated course ("cooking" scores
+# ~0.3 against programming titles); only a close one is worth handing to the LLM as context
+FALLBACK_MIN_SCORE = 0.35
+
+# Keyword index: a title hit outranks a category hit, which outranks a description hit
+KEYWORD_FIELDS = (("title", 3.0), ("category", 2.0), ("description", 1.0))
+# Terms this long also match longer tokens they prefix ("java" -> "javascript"), at a discount
+MIN_PREFIX_LENGTH = 4
+PREFIX_WEIGHT = 0.5
+
+_sync_task = None
+
+async def _catalog_signal() -> tuple:
+    """Course count and latest edit; moves on writes that don't bump the catalog version (admin panel)"""
+    count = await courses_collection.estimated_document_count()
+    latest = await courses_collection.find_one({"updated_date": {"$exists": True}}, {"updated_date": 1}, sort=[("updated_date", -1)])
+    return count, latest["updated_date"] if latest else None
+
+def _course_doc(course: dict) -> Dict[str, Any]:
+    return {
+        "title": course.get("title", ""),
+        "description": course.get("description", ""),
+        "category": course.get("category", ""),
+        "price": course.get("price", 0)
+    }
+
+def _doc_terms(doc: dict) -> Dict[str, float]:
+    terms = {}
+    for field, weight in KEYWORD_FIELDS:
+        for token in tokenize(doc[field] or ""):
+            terms[token] = terms.get(token, 0.0) + weight
+    return terms
+
+def _course_vector(doc: dict) -> np.ndarray:
+    vector = TITLE_WEIGHT * embed(f"{doc['title']} {doc['category']}") + DESCRIPTION_WEIGHT * embed(doc["description"])
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def _prepare(courses: list) -> tuple:
+    """Docs, row ids, embedding matrix and keyword postings for a full catalog"""
+    docs = {str(course["_id"]): _course_doc(course) for course in courses}
+    ids = list(docs)
+    matrix = np.zeros((len(ids), DIMENSION), dtype=np.float32)
+    postings = {}
+    doc_terms = {}
+    for row, course_id in enumerate(ids):
+        matrix[row] = _course_vector(docs[course_id])
+        terms = doc_terms[course_id] = _doc_terms(docs[course_id])
+        for token, weight in terms.items():
+            postings.setdefault(token, {})[course_id] = weight
+    return docs, ids, matrix, postings, doc_terms
+
+class CourseIndex:
+    """All courses in memory, with an inverted keyword index and one embedding row each,
+    so chat context needs no Mongo round trips.
+
+    Built at startup and rebuilt whenever the catalog version or the catalog signal
+    moves; the worker that made a change applies it in place right away.
+    """
+
+    def __init__(self, backend: str = chatbot_config.VECTOR_STORE_TYPE):
+        if backend == "faiss" and faiss is None:
+            logger.info("faiss not installed; course index uses NumPy brute force")
+            backend = "numpy"
+        self.backend = "faiss" if backend == "faiss" else "numpy"
+        self.docs: Dict[str, Dict[str, Any]] = {}  # course_id -> doc, in catalog order
+        self.ids: List[str] = []  # row -> course_id
+        self.rows: Dict[str, int] = {}  # course_id -> row
+        self.matrix = np.zeros((0, DIMENSION), dtype=np.float32)
+        self.postings: Dict[str, Dict[str, float]] = {}  # token -> {course_id: weight}
+        self.doc_terms: Dict[str, Dict[str, float]] = {}  # course_id -> {token: weight}
+        self.version: Optional[str] = None
+        self.signal: Optional[tuple] = None  # _catalog_signal() as of the last build or local refresh
+        self._faiss_index = None
+        self._vocabulary: Optional[List[str]] = None  # sorted tokens for prefix matching, built lazily
+
+    @property
+    def ready(self) -> bool:
+        return self.version is not None
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    async def build(self):
+        """Load every course and replace the index in one step"""
+        version = await get_catalog_version()
+        signal = await _catalog_signal()
+        courses = await courses_collection.find({}, PROJECTION).to_list(length=None)
+        # Embedding a large catalog takes a while; keep it off the event loop
+        prepared = await asyncio.get_running_loop().run_in_executor(None, _prepare, courses)
+        self._swap(prepared, version)
+        self.signal = signal
+        logger.info(f"Course index built: {len(self.ids)} courses, catalog version {version}, {self.backend} backend")
+
+    def load(self, courses: list, version: str):
+        """Replace the index with these courses, synchronously"""
+        self._swap(_prepare(courses), version)
+
+    def _swap(self, prepared: tuple, version: str):
+        # No awaits here: searches never see a half-built index
+        self.docs, self.ids, self.matrix, self.postings, self.doc_terms = prepared
+        self.rows = {course_id: row for row, course_id in enumerate(self.ids)}
+        self._faiss_index = None
+        self._vocabulary = None
+        self.version = version
+
+    def _index_terms(self, course_id: str, doc: dict):
+        terms = _doc_terms(doc)
+        self.doc_terms[course_id] = terms
+        for token, weight in terms.items():
+            self.postings.setdefault(token, {})[course_id] = weight
+        self._vocabulary = None
+
+    def _unindex_terms(self, course_id: str):
+        for token in self.doc_terms.pop(course_id, {}):
+            postings = self.postings[token]
+            del postings[course_id]
+            if not postings:
+                del self.postings[token]
+        self._vocabulary = None
+
+    def upsert(self, course: dict):
+        course_id = str(course["_id"])
+        doc = _course_doc(course)
+        vector = _course_vector(doc)
+        self._unindex_terms(course_id)
+        self._index_terms(course_id, doc)
+        if course_id in self.rows:
+            self.matrix[self.rows[course_id]] = vector
+        else:
+            self.rows[course_id] = len(self.ids)
+            self.ids.append(course_id)
+            self.matrix = np.vstack([self.matrix, vector[np.newaxis, :]])
+        self.docs[course_id] = doc
+        self._faiss_index = None
+
+    def remove(self, course_id: str):
+        row = self.rows.pop(course_id, None)
+        if row is None:
+            return
+        # Move the last row into the hole so rows stay dense
+        last = len(self.ids) - 1
+        if row != last:
+            self.matrix[row] = self.matrix[last]
+            self.ids[row] = self.ids[last]
+            self.rows[self.ids[row]] = row
+        self.ids.pop()
+        self.matrix = self.matrix[:last]
+        del self.docs[course_id]
+        self._unindex_terms(course_id)
+        self._faiss_index = None
+
+    async def refresh_course(self, course_id: str, version: Optional[str] = None):
+        """Apply one course mutation in place; version is the catalog version the mutation produced"""
+        try:
+            course = await courses_collection.find_one({"_id": ObjectId(course_id)}, PROJECTION)
+            if course:
+                self.upsert(course)
+            else:
+                self.remove(course_id)
+            # When nothing else changed in between, this worker is current and skips its next rebuild
+            if version is not None and self.version is not None and int(version) == int(self.version) + 1:
+                self.version = version
+                self.signal = await _catalog_signal()
+        except Exception as e:
+            logger.error(f"Course index refresh error ({course_id}): {e}")
+
+    def _scores(self, vector: np.ndarray, k: int):
+        if self.backend == "faiss":
+            if self._faiss_index is None:
+                self._faiss_index = faiss.IndexFlatIP(DIMENSION)
+                self._faiss_index.add(self.matrix)
+            scores, rows = self._faiss_index.search(vector[np.newaxis, :], k)
+            return [(int(row), float(score)) for row, score in zip(rows[0], scores[0]) if row >= 0]
+
+        scores = self.matrix @ vector
+        if k < len(scores):
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
+
+    def _expand(self, term: str):
+        """Index tokens a query term matches, with their weight"""
+        if term in self.postings:
+            yield term, 1.0
+        if len(term) >= MIN_PREFIX_LENGTH:
+            if self._vocabulary is None:
+                self._vocabulary = sorted(self.postings)
+            for position in range(bisect_left(self._vocabulary, term), len(self._vocabulary)):
+                token = self._vocabulary[position]
+                if not token.startswith(term):
+                    break
+                if token != term:
+                    yield token, PREFIX_WEIGHT
+
+    def keyword_search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Top-k courses by summed idf-weighted field hits, scoring all query terms in one pass"""
+        terms = set(tokenize(query))
+        if not terms or not self.docs:
+            return []
+        total = len(self.docs)
+        scores: Dict[str, float] = {}
+        for term in terms:
+            for token, factor in self._expand(term):
+                postings = self.postings[token]
+                idf = math.log(1 + total / len(postings))
+                for course_id, weight in postings.items():
+                    scores[course_id] = scores.get(course_id, 0.0) + factor * idf * weight
+        return [self.docs[course_id] for course_id, _ in heapq.nlargest(k, scores.items(), key=itemgetter(1))]
+
+    def retrieve(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Keyword matches when there are any; otherwise only courses close to the query by embedding"""
+        return self.keyword_search(query, k) or self.search(query, k, FALLBACK_MIN_SCORE)
+
+    def search(self, query: str, k: int = 5, min_score: float = MIN_SCORE) -> List[Dict[str, Any]]:
+        """Top-k courses by cosine similarity to the query"""
+        if not self.ids:
+            return []
+        vector = embed(query)
+        if not vector.any():
+            return []
+        return [self.docs[self.ids[row]] for row, score in self._scores(vector, min(k, len(self.ids))) if score >= min_score]
+
+    def first(self, k: int = 5) -> List[Dict[str, Any]]:
+        """The first k courses in catalog order"""
+        return [doc for _, doc in zip(range(k), self.docs.values())]
+
+course_index = CourseIndex()
+
+async def refresh_course(course_id: str, version: Optional[str] = None):
+    await course_index.refresh_course(course_id, version)
+
+async def _sync_loop():
+    while True:
+        try:
+            if not course_index.ready or await get_catalog_version() != course_index.version:
+                await course_index.build()
+            elif await _catalog_signal() != course_index.signal:
+                # Written around the app (admin panel): bump the version so every worker's index
+                # and the response caches keyed on it drop what they hold
+                await bump_catalog_version()
+                await course_index.build()
+        except Exception as e:
+            logger.error(f"Course index sync error: {e}")
+        await asyncio.sleep(chatbot_config.COURSE_INDEX_SYNC_SECONDS)
+
+def start_course_index():
+    global _sync_task
+    if _sync_task is None:
+        _sync_task = asyncio.create_task(_sync_loop())
+
+async def stop_course_index():
+    global _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except asyncio.CancelledError:
+            pass
+        _sync_task = None
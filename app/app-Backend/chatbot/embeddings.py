@@ -0,0 +1,57 @@
+import re
+import zlib
+import numpy as np
+
+# Hashing vectorizer: no model to load, same vector in every worker, and cheap enough per message
+DIMENSION = 512
+NGRAM = 3
+
+_WORD = re.compile(r"[a-z0-9+#]+")
+
+# Platform words that people use interchangeably
+SYNONYMS = {
+    "class": "course", "classes": "course", "courses": "course", "lesson": "course", "lessons": "course",
+    "tutorial": "course", "tutorials": "course", "program": "course", "programs": "course",
+    "cost": "price", "costs": "price", "fee": "price", "fees": "price", "prices": "price",
+    "signup": "enroll", "register": "enroll", "join": "enroll",
+    "js": "javascript", "py": "python", "ml": "machine learning", "ai": "artificial intelligence"
+}
+
+def _stem(word: str) -> str:
+    # Plural folding only; anything smarter would need a real stemmer
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+def tokenize(text: str) -> list:
+    words = []
+    for word in _WORD.findall(text.lower()):
+        words.extend(SYNONYMS.get(word, _stem(word)).split())
+    return words
+
+def _features(words: list):
+    """Whole words weigh most; character trigrams catch typos and partial matches"""
+    for word in words:
+        yield "w:" + word, 1.0
+        padded = f"<{word}>"
+        for i in range(len(padded) - NGRAM + 1):
+            yield "c:" + padded[i:i + NGRAM], 0.3
+    for first, second in zip(words, words[1:]):
+        yield f"b:{first} {second}", 0.5
+
+def embed(text: str) -> np.ndarray:
+    """L2-normalized float32 vector; dot products between two embeddings are cosine similarities"""
+    vector = np.zeros(DIMENSION, dtype=np.float32)
+    for feature, weight in _features(tokenize(text)):
+        digest = zlib.crc32(feature.encode())
+        # The spare hash bit picks a sign so collisions cancel out instead of piling up
+        vector[digest % DIMENSION] += weight if digest & 0x80000000 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def embed_many(texts: list) -> np.ndarray:
+    if not texts:
+        return np.zeros((0, DIMENSION), dtype=np.float32)
+    return np.vstack([embed(text) for text in texts])
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from .simple_service import SimpleChatbotService
+from .response_cache import get_cache_stats
 from datetime import datetime
+import json
 import logging
 
 router = APIRouter(prefix="/chatbot", tags=["chatbot"])
@@ -22,6 +25,7 @@ class ChatResponse(BaseModel):
     sources: List[Dict[str, Any]]
     timestamp: str
     session_id: Optional[str] = None
+    cached: bool = False
 
 class FeedbackRequest(BaseModel):
     message_id: str
@@ -56,13 +60,53 @@ async def chat_with_bot(
             intent=response_data["intent"],
             sources=response_data["sources"],
             timestamp=response_data["timestamp"],
-            session_id=chat_data.session_id
+            session_id=chat_data.session_id,
+            cached=response_data.get("cached", False)
         )
     
     except Exception as e:
         logger.error(f"Chat error: {e}")
         raise HTTPException(status_code=500, detail=f"Chatbot error: {str(e)}")
 
+@router.post("/chat/stream")
+async def chat_stream(chat_data: ChatMessage, request: Request):
+    """Server-Sent Events variant of /chat: meta first, then tokens as the model produces them"""
+    user_id = "anonymous"
+    events = chatbot_service.stream_response(chat_data.message, user_id=user_id)
+
+    async def generate():
+        chunks = []
+        meta = {}
+        try:
+            async for event in events:
+                # Stop pulling from the model as soon as the client goes away
+                if await request.is_disconnected():
+                    break
+                if event["type"] == "meta":
+                    meta = event
+                    event = {**event, "session_id": chat_data.session_id}
+                elif event["type"] == "token":
+                    chunks.append(event["text"])
+                elif event["type"] == "fallback":
+                    chunks = [event["text"]]
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            logger.error(f"Chat stream error: {e}")
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'detail': 'Chatbot error'})}\n\n"
+        finally:
+            # Closing the generator cancels the upstream LLM request if it is still running
+            await events.aclose()
+        if meta:
+            await log_chat_analytics(user_id, chat_data.message, {
+                "intent": meta["intent"], "response": "".join(chunks), "sources": meta["sources"]
+            })
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/feedback")
 async def submit_feedback(feedback: FeedbackRequest):
     """Submit feedback for chatbot responses"""
@@ -91,7 +135,8 @@ async def chatbot_health():
     return {
         "status": "Chatbot service is running",
         "timestamp": datetime.now().isoformat(),
-        "version": "2.0.0"
+        "version": "2.0.0",
+        "response_cache": get_cache_stats()
     }
 
 # Helper functions
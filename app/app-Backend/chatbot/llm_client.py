@@ -0,0 +1,162 @@
+import asyncio
+import json
+import logging
+import random
+from typing import AsyncIterator, Optional
+import httpx
+from .config import chatbot_config
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RETRY_BASE_SECONDS = 0.5
+
+class LLMError(Exception):
+    """The provider could not produce a completion"""
+
+class GeminiClient:
+    """Async Gemini REST client over one pooled connection, with bounded concurrency and retries"""
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = chatbot_config.GEMINI_MODEL,
+        api_base: str = chatbot_config.GEMINI_API_BASE,
+        max_concurrency: int = chatbot_config.LLM_MAX_CONCURRENCY,
+        connect_timeout: float = chatbot_config.LLM_CONNECT_TIMEOUT,
+        read_timeout: float = chatbot_config.LLM_READ_TIMEOUT,
+        max_retries: int = chatbot_config.LLM_MAX_RETRIES
+    ):
+        self.api_key = api_key
+        self.model = model
+        self.api_base = api_base.rstrip("/")
+        self.max_retries = max_retries
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self._limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.api_base,
+                headers={"x-goog-api-key": self.api_key},
+                timeout=self.timeout,
+                limits=self._limits
+            )
+        return self._client
+
+    @staticmethod
+    def _payload(prompt: str) -> dict:
+        return {"contents": [{"parts": [{"text": prompt}]}]}
+
+    @staticmethod
+    def _text(data: dict) -> str:
+        candidates = data.get("candidates") or []
+        if not candidates:
+            return ""
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts)
+
+    async def _backoff(self, attempt: int):
+        # Exponential backoff with full jitter so retries from many requests don't line up
+        await asyncio.sleep(random.uniform(0, RETRY_BASE_SECONDS * 2 ** attempt))
+
+    async def generate(self, prompt: str) -> str:
+        """Full completion for a prompt"""
+        url = f"/models/{self.model}:generateContent"
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = await self.client.post(url, json=self._payload(prompt))
+                except httpx.TransportError as e:
+                    if attempt == self.max_retries:
+                        raise LLMError(f"Gemini unreachable: {e}") from e
+                else:
+                    if response.status_code == 200:
+                        text = self._text(response.json())
+                        if not text:
+                            raise LLMError("Gemini returned no candidates")
+                        return text.strip()
+                    if response.status_code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                        raise LLMError(f"Gemini API error: {response.status_code} - {response.text[:200]}")
+                await self._backoff(attempt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Completion text chunks as Gemini generates them (streamGenerateContent over SSE)"""
+        url = f"/models/{self.model}:streamGenerateContent"
+        yielded = False
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    async with self.client.stream("POST", url, params={"alt": "sse"}, json=self._payload(prompt)) as response:
+                        if response.status_code != 200:
+                            body = (await response.aread()).decode(errors="replace")
+                            if response.status_code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                                raise LLMError(f"Gemini API error: {response.status_code} - {body[:200]}")
+                        else:
+                            async for line in response.aiter_lines():
+                                if not line.startswith("data:"):
+                                    continue
+                                text = self._text(json.loads(line[5:]))
+                                if text:
+                                    yielded = True
+                                    yield text
+                            return
+                except httpx.TransportError as e:
+                    # A retry would replay the completion from the start after chunks the caller already has
+                    if yielded or attempt == self.max_retries:
+                        raise LLMError(f"Gemini unreachable: {e}") from e
+                await self._backoff(attempt)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+class FakeLLMProvider:
+    """Local stand-in for tests and load runs: deterministic text, optional latency and failures"""
+
+    def __init__(self, latency_ms: int = chatbot_config.FAKE_LLM_LATENCY_MS, fail: bool = False, reply: str = None):
+        self.latency = latency_ms / 1000
+        self.fail = fail
+        self.reply = reply
+        self.calls = 0
+
+    def _answer(self, prompt: str) -> str:
+        if self.reply is not None:
+            return self.reply
+        query = prompt.split("User Query:", 1)[-1].split("\n", 1)[0].strip()
+        return f"(fake) You asked: {query}"
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail:
+            raise LLMError("Fake provider failure")
+        return self._answer(prompt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        self.calls += 1
+        words = self._answer(prompt).split(" ")
+        for index, word in enumerate(words):
+            # Latency is spread across chunks, like a real stream
+            if self.latency:
+                await asyncio.sleep(self.latency / len(words))
+            if self.fail and index == len(words) // 2:
+                raise LLMError("Fake provider failure")
+            yield word if index == 0 else " " + word
+
+    async def aclose(self):
+        pass
+
+def get_llm_provider():
+    """Provider named by LLM_PROVIDER, or None when Gemini has no key (fallback responses only)"""
+    if chatbot_config.LLM_PROVIDER == "fake":
+        return FakeLLMProvider()
+    if chatbot_config.GEMINI_API_KEY:
+        return GeminiClient(chatbot_config.GEMINI_API_KEY)
+    logger.info("No GEMINI_API_KEY set; chatbot will use fallback responses")
+    return None
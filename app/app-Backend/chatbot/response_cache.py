@@ -0,0 +1,155 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Any, NamedTuple, Optional, Tuple
+import numpy as np
+from core.redis_client import get_catalog_version, get_chat_response, cache_chat_response
+from .config import chatbot_config
+from .embeddings import DIMENSION, embed
+
+KEY_PREFIX = "chatbot:response"
+
+# Words that don't change the answer; dropped so phrasing variants share an entry.
+# Course search ignores them too, so every message mapping to a key gets the same context.
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "am", "be", "do", "does", "can", "could", "would", "will",
+    "i", "me", "my", "you", "your", "we", "our", "it", "this", "that", "there", "have", "has",
+    "what", "which", "please", "tell", "give", "of", "for", "to", "in", "on", "at",
+    "any", "some", "about", "hi", "hello", "hey"
+}
+
+_WORD = re.compile(r"[a-z0-9+#.]+")
+
+cache_stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0}
+
+class CacheSlot(NamedTuple):
+    """Where a response for this message goes once generated"""
+    key: str
+    catalog_version: str
+    intent: str
+    vector: Optional[np.ndarray]
+
+class SemanticCache:
+    """Recent query embeddings and their responses, searched by cosine top-1.
+
+    Per worker and in memory: a fixed matrix with LRU slot reuse. A new catalog
+    version empties it, since every answer may mention courses; entries also age
+    out after ttl_seconds like their Redis counterparts.
+    """
+
+    def __init__(self, capacity: int, threshold: float, ttl_seconds: int):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.vectors = np.zeros((capacity, DIMENSION), dtype=np.float32)
+        self.stored_at = np.zeros(capacity)
+        self.intents = np.full(capacity, None, dtype=object)
+        self.responses = [None] * capacity
+        self.lru = OrderedDict()  # slot -> None, least recently used first
+        self.catalog_version = None
+
+    def __len__(self) -> int:
+        return len(self.lru)
+
+    def _sync_version(self, catalog_version: str):
+        if catalog_version != self.catalog_version:
+            self.clear()
+            self.catalog_version = catalog_version
+
+    def clear(self):
+        self.intents[:] = None
+        self.responses = [None] * self.capacity
+        self.lru.clear()
+
+    def lookup(self, vector: np.ndarray, intent: str, catalog_version: str) -> Optional[Dict[str, Any]]:
+        self._sync_version(catalog_version)
+        if not self.lru or not vector.any():
+            return None
+        scores = self.vectors @ vector
+        # Empty slots hold intent None, so this also masks them out
+        scores[self.intents != intent] = -1.0
+        scores[self.stored_at < time.monotonic() - self.ttl_seconds] = -1.0
+        slot = int(np.argmax(scores))
+        if scores[slot] < self.threshold:
+            return None
+        self.lru.move_to_end(slot)
+        return self.responses[slot]
+
+    def store(self, vector: np.ndarray, intent: str, catalog_version: str, response: Dict[str, Any]):
+        self._sync_version(catalog_version)
+        if not vector.any():
+            return
+        if len(self.lru) < self.capacity:
+            # Slots fill in order and are only freed by clear(), so the next one is always free
+            slot = len(self.lru)
+        else:
+            slot, _ = self.lru.popitem(last=False)
+        self.vectors[slot] = vector
+        self.intents[slot] = intent
+        self.stored_at[slot] = time.monotonic()
+        self.responses[slot] = response
+        self.lru[slot] = None
+
+semantic_cache = SemanticCache(
+    chatbot_config.SEMANTIC_CACHE_SIZE, chatbot_config.SEMANTIC_CACHE_THRESHOLD, chatbot_config.CACHE_TTL_SECONDS
+)
+
+def normalize_message(message: str) -> str:
+    """Lowercase, strip punctuation and stopwords, collapse whitespace"""
+    words = [word.strip(".") for word in _WORD.findall(message.lower())]
+    kept = [word for word in words if word and word not in STOPWORDS]
+    # A message made only of stopwords still needs a stable key
+    return " ".join(kept or words)
+
+def _key(normalized: str, intent: str, catalog_version: str) -> str:
+    digest = hashlib.sha1(normalized.encode()).hexdigest()
+    return f"{KEY_PREFIX}:{catalog_version}:{intent}:{digest}"
+
+def _semantic_enabled() -> bool:
+    return chatbot_config.ENABLE_SEMANTIC_CACHE and chatbot_config.SEMANTIC_CACHE_SIZE > 0
+
+async def lookup_response(message: str, intent: str) -> Tuple[Optional[CacheSlot], Optional[Dict[str, Any]]]:
+    """Exact match in Redis first, then a paraphrase from the semantic cache.
+
+    Returns the slot to store into on a miss (None when caching is disabled) and the cached response.
+    """
+    if not chatbot_config.ENABLE_CACHE or chatbot_config.CACHE_TTL_SECONDS <= 0:
+        return None, None
+
+    catalog_version = await get_catalog_version()
+    normalized = normalize_message(message)
+    slot = CacheSlot(_key(normalized, intent, catalog_version), catalog_version, intent, None)
+    cached = await get_chat_response(slot.key)
+    if cached:
+        cache_stats["hits"] += 1
+        return slot, cached
+
+    if _semantic_enabled():
+        slot = slot._replace(vector=embed(normalized))
+        cached = semantic_cache.lookup(slot.vector, intent, catalog_version)
+        if cached:
+            cache_stats["semantic_hits"] += 1
+            return slot, cached
+
+    cache_stats["misses"] += 1
+    return slot, None
+
+async def store_response(slot: Optional[CacheSlot], response: Dict[str, Any]):
+    if slot is None or not response.get("response"):
+        # An empty answer would be served as a hit until the entry expires
+        return
+    if slot.vector is not None:
+        semantic_cache.store(slot.vector, slot.intent, slot.catalog_version, response)
+    if await cache_chat_response(slot.key, response, chatbot_config.CACHE_TTL_SECONDS):
+        cache_stats["stores"] += 1
+
+def get_cache_stats() -> dict:
+    lookups = cache_stats["hits"] + cache_stats["semantic_hits"] + cache_stats["misses"]
+    return {
+        "enabled": chatbot_config.ENABLE_CACHE,
+        "ttl_seconds": chatbot_config.CACHE_TTL_SECONDS,
+        **cache_stats,
+        "hit_ratio": (cache_stats["hits"] + cache_stats["semantic_hits"]) / lookups if lookups else 0.0,
+        "semantic_entries": len(semantic_cache)
+    }
@@ -1,39 +1,53 @@
 from fastapi import HTTPException
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Optional
 import json
 import os
 import logging
 from datetime import datetime
-from core.database import get_database
+from .llm_client import LLMError, get_llm_provider
+from .course_index import course_index
+from .response_cache import STOPWORDS, lookup_response, store_response
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class SimpleChatbotService:
-    def __init__(self):
-        self.gemini_api_key = os.getenv("GEMINI_API_KEY")
+    def __init__(self, provider=None):
+        self.provider = provider if provider is not None else get_llm_provider()
+    
+    async def close(self):
+        """Release the provider's pooled connections"""
+        if self.provider is not None:
+            await self.provider.aclose()
         
     async def get_response(self, user_message: str, user_id: str = None, user_context: Dict = None) -> Dict[str, Any]:
-        """Generate response using Gemini API"""
+        """Generate response using the configured LLM provider"""
         try:
-            # Get course context
-            course_context = await self._get_course_context(user_message)
-            
             # Classify intent
             intent = self._classify_intent(user_message)
             
-            # Generate response
-            if self.gemini_api_key:
-                response_text = self._call_gemini_api(user_message, course_context, intent)
+            # Same (or paraphrased) question against the same catalog: skip Mongo and the LLM
+            cache_slot, cached = await lookup_response(user_message, intent)
+            if cached:
+                return {**cached, "timestamp": datetime.now().isoformat(), "cached": True}
+            
+            # Get course context
+            course_context = await self._get_course_context(user_message)
+            
+            # Generate response; canned fallbacks after an LLM failure are not cached
+            response_text = None
+            if self.provider is not None:
+                response_text = await self._call_llm(user_message, course_context, intent)
+                cacheable = response_text is not None
             else:
+                cacheable = True
+            if response_text is None:
                 response_text = self._get_fallback_response(user_message, intent, course_context)
             
-            return {
-                "response": response_text,
-                "intent": intent,
-                "sources": course_context[:3],
-                "timestamp": datetime.now().isoformat()
-            }
+            result = {"response": response_text, "intent": intent, "sources": course_context[:3]}
+            if cacheable:
+                await store_response(cache_slot, result)
+            return {**result, "timestamp": datetime.now().isoformat()}
             
         except Exception as e:
             logger.error(f"Error generating response: {e}")
@@ -44,71 +58,77 @@ class SimpleChatbotService:
                 "timestamp": datetime.now().isoformat()
             }
     
+    async def stream_response(self, user_message: str, user_id: str = None) -> AsyncIterator[Dict[str, Any]]:
+        """Response as events: meta (intent, sources) first, then tokens, then done.
+
+        If the LLM fails part-way, a fallback event carries the full canned answer to show instead.
+        """
+        intent = self._classify_intent(user_message)
+        cache_slot, cached = await lookup_response(user_message, intent)
+        if cached:
+            yield {"type": "meta", "intent": intent, "sources": cached["sources"], "timestamp": datetime.now().isoformat(), "cached": True}
+            yield {"type": "token", "text": cached["response"]}
+            yield {"type": "done"}
+            return
+        
+        course_context = await self._get_course_context(user_message)
+        yield {"type": "meta", "intent": intent, "sources": course_context[:3], "timestamp": datetime.now().isoformat()}
+        
+        if self.provider is None:
+            text = self._get_fallback_response(user_message, intent, course_context)
+            yield {"type": "token", "text": text}
+            parts = [text]
+        else:
+            parts = []
+            chunks = self.provider.stream(self._build_prompt(user_message, course_context, intent))
+            try:
+                async for text in chunks:
+                    parts.append(text)
+                    yield {"type": "token", "text": text}
+                if not "".join(parts).strip():
+                    # Same as generate(): a blocked or empty completion is a failure, not an answer
+                    raise LLMError("Gemini returned no candidates")
+            except Exception as e:
+                logger.error(f"LLM stream error: {e}")
+                parts = None
+                yield {"type": "fallback", "text": self._get_fallback_response(user_message, intent, course_context)}
+            finally:
+                # Runs on client disconnect too, closing the upstream HTTP stream right away
+                await chunks.aclose()
+        
+        # Only a stream that ran to completion is cached
+        if parts is not None:
+            await store_response(cache_slot, {"response": "".join(parts).strip(), "intent": intent, "sources": course_context[:3]})
+        yield {"type": "done"}
+    
     async def _get_course_context(self, query: str) -> list:
-        """Get relevant courses from database"""
+        """Get relevant courses from the in-memory course index"""
         try:
-            db = get_database()
-            courses_collection = db.courses
-            
-            # Get all courses first
-            all_courses = await courses_collection.find().to_list(length=10)
-            logger.info(f"Found {len(all_courses)} total courses")
+            if not course_index.ready:
+                # Startup build hasn't finished (or failed); build inline once
+                await course_index.build()
             
-            # Simple keyword search
+            # Simple keyword extraction
             keywords = query.lower().split()
             search_terms = [keyword for keyword in keywords if len(keyword) > 2]
-            logger.info(f"All search terms: {search_terms}")
             
             if search_terms:
                 # Filter out generic terms
-                filtered_terms = [term for term in search_terms if term not in ['course', 'courses', 'class', 'tutorial', 'want', 'buy', 'purchase', 'about', 'the', 'how', 'but']]
-                logger.info(f"Filtered search terms: {filtered_terms}")
+                filtered_terms = [term for term in search_terms if term not in ['course', 'courses', 'class', 'tutorial', 'want', 'buy', 'purchase', 'about', 'the', 'how', 'but'] and term not in STOPWORDS]
                 
                 if filtered_terms:
-                    # Search for specific terms only
-                    courses = []
-                    for term in filtered_terms:
-                        logger.info(f"Searching for term: {term}")
-                        # Try exact match first
-                        exact_matches = await courses_collection.find({"title": {"$regex": f"^{term}$", "$options": "i"}}).to_list(length=5)
-                        logger.info(f"Exact matches for '{term}': {len(exact_matches)}")
-                        courses.extend(exact_matches)
-                        
-                        # If no exact matches, try partial matches
-                        if not exact_matches:
-                            partial_matches = await courses_collection.find({
-                                "$or": [
-                                    {"title": {"$regex": term, "$options": "i"}},
-                                    {"description": {"$regex": term, "$options": "i"}}
-                                ]
-                            }).to_list(length=3)
-                            logger.info(f"Partial matches for '{term}': {len(partial_matches)}")
-                            courses.extend(partial_matches)
-                    
-                    # Remove duplicates
-                    seen = set()
-                    unique_courses = []
-                    for course in courses:
-                        course_id = str(course.get('_id'))
-                        if course_id not in seen:
-                            seen.add(course_id)
-                            unique_courses.append(course)
-                    
-                    courses = unique_courses[:5]
-                    logger.info(f"Found {len(courses)} matching courses after filtering")
+                    courses = course_index.retrieve(" ".join(filtered_terms), k=5)
+                    logger.info(f"Found {len(courses)} matching courses for {filtered_terms}")
                 else:
                     # No specific terms, check if asking for all courses
                     if any(word in query.lower() for word in ['available', 'all', 'show', 'list']):
-                        courses = all_courses[:5]
-                        logger.info(f"Showing all available courses: {len(courses)}")
+                        courses = course_index.first(5)
                     else:
                         courses = []
             else:
-                courses = all_courses[:5]
+                courses = course_index.first(5)
             
-            result = [{"title": course.get("title", ""), "description": course.get("description", ""), "price": course.get("price", 0)} for course in courses]
-            logger.info(f"Returning courses: {result}")
-            return result
+            return [{"title": course["title"], "description": course["description"], "price": course["price"]} for course in courses]
             
         except Exception as e:
             logger.error(f"Error getting course context: {e}")
@@ -129,52 +149,25 @@ class SimpleChatbotService:
         else:
             return "general_info"
     
-    def _call_gemini_api(self, message: str, course_context: list, intent: str) -> str:
-        """Call Gemini API using REST API"""
+    def _build_prompt(self, message: str, course_context: list, intent: str) -> str:
+        """Prompt for the LLM: intent system prompt plus the matched courses"""
+        context_text = ""
+        if course_context:
+            context_text = f"IMPORTANT: Our platform currently has exactly {len(course_context)} courses available:\n"
+            for course in course_context[:5]:
+                context_text += f"- {course['title']}: {course['description']} (${course['price']})\n"
+            context_text += "\nPlease use ONLY this information about available courses. Do not make up numbers or mention courses not listed above.\n"
+        
+        system_prompt = self._get_system_prompt(intent)
+        return f"{system_prompt}\n\nIMPORTANT: Only use the course information provided in the context. Do not invent or assume additional courses exist.\n\nUser Query: {message}\n\nContext: {context_text}\n\nPlease provide a helpful but CONCISE response (maximum 3-4 sentences) using ONLY the context provided:"
+    
+    async def _call_llm(self, message: str, course_context: list, intent: str) -> Optional[str]:
+        """Ask the LLM provider; None on any failure so the caller can fall back"""
         try:
-            import requests
-            
-            api_key = self.gemini_api_key
-            if not api_key:
-                return self._get_fallback_response(message, intent, course_context)
-            
-            # Build context
-            context_text = ""
-            if course_context:
-                context_text = f"IMPORTANT: Our platform currently has exactly {len(course_context)} courses available:\n"
-                for course in course_context[:5]:
-                    context_text += f"- {course['title']}: {course['description']} (${course['price']})\n"
-                context_text += "\nPlease use ONLY this information about available courses. Do not make up numbers or mention courses not listed above.\n"
-            
-            # Create prompt
-            system_prompt = self._get_system_prompt(intent)
-            full_prompt = f"{system_prompt}\n\nIMPORTANT: Only use the course information provided in the context. Do not invent or assume additional courses exist.\n\nUser Query: {message}\n\nContext: {context_text}\n\nPlease provide a helpful but CONCISE response (maximum 3-4 sentences) using ONLY the context provided:"
-            
-            # Call Gemini REST API
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={api_key}"
-            
-            payload = {
-                "contents": [{
-                    "parts": [{
-                        "text": full_prompt
-                    }]
-                }]
-            }
-            
-            response = requests.post(url, json=payload, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'candidates' in data and len(data['candidates']) > 0:
-                    text = data['candidates'][0]['content']['parts'][0]['text']
-                    return text.strip()
-            
-            logger.error(f"Gemini API error: {response.status_code} - {response.text}")
-            return self._get_fallback_response(message, intent, course_context)
-            
+            return await self.provider.generate(self._build_prompt(message, course_context, intent))
         except Exception as e:
-            logger.error(f"Gemini API error: {e}")
-            return self._get_fallback_response(message, intent, course_context)
+            logger.error(f"LLM error: {e}")
+            return None
     
     def _get_system_prompt(self, intent: str) -> str:
         """Get system prompt based on intent"""
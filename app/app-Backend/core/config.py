@@ -12,15 +12,41 @@ class Settings:
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET", "your-secret-key-here")
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+    REVOCATION_BLOOM_CAPACITY: int = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+    REVOCATION_BLOOM_ERROR_RATE: float = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+    REVOCATION_REBUILD_SECONDS: int = int(os.getenv("REVOCATION_REBUILD_SECONDS", "3600"))
+    
+    # Password Hashing Configuration
+    PASSWORD_HASH_METHOD: str = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
     
     # Email Configuration
-    EMAIL_HOST: str = "smtp.gmail.com"
-    EMAIL_PORT: int = 587
+    EMAIL_HOST: str = os.getenv("EMAIL_HOST", "smtp.gmail.com")
+    EMAIL_PORT: int = int(os.getenv("EMAIL_PORT", "587"))
     EMAIL_USER: str = os.getenv("EMAIL_USER")
     EMAIL_PASSWORD: str = os.getenv("EMAIL_PASSWORD")
+    EMAIL_USE_TLS: bool = os.getenv("EMAIL_USE_TLS", "true").lower() == "true"
+    EMAIL_POOL_SIZE: int = int(os.getenv("EMAIL_POOL_SIZE", "3"))
+    EMAIL_BATCH_SIZE: int = int(os.getenv("EMAIL_BATCH_SIZE", "20"))
+    EMAIL_MAX_ATTEMPTS: int = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
     
     # Redis Configuration
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+    REDIS_SOCKET_TIMEOUT: float = float(os.getenv("REDIS_SOCKET_TIMEOUT", "2"))
+    REDIS_HEALTH_CHECK_INTERVAL: int = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+    REDIS_BREAKER_THRESHOLD: int = int(os.getenv("REDIS_BREAKER_THRESHOLD", "5"))
+    REDIS_BREAKER_RESET_SECONDS: int = int(os.getenv("REDIS_BREAKER_RESET_SECONDS", "30"))
+    ACTIVE_FLAG_SYNC_SECONDS: int = int(os.getenv("ACTIVE_FLAG_SYNC_SECONDS", "300"))  # 0 disables
+    COUNTER_RECONCILE_SECONDS: int = int(os.getenv("COUNTER_RECONCILE_SECONDS", "3600"))  # 0 disables
+    
+    # OTP Configuration
+    OTP_TTL_SECONDS: int = int(os.getenv("OTP_TTL_SECONDS", "600"))
+    OTP_MAX_ATTEMPTS: int = int(os.getenv("OTP_MAX_ATTEMPTS", "5"))
+    OTP_RESEND_COOLDOWN_SECONDS: int = int(os.getenv("OTP_RESEND_COOLDOWN_SECONDS", "60"))
+    OTP_RESEND_MAX_PER_HOUR: int = int(os.getenv("OTP_RESEND_MAX_PER_HOUR", "5"))
     
     # Cloudinary Configuration
     CLOUDINARY_CLOUD_NAME: str = os.getenv("CLOUDINARY_CLOUD_NAME")
@@ -30,6 +56,17 @@ class Settings:
     # Stripe Configuration
     STRIPE_PUBLISHABLE_KEY: str = os.getenv("STRIPE_PUBLISHABLE_KEY")
     STRIPE_SECRET_KEY: str = os.getenv("STRIPE_SECRET_KEY")
+    STRIPE_API_BASE: str = os.getenv("STRIPE_API_BASE", "https://api.stripe.com")  # point at the fake server for offline tests
+    STRIPE_TIMEOUT_SECONDS: float = float(os.getenv("STRIPE_TIMEOUT_SECONDS", "10"))
+    STRIPE_MAX_RETRIES: int = int(os.getenv("STRIPE_MAX_RETRIES", "2"))
+    STRIPE_MAX_CONNECTIONS: int = int(os.getenv("STRIPE_MAX_CONNECTIONS", "20"))
+    STRIPE_WEBHOOK_SECRET: str = os.getenv("STRIPE_WEBHOOK_SECRET")
+    CHECKOUT_SESSION_TTL_SECONDS: int = int(os.getenv("CHECKOUT_SESSION_TTL_SECONDS", "3600"))  # Stripe allows 30 min to 24 h
+    STRIPE_CATALOG_SYNC_SECONDS: int = int(os.getenv("STRIPE_CATALOG_SYNC_SECONDS", "3600"))  # 0 disables
+    PAYMENT_RECONCILE_SECONDS: int = int(os.getenv("PAYMENT_RECONCILE_SECONDS", "900"))  # 0 disables
+    ANALYTICS_ROLLUP_SECONDS: int = int(os.getenv("ANALYTICS_ROLLUP_SECONDS", "300"))  # 0 disables
+    WEBHOOK_BATCH_SIZE: int = int(os.getenv("WEBHOOK_BATCH_SIZE", "50"))
+    WEBHOOK_MAX_ATTEMPTS: int = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8"))
 
 settings = Settings()
 
@@ -37,13 +74,46 @@ settings = Settings()
 MONGODB_URL = settings.MONGODB_URL
 DB_NAME = settings.DB_NAME
 JWT_SECRET = settings.JWT_SECRET_KEY
+TOKEN_CACHE_SIZE = settings.TOKEN_CACHE_SIZE
+REVOCATION_BLOOM_CAPACITY = settings.REVOCATION_BLOOM_CAPACITY
+REVOCATION_BLOOM_ERROR_RATE = settings.REVOCATION_BLOOM_ERROR_RATE
+REVOCATION_REBUILD_SECONDS = settings.REVOCATION_REBUILD_SECONDS
+PASSWORD_HASH_METHOD = settings.PASSWORD_HASH_METHOD
+PASSWORD_HASH_WORKERS = settings.PASSWORD_HASH_WORKERS
+PASSWORD_HASH_MAX_PENDING = settings.PASSWORD_HASH_MAX_PENDING
 EMAIL_HOST = settings.EMAIL_HOST
 EMAIL_PORT = settings.EMAIL_PORT
 EMAIL_USER = settings.EMAIL_USER
 EMAIL_PASSWORD = settings.EMAIL_PASSWORD
+EMAIL_USE_TLS = settings.EMAIL_USE_TLS
+EMAIL_POOL_SIZE = settings.EMAIL_POOL_SIZE
+EMAIL_BATCH_SIZE = settings.EMAIL_BATCH_SIZE
+EMAIL_MAX_ATTEMPTS = settings.EMAIL_MAX_ATTEMPTS
 REDIS_URL = settings.REDIS_URL
+REDIS_MAX_CONNECTIONS = settings.REDIS_MAX_CONNECTIONS
+REDIS_SOCKET_TIMEOUT = settings.REDIS_SOCKET_TIMEOUT
+REDIS_HEALTH_CHECK_INTERVAL = settings.REDIS_HEALTH_CHECK_INTERVAL
+REDIS_BREAKER_THRESHOLD = settings.REDIS_BREAKER_THRESHOLD
+REDIS_BREAKER_RESET_SECONDS = settings.REDIS_BREAKER_RESET_SECONDS
+ACTIVE_FLAG_SYNC_SECONDS = settings.ACTIVE_FLAG_SYNC_SECONDS
+COUNTER_RECONCILE_SECONDS = settings.COUNTER_RECONCILE_SECONDS
+OTP_TTL_SECONDS = settings.OTP_TTL_SECONDS
+OTP_MAX_ATTEMPTS = settings.OTP_MAX_ATTEMPTS
+OTP_RESEND_COOLDOWN_SECONDS = settings.OTP_RESEND_COOLDOWN_SECONDS
+OTP_RESEND_MAX_PER_HOUR = settings.OTP_RESEND_MAX_PER_HOUR
 CLOUDINARY_CLOUD_NAME = settings.CLOUDINARY_CLOUD_NAME
 CLOUDINARY_API_KEY = settings.CLOUDINARY_API_KEY
 CLOUDINARY_API_SECRET = settings.CLOUDINARY_API_SECRET
 STRIPE_PUBLISHABLE_KEY = settings.STRIPE_PUBLISHABLE_KEY
-STRIPE_SECRET_KEY = settings.STRIPE_SECRET_KEY
\ No newline at end of file
+STRIPE_SECRET_KEY = settings.STRIPE_SECRET_KEY
+STRIPE_API_BASE = settings.STRIPE_API_BASE
+STRIPE_TIMEOUT_SECONDS = settings.STRIPE_TIMEOUT_SECONDS
+STRIPE_MAX_RETRIES = settings.STRIPE_MAX_RETRIES
+STRIPE_MAX_CONNECTIONS = settings.STRIPE_MAX_CONNECTIONS
+STRIPE_WEBHOOK_SECRET = settings.STRIPE_WEBHOOK_SECRET
+CHECKOUT_SESSION_TTL_SECONDS = settings.CHECKOUT_SESSION_TTL_SECONDS
+STRIPE_CATALOG_SYNC_SECONDS = settings.STRIPE_CATALOG_SYNC_SECONDS
+PAYMENT_RECONCILE_SECONDS = settings.PAYMENT_RECONCILE_SECONDS
+ANALYTICS_ROLLUP_SECONDS = settings.ANALYTICS_ROLLUP_SECONDS
+WEBHOOK_BATCH_SIZE = settings.WEBHOOK_BATCH_SIZE
+WEBHOOK_MAX_ATTEMPTS = settings.WEBHOOK_MAX_ATTEMPTS
\ No newline at end of file
@@ -1,6 +1,6 @@
 from motor.motor_asyncio import AsyncIOMotorClient as MongoClient
+from pymongo.errors import OperationFailure
 from core.config import MONGODB_URL, DB_NAME
-from core.redis_client import connect_redis_sync, close_redis_sync
 
 # Create a MongoDB client
 client = MongoClient(MONGODB_URL)
@@ -13,12 +13,63 @@ users_collection = db.users  # Temporarily using users until data is moved
 courses_collection = db.courses
 course_videos_collection = db.course_videos
 
+DUPLICATE_KEY = 11000
+
+async def _log_duplicates(collection, keys: list, match: dict = None):
+    group_id = {field: f"${field}" for field, _ in keys}
+    pipeline = ([{"$match": match}] if match else []) + [
+        {"$group": {"_id": group_id, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": 20}
+    ]
+    async for duplicate in collection.aggregate(pipeline):
+        print(f"  {collection.name} duplicate {duplicate['_id']}: {duplicate['ids']}")
+
+async def _create_unique_index(collection, keys, match: dict = None, **kwargs):
+    """Unique index on data that predates it; duplicates are logged for cleanup instead of blocking startup"""
+    if isinstance(keys, str):
+        keys = [(keys, 1)]
+    try:
+        await collection.create_index(keys, unique=True, **kwargs)
+    except OperationFailure as e:
+        if e.code != DUPLICATE_KEY:
+            raise
+        print(f"Unique index on {collection.name} {[field for field, _ in keys]} not built: existing duplicates must be merged first")
+        await _log_duplicates(collection, keys, match)
+
+async def ensure_indexes():
+    await db.email_outbox.create_index([("status", 1), ("next_attempt_at", 1)])
+    await db.email_outbox.create_index("claim_id", sparse=True)
+    await db.stripe_events.create_index("event_id", unique=True)
+    await db.stripe_events.create_index([("status", 1), ("next_attempt_at", 1)])
+    await db.stripe_events.create_index("claim_id", sparse=True)
+    await db.stripe_events.create_index([("session_key", 1), ("status", 1), ("next_attempt_at", 1)])
+    await _create_unique_index(db.payments, "stripe_session_id", match={"stripe_session_id": {"$exists": True}}, sparse=True)
+    await db.payments.create_index([("student_id", 1), ("course_id", 1), ("status", 1)])
+    await _create_unique_index(
+        db.payments,
+        "stripe_payment_intent_id",
+        match={"stripe_payment_intent_id": {"$type": "string"}},
+        partialFilterExpression={"stripe_payment_intent_id": {"$type": "string"}}
+    )
+    await db.payments.create_index("completed_at", sparse=True)
+    # Oldest pending checkout, where the payment reconciler's Stripe window starts
+    await db.payments.create_index([("status", 1), ("created_at", 1)])
+    await db.payments.create_index("refunds.refunded_at", sparse=True)
+    # $merge targets need a unique index on their "on" fields
+    await db.revenue_by_course.create_index([("course_id", 1), ("period", 1), ("bucket", 1)], unique=True)
+    await db.revenue_by_course.create_index([("teacher_id", 1), ("period", 1), ("bucket", 1)])
+    await db.revenue_by_teacher.create_index([("teacher_id", 1), ("period", 1), ("bucket", 1)], unique=True)
+    # Latest course edit, read by the chatbot's course index sync
+    await db.courses.create_index("updated_date", sparse=True)
+    # Makes enrollment idempotent under concurrent webhook/verify-session delivery
+    await _create_unique_index(db.enrollments, [("student_id", 1), ("course_id", 1)])
+
 async def connect_to_mongo():
-    connect_redis_sync()
+    await ensure_indexes()
     print("Connected to MongoDB")
 
 async def close_mongo_connection():
-    close_redis_sync()
     client.close()
     print("Disconnected from MongoDB")
 
@@ -1,83 +1,337 @@
-import redis
-from core.config import REDIS_URL
+import asyncio
+import json
+import time
+from datetime import datetime
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from core.config import (
+    REDIS_URL, REDIS_MAX_CONNECTIONS, REDIS_SOCKET_TIMEOUT, REDIS_HEALTH_CHECK_INTERVAL,
+    REDIS_BREAKER_THRESHOLD, REDIS_BREAKER_RESET_SECONDS,
+    OTP_TTL_SECONDS, OTP_MAX_ATTEMPTS, OTP_RESEND_COOLDOWN_SECONDS, OTP_RESEND_MAX_PER_HOUR
+)
 
-# Use sync Redis client
+# Shared async client over one connection pool, created in lifespan
 redis_client = None
+consume_otp_script = None
 
-def connect_redis_sync():
-    global redis_client
+# Compare-and-delete in one round trip; wrong guesses count towards OTP_MAX_ATTEMPTS
+CONSUME_OTP_LUA = """
+local stored = redis.call('GET', KEYS[1])
+if not stored then
+    return 0
+end
+if stored == ARGV[1] then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return 1
+end
+local attempts = redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+if attempts >= tonumber(ARGV[3]) then
+    redis.call('DEL', KEYS[1], KEYS[2])
+end
+return 0
+"""
+
+class CircuitBreaker:
+    """Stops sending commands after repeated failures and retries one probe after a cooldown"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "half-open":
+            # Let a single probe through; push the window out for everyone else
+            self.opened_at = time.monotonic()
+            return True
+        return state == "closed"
+
+    def record_success(self):
+        if self.opened_at is not None:
+            print("Redis circuit closed")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                print(f"Redis circuit opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
+
+breaker = CircuitBreaker(REDIS_BREAKER_THRESHOLD, REDIS_BREAKER_RESET_SECONDS)
+
+# Per-command latency metrics
+command_metrics = {}
+
+def _record(command: str, elapsed_ms: float, ok: bool):
+    metric = command_metrics.setdefault(command, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+    metric["count"] += 1
+    metric["total_ms"] += elapsed_ms
+    metric["max_ms"] = max(metric["max_ms"], elapsed_ms)
+    if not ok:
+        metric["errors"] += 1
+
+async def _execute(command: str, operation, default=None):
+    """Run one command (or pipeline) through the breaker; degrade to default on failure"""
+    if redis_client is None or not breaker.allow():
+        return default
+
+    started = time.perf_counter()
     try:
-        redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-        redis_client.ping()
-        print("Connected to Redis (sync)")
-        return True
-    except Exception as e:
-        print(f"Redis connection failed: {e}")
-        redis_client = None
-        return False
+        result = await operation(redis_client)
+    except (RedisError, OSError, asyncio.TimeoutError) as e:
+        _record(command, (time.perf_counter() - started) * 1000, ok=False)
+        breaker.record_failure()
+        if breaker.failures == 1:
+            print(f"Redis {command} error: {e}")
+        return default
 
-def close_redis_sync():
-    global redis_client
-    if redis_client:
-        redis_client.close()
-        print("Disconnected from Redis")
+    _record(command, (time.perf_counter() - started) * 1000, ok=True)
+    breaker.record_success()
+    return result
 
-# User session functions (sync)
-def set_user_online_sync(user_id: str):
-    """Set user as online in Redis with 1 hour expiry"""
-    global redis_client
-    if not redis_client:
-        connect_redis_sync()
-    
-    if redis_client:
-        try:
-            redis_client.setex(f"user:{user_id}:online", 3600, "true")
-            print(f"User {user_id} set online in Redis")
-        except Exception as e:
-            print(f"Redis setex error: {e}")
+async def connect_redis():
+    global redis_client, consume_otp_script
+    pool = redis.ConnectionPool.from_url(
+        REDIS_URL,
+        decode_responses=True,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL
+    )
+    redis_client = redis.Redis(connection_pool=pool)
+    consume_otp_script = redis_client.register_script(CONSUME_OTP_LUA)
+
+    if await redis_health():
+        print("Connected to Redis")
     else:
-        print("Redis client not available")
+        print("Redis unavailable at startup; presence and OTP features degraded")
 
-def set_user_offline_sync(user_id: str):
-    """Remove user from online status"""
+async def close_redis():
     global redis_client
-    if not redis_client:
-        connect_redis_sync()
-    
     if redis_client:
-        try:
-            redis_client.delete(f"user:{user_id}:online")
-            print(f"User {user_id} set offline in Redis")
-        except Exception as e:
-            print(f"Redis delete error: {e}")
-    else:
-        print("Redis client not available")
+        await redis_client.aclose()
+        await redis_client.connection_pool.disconnect()
+        redis_client = None
+        print("Disconnected from Redis")
+
+async def redis_health() -> bool:
+    return bool(await _execute("PING", lambda r: r.ping(), default=False))
+
+def get_redis_metrics() -> dict:
+    return {
+        "circuit": breaker.state,
+        "commands": {
+            command: {**metric, "avg_ms": metric["total_ms"] / metric["count"] if metric["count"] else 0.0}
+            for command, metric in command_metrics.items()
+        }
+    }
+
+# Presence: one sorted set scored by last-seen time, so every query is O(log N)
+PRESENCE_KEY = "presence:online"
+PRESENCE_TTL_SECONDS = 3600
+
+def _presence_cutoff() -> float:
+    return time.time() - PRESENCE_TTL_SECONDS
+
+# User session functions
+async def set_user_online(user_id: str):
+    """Mark user as seen now and record them in the daily/monthly active HyperLogLogs"""
+    now = datetime.utcnow()
+    dau_key = f"presence:dau:{now:%Y%m%d}"
+    mau_key = f"presence:mau:{now:%Y%m}"
+
+    async def operation(r):
+        pipe = r.pipeline(transaction=False)
+        pipe.zadd(PRESENCE_KEY, {user_id: time.time()})
+        pipe.pfadd(dau_key, user_id)
+        pipe.expire(dau_key, 2 * 86400)
+        pipe.pfadd(mau_key, user_id)
+        pipe.expire(mau_key, 32 * 86400)
+        results = await pipe.execute()
+        return results[0] == 1
+
+    # True when the user was not already online
+    return await _execute("presence.online", operation, default=False)
+
+async def set_user_offline(user_id: str):
+    """Remove user from online status; True when the user was online"""
+    return await _execute("ZREM", lambda r: r.zrem(PRESENCE_KEY, user_id), default=0) == 1
+
+async def is_user_online(user_id: str) -> bool:
+    last_seen = await _execute("ZSCORE", lambda r: r.zscore(PRESENCE_KEY, user_id))
+    return last_seen is not None and last_seen >= _presence_cutoff()
 
-def get_online_users_count_sync() -> int:
+async def get_users_online_status(user_ids: list) -> dict:
+    """Online flag for many users with a single ZMSCORE"""
+    if not user_ids:
+        return {}
+    scores = await _execute("ZMSCORE", lambda r: r.zmscore(PRESENCE_KEY, user_ids), default=None)
+    if scores is None:
+        return {user_id: False for user_id in user_ids}
+    cutoff = _presence_cutoff()
+    return {user_id: score is not None and score >= cutoff for user_id, score in zip(user_ids, scores)}
+
+async def get_online_users_count() -> int:
     """Get total count of online users"""
-    global redis_client
-    if not redis_client:
-        connect_redis_sync()
-    
-    if redis_client:
-        try:
-            keys = redis_client.keys("user:*:online")
-            return len(keys)
-        except Exception as e:
-            print(f"Redis keys error: {e}")
-    return 0
+    cutoff = _presence_cutoff()
 
-def get_all_online_users_sync() -> list:
-    """Get list of all online user IDs"""
-    global redis_client
-    if not redis_client:
-        connect_redis_sync()
-    
-    if redis_client:
-        try:
-            keys = redis_client.keys("user:*:online")
-            user_ids = [key.split(":")[1] for key in keys]
-            return user_ids
-        except Exception as e:
-            print(f"Redis keys error: {e}")
-    return []
\ No newline at end of file
+    async def operation(r):
+        pipe = r.pipeline(transaction=False)
+        pipe.zremrangebyscore(PRESENCE_KEY, "-inf", f"({cutoff}")
+        pipe.zcount(PRESENCE_KEY, cutoff, "+inf")
+        _, count = await pipe.execute()
+        return count
+
+    return await _execute("presence.count", operation, default=0)
+
+async def get_online_users_page(offset: int = 0, limit: int = 50) -> list:
+    """Page of online user IDs, most recently seen first"""
+    return await _execute(
+        "ZREVRANGEBYSCORE",
+        lambda r: r.zrevrangebyscore(PRESENCE_KEY, "+inf", _presence_cutoff(), start=offset, num=limit),
+        default=[]
+    )
+
+async def get_all_online_users():
+    """Get list of all online user IDs, or None when Redis can't answer"""
+    return await _execute(
+        "ZRANGEBYSCORE",
+        lambda r: r.zrangebyscore(PRESENCE_KEY, _presence_cutoff(), "+inf"),
+        default=None
+    )
+
+async def get_active_users_estimate() -> dict:
+    """Approximate distinct daily and monthly actives from HyperLogLog"""
+    now = datetime.utcnow()
+
+    async def operation(r):
+        pipe = r.pipeline(transaction=False)
+        pipe.pfcount(f"presence:dau:{now:%Y%m%d}")
+        pipe.pfcount(f"presence:mau:{now:%Y%m}")
+        daily, monthly = await pipe.execute()
+        return {"daily_active_users": daily, "monthly_active_users": monthly}
+
+    return await _execute(
+        "presence.actives",
+        operation,
+        default={"daily_active_users": 0, "monthly_active_users": 0}
+    )
+
+# Token revocation
+async def revoke_jti(jti: str, ttl_seconds: int) -> bool:
+    return bool(await _execute("SET", lambda r: r.set(f"revoked:jti:{jti}", 1, ex=ttl_seconds), default=False))
+
+async def is_jti_revoked(jti: str):
+    """True/False from Redis, or None when Redis can't answer"""
+    result = await _execute("EXISTS", lambda r: r.exists(f"revoked:jti:{jti}"), default=None)
+    return None if result is None else result == 1
+
+async def scan_revoked_jtis(batch_size: int = 1000):
+    """Iterate revoked jtis with SCAN (startup and periodic rebuilds only)"""
+    if redis_client is None:
+        return
+    async for key in redis_client.scan_iter(match="revoked:jti:*", count=batch_size):
+        yield key.split(":", 2)[2]
+
+# Open checkout sessions per (student, course), expiring with the Stripe session
+def _checkout_key(student_id: str, course_id: str) -> str:
+    return f"checkout:open:{student_id}:{course_id}"
+
+async def cache_open_checkout(student_id: str, course_id: str, checkout: dict, ttl_seconds: int) -> bool:
+    if ttl_seconds <= 0:
+        return False
+    return bool(await _execute(
+        "SET",
+        lambda r: r.set(_checkout_key(student_id, course_id), json.dumps(checkout), ex=ttl_seconds),
+        default=False
+    ))
+
+async def get_open_checkout(student_id: str, course_id: str):
+    cached = await _execute("GET", lambda r: r.get(_checkout_key(student_id, course_id)))
+    return json.loads(cached) if cached else None
+
+async def clear_open_checkout(student_id: str, course_id: str):
+    await _execute("DEL", lambda r: r.delete(_checkout_key(student_id, course_id)), default=0)
+
+# Catalog version: bumped on every course mutation so catalog-derived caches miss
+CATALOG_VERSION_KEY = "catalog:version"
+
+async def get_catalog_version() -> str:
+    return await _execute("GET", lambda r: r.get(CATALOG_VERSION_KEY), default=None) or "0"
+
+async def bump_catalog_version():
+    """New version as a string, or None when Redis is down"""
+    version = await _execute("INCR", lambda r: r.incr(CATALOG_VERSION_KEY), default=None)
+    return None if version is None else str(version)
+
+# Chatbot responses, keyed by the caller
+async def cache_chat_response(key: str, response: dict, ttl_seconds: int) -> bool:
+    return bool(await _execute("SET", lambda r: r.set(key, json.dumps(response), ex=ttl_seconds), default=False))
+
+async def get_chat_response(key: str):
+    cached = await _execute("GET", lambda r: r.get(key))
+    return json.loads(cached) if cached else None
+
+# Pub/sub
+async def publish_message(channel: str, message: str) -> int:
+    return await _execute("PUBLISH", lambda r: r.publish(channel, message), default=0)
+
+def create_pubsub():
+    """Dedicated pub/sub connection from the shared pool, or None when Redis is down"""
+    if redis_client is None or breaker.state == "open":
+        return None
+    return redis_client.pubsub(ignore_subscribe_messages=True)
+
+# OTP functions
+async def store_otp(email: str, otp: str) -> bool:
+    """Store a fresh OTP with native TTL, replacing any previous one"""
+    async def operation(r):
+        pipe = r.pipeline(transaction=False)
+        pipe.set(f"otp:{email}", otp, ex=OTP_TTL_SECONDS)
+        pipe.delete(f"otp:{email}:attempts")
+        await pipe.execute()
+        return True
+
+    return await _execute("otp.store", operation, default=False)
+
+async def consume_otp(email: str, otp: str):
+    """Atomically check and consume an OTP; None when Redis can't answer"""
+    result = await _execute(
+        "otp.consume",
+        lambda r: consume_otp_script(
+            keys=[f"otp:{email}", f"otp:{email}:attempts"],
+            args=[otp, OTP_TTL_SECONDS, OTP_MAX_ATTEMPTS]
+        ),
+        default=None
+    )
+    return None if result is None else result == 1
+
+async def allow_otp_resend(email: str):
+    """Per-email resend limit: one per cooldown window and OTP_RESEND_MAX_PER_HOUR per hour.
+
+    None when Redis can't answer, so callers don't report an outage as the user's fault.
+    """
+    async def operation(r):
+        if not await r.set(f"otp:{email}:cooldown", 1, ex=OTP_RESEND_COOLDOWN_SECONDS, nx=True):
+            return False
+        pipe = r.pipeline(transaction=False)
+        pipe.set(f"otp:{email}:resends", 0, ex=3600, nx=True)
+        pipe.incr(f"otp:{email}:resends")
+        _, sent_this_hour = await pipe.execute()
+        return sent_this_hour <= OTP_RESEND_MAX_PER_HOUR
+
+    return await _execute("otp.resend_limit", operation, default=None)
@@ -7,6 +7,8 @@ from auth.email_verify import router as email_router
 from auth.user_management import router as user_mgmt_router
 from course.courseRoute import router as course_router
 from payment.paymentRoute import router as payment_router
+from events.eventRoute import router as events_router
+from analytics.analyticsRoute import router as analytics_router
 
 api_router = APIRouter()
 
@@ -17,4 +19,6 @@ api_router.include_router(stats_router, prefix="/auth", tags=["User Stats"])
 api_router.include_router(email_router, prefix="/auth", tags=["Email Verification"])
 api_router.include_router(user_mgmt_router, prefix="/users", tags=["User Management"])
 api_router.include_router(course_router, tags=["Courses"])
-api_router.include_router(payment_router, tags=["Payment"])
\ No newline at end of file
+api_router.include_router(payment_router, tags=["Payment"])
+api_router.include_router(events_router, tags=["Events"])
+api_router.include_router(analytics_router, tags=["Analytics"])
\ No newline at end of file
@@ -1,9 +1,9 @@
 from datetime import datetime
-from fastapi import HTTPException, UploadFile, Form, Query
+from fastapi import HTTPException, UploadFile, Form, Depends
 from pydantic import BaseModel
 from core.database import courses_collection, course_videos_collection
 from helperFunction.videoUpload import upload_video
-from helperFunction.jwt_helper import verify_token
+from middleware.user_auth import Principal, get_principal
 from bson import ObjectId
 
 class VideoResponse(BaseModel):
@@ -16,16 +16,13 @@ class VideoResponse(BaseModel):
     created_date: str
 
 async def add_video_to_course(
-    token: str = Form(...),
     course_id: str = Form(...),
     title: str = Form(...),
     description: str = Form(...),
-    video_file: UploadFile = None
+    video_file: UploadFile = None,
+    principal: Principal = Depends(get_principal)
 ):
     try:
-        # Verify token
-        payload = verify_token(token)
-        
         # Validate course_id
         if not course_id or course_id == 'undefined':
             raise HTTPException(status_code=400, detail="Invalid course ID")
@@ -36,7 +33,7 @@ async def add_video_to_course(
             raise HTTPException(status_code=404, detail="Course not found")
         
         # Check if user is teacher of this course
-        if str(course.get("teacher_id")) != payload.get("user_id"):
+        if str(course.get("teacher_id")) != principal.user_id:
             raise HTTPException(status_code=403, detail="Only course teacher can add videos")
         
         # Upload video
@@ -80,11 +77,8 @@ async def add_video_to_course(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Video addition failed: {str(e)}")
 
-async def get_course_videos(course_id: str, token: str = Query(...)):
+async def get_course_videos(course_id: str, principal: Principal = Depends(get_principal)):
     try:
-        # Verify token
-        verify_token(token)
-        
         # Get videos for course
         videos_cursor = course_videos_collection.find({"course_id": ObjectId(course_id)})
         videos = await videos_cursor.to_list(length=None)
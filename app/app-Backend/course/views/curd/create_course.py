@@ -1,9 +1,13 @@
 from datetime import datetime
-from fastapi import HTTPException, UploadFile, Form
+from fastapi import HTTPException, UploadFile, Form, Depends, BackgroundTasks
 from pydantic import BaseModel
 from core.database import courses_collection, db
 from helperFunction.imageUpload import upload_image
-from helperFunction.jwt_helper import verify_token
+from helperFunction.counters import count_courses
+from core.redis_client import bump_catalog_version
+from chatbot.course_index import refresh_course
+from payment.stripe_catalog import sync_course_price
+from middleware.user_auth import Principal, get_principal
 from bson import ObjectId
 
 class CourseResponse(BaseModel):
@@ -19,42 +23,31 @@ class CourseResponse(BaseModel):
     created_date: str
 
 async def create_course(
-    token: str = Form(...),
+    background_tasks: BackgroundTasks,
     title: str = Form(...),
     description: str = Form(...),
     price: float = Form(...),
     teacher_id: str = Form(...),
     visible: bool = Form(True),
-    thumbnail: UploadFile = None
+    thumbnail: UploadFile = None,
+    principal: Principal = Depends(get_principal)
 ):
     try:
-        # Verify token
-        payload = verify_token(token)
-        
-        # Use correct collection name
-        users_collection = db.Users  # Capital U like in login.py
-        
-        # Debug: Check collection and find user
-        print(f"Looking for teacher with ID: {teacher_id}")
-        print(f"Using collection: {users_collection.name}")
-        
-        # Try to find any user first
-        all_users = await users_collection.find({}).to_list(length=5)
-        print(f"Sample users in collection: {[str(u.get('_id')) for u in all_users]}")
-        
-        teacher = await users_collection.find_one({"_id": ObjectId(teacher_id)})
-        print(f"Found user: {teacher}")
-        
-        if not teacher:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        if teacher.get("role") not in ["Teacher", "teacher"]:
-            raise HTTPException(status_code=403, detail=f"User role is {teacher.get('role')}, not Teacher")
-        
         # Check if token user matches teacher_id
-        if payload.get("user_id") != teacher_id:
+        if principal.user_id != teacher_id:
             raise HTTPException(status_code=403, detail="Unauthorized to create course for this teacher")
         
+        if principal.role not in ["Teacher", "teacher"]:
+            raise HTTPException(status_code=403, detail=f"User role is {principal.role}, not Teacher")
+        
+        # Tokens issued before the name claim existed still need a lookup
+        teacher_name = principal.name
+        if teacher_name is None:
+            teacher = await db.Users.find_one({"_id": ObjectId(teacher_id)}, {"name": 1})
+            if not teacher:
+                raise HTTPException(status_code=404, detail="User not found")
+            teacher_name = teacher["name"]
+        
         # Upload thumbnail image
         thumbnail_url = ""
         thumbnail_public_id = ""
@@ -71,7 +64,7 @@ async def create_course(
             "thumbnail_public_id": thumbnail_public_id,
             "price": price,
             "teacher_id": ObjectId(teacher_id),
-            "teacher_name": teacher["name"],
+            "teacher_name": teacher_name,
             "visible": visible,
             "is_active": True,
             "enrolled_count": 0,
@@ -82,6 +75,11 @@ async def create_course(
         
         # Insert into database
         result = await courses_collection.insert_one(course_data)
+        await count_courses(course_data["teacher_id"])
+        await refresh_course(str(result.inserted_id), await bump_catalog_version())
+        
+        # Stripe Product/Price are created after the response goes out
+        background_tasks.add_task(sync_course_price, str(result.inserted_id))
         
         return CourseResponse(
             id=str(result.inserted_id),
@@ -91,7 +89,7 @@ async def create_course(
             thumbnail_public_id=thumbnail_public_id,
             price=price,
             teacher_id=teacher_id,
-            teacher_name=teacher["name"],
+            teacher_name=teacher_name,
             visible=visible,
             created_date=course_data["created_date"].isoformat()
         )
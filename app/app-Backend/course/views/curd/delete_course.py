@@ -1,8 +1,11 @@
-from fastapi import HTTPException, Form
+from fastapi import HTTPException, Form, Depends
 from pydantic import BaseModel
 from core.database import courses_collection, course_videos_collection
 from helperFunction.deleteAsset import delete_asset
-from helperFunction.jwt_helper import verify_token
+from helperFunction.counters import count_courses
+from core.redis_client import bump_catalog_version
+from chatbot.course_index import refresh_course
+from middleware.user_auth import Principal, get_principal
 from bson import ObjectId
 
 class DeleteResponse(BaseModel):
@@ -11,12 +14,10 @@ class DeleteResponse(BaseModel):
 
 async def delete_course(
     course_id: str = Form(...),
-    token: str = Form(...)
+    principal: Principal = Depends(get_principal)
 ):
     try:
-        # Verify token
-        payload = verify_token(token)
-        user_id = payload.get("user_id")
+        user_id = principal.user_id
         
         # Check if course exists
         course = await courses_collection.find_one({"_id": ObjectId(course_id)})
@@ -24,7 +25,7 @@ async def delete_course(
             raise HTTPException(status_code=404, detail="Course not found")
         
         # Verify teacher owns this course or is admin
-        if str(course["teacher_id"]) != user_id and payload.get("role") != "admin":
+        if str(course["teacher_id"]) != user_id and principal.role != "admin":
             raise HTTPException(status_code=403, detail="Unauthorized to delete this course")
         
         # Delete course thumbnail from cloudinary if exists
@@ -43,7 +44,10 @@ async def delete_course(
         await course_videos_collection.delete_many({"course_id": ObjectId(course_id)})
         
         # Delete course from courses collection
-        await courses_collection.delete_one({"_id": ObjectId(course_id)})
+        result = await courses_collection.delete_one({"_id": ObjectId(course_id)})
+        if result.deleted_count:
+            await count_courses(course["teacher_id"], -1)
+            await refresh_course(course_id, await bump_catalog_version())
         
         return DeleteResponse(
             message="Course and all associated videos deleted successfully",
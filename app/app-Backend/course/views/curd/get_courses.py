@@ -1,7 +1,7 @@
-from fastapi import HTTPException, Query
+from fastapi import HTTPException, Query, Depends
 from typing import List, Optional
 from core.database import courses_collection, users_collection
-from helperFunction.jwt_helper import verify_token
+from middleware.user_auth import Principal, get_principal
 from bson import ObjectId
 
 async def get_courses():
@@ -35,13 +35,10 @@ async def get_courses():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch courses: {str(e)}")
 
-async def get_teacher_courses(teacher_id: str, token: str = Query(...)):
+async def get_teacher_courses(teacher_id: str, principal: Principal = Depends(get_principal)):
     try:
-        # Verify token
-        payload = verify_token(token)
-        
         # Check if token user matches teacher_id or is admin
-        if payload.get("user_id") != teacher_id and payload.get("role") != "admin":
+        if principal.user_id != teacher_id and principal.role != "admin":
             raise HTTPException(status_code=403, detail="Unauthorized to view these courses")
         
         # Get teacher's courses
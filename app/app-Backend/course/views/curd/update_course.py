@@ -1,10 +1,13 @@
 from datetime import datetime
-from fastapi import HTTPException, UploadFile, Form
+from fastapi import HTTPException, UploadFile, Form, Depends, BackgroundTasks
 from pydantic import BaseModel
 from core.database import courses_collection
 from helperFunction.imageUpload import upload_image
 from helperFunction.deleteAsset import delete_asset
-from helperFunction.jwt_helper import verify_token
+from middleware.user_auth import Principal, get_principal
+from payment.stripe_catalog import sync_course_price
+from core.redis_client import bump_catalog_version
+from chatbot.course_index import refresh_course
 from bson import ObjectId
 
 class CourseUpdateResponse(BaseModel):
@@ -19,20 +22,19 @@ class CourseUpdateResponse(BaseModel):
     updated_date: str
 
 async def update_course(
+    background_tasks: BackgroundTasks,
     course_id: str = Form(...),
-    token: str = Form(...),
     title: str = Form(None),
     description: str = Form(None),
     category: str = Form(None),
     duration: str = Form(None),
     price: float = Form(None),
     visible: bool = Form(None),
-    thumbnail: UploadFile = None
+    thumbnail: UploadFile = None,
+    principal: Principal = Depends(get_principal)
 ):
     try:
-        # Verify token
-        payload = verify_token(token)
-        user_id = payload.get("user_id")
+        user_id = principal.user_id
         
         # Check if course exists
         course = await courses_collection.find_one({"_id": ObjectId(course_id)})
@@ -40,7 +42,7 @@ async def update_course(
             raise HTTPException(status_code=404, detail="Course not found")
         
         # Verify teacher owns this course or is admin
-        if str(course["teacher_id"]) != user_id and payload.get("role") != "admin":
+        if str(course["teacher_id"]) != user_id and principal.role != "admin":
             raise HTTPException(status_code=403, detail="Unauthorized to update this course")
         
         # Prepare update data
@@ -76,9 +78,15 @@ async def update_course(
             {"$set": update_data}
         )
         
+        await refresh_course(course_id, await bump_catalog_version())
+        
         # Get updated course
         updated_course = await courses_collection.find_one({"_id": ObjectId(course_id)})
         
+        # Title, description, thumbnail or price changes flow to Stripe after the response
+        if any(field in update_data for field in ("title", "description", "thumbnail_url", "price")):
+            background_tasks.add_task(sync_course_price, course_id)
+        
         return CourseUpdateResponse(
             id=str(updated_course["_id"]),
             title=updated_course["title"],
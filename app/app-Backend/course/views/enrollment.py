@@ -1,8 +1,12 @@
-from fastapi import HTTPException, Form, Query
+from fastapi import HTTPException, Form, Query, Depends
 from pydantic import BaseModel
-from core.database import courses_collection, users_collection, db
-from helperFunction.jwt_helper import verify_token
+from core.database import courses_collection, db
+from middleware.user_auth import Principal, get_principal
+from events.broker import publish_user_event
+from helperFunction.counters import count_enrollments
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from datetime import datetime
 
 # Create enrollments collection
@@ -17,23 +21,26 @@ class StudentCoursesResponse(BaseModel):
     total: int
 
 async def enroll_course(
-    token: str = Form(...),
     course_id: str = Form(...),
-    student_id: str = Form(...)
+    student_id: str = Form(...),
+    principal: Principal = Depends(get_principal)
 ):
     try:
-        # Verify token
-        payload = verify_token(token)
-        
         # Check if token user matches student_id
-        if payload.get("user_id") != student_id:
+        if principal.user_id != student_id:
             raise HTTPException(status_code=403, detail="Unauthorized to enroll for this student")
         
-        # Check if student exists
-        student = await users_collection.find_one({"_id": ObjectId(student_id), "role": "student"})
-        if not student:
+        if principal.role != "student":
             raise HTTPException(status_code=404, detail="Student not found")
         
+        # Tokens issued before the name claim existed still need a lookup
+        student_name = principal.name
+        if student_name is None:
+            student = await db.Users.find_one({"_id": ObjectId(student_id), "role": "student"}, {"name": 1})
+            if not student:
+                raise HTTPException(status_code=404, detail="Student not found")
+            student_name = student["name"]
+        
         # Check if course exists
         course = await courses_collection.find_one({"_id": ObjectId(course_id)})
         if not course:
@@ -52,7 +59,7 @@ async def enroll_course(
             "course_id": ObjectId(course_id),
             "student_id": ObjectId(student_id),
             "course_title": course["title"],
-            "student_name": student["name"],
+            "student_name": student_name,
             "enrolled_at": datetime.utcnow(),
             "progress": 0,
             "completed": False
@@ -60,11 +67,12 @@ async def enroll_course(
         
         result = await enrollments_collection.insert_one(enrollment_doc)
         
-        # Update course enrolled count
+        # Update course and student enrolled counts
         await courses_collection.update_one(
             {"_id": ObjectId(course_id)},
             {"$inc": {"enrolled_count": 1}}
         )
+        await count_enrollments(ObjectId(student_id))
         
         return EnrollmentResponse(
             message="Enrolled successfully",
@@ -98,50 +106,83 @@ async def get_student_courses(student_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch student courses: {str(e)}")
 
-async def enroll_course_after_payment(course_id: str, student_id: str):
+async def enroll_courses_after_payment(course_ids: list, student_id: str, payment_id: ObjectId = None) -> list:
+    """Enroll a student in every paid course with one bulk_write; returns the newly enrolled course ids.
+
+    Courses deleted since checkout are skipped and flagged on the payment for a refund.
+    """
     try:
-        users_collection = db.Users
-        
-        # Check if student exists
-        student = await users_collection.find_one({"_id": ObjectId(student_id), "role": "student"})
+        student = await db.Users.find_one({"_id": ObjectId(student_id), "role": "student"}, {"name": 1})
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
         
-        # Check if course exists
-        course = await courses_collection.find_one({"_id": ObjectId(course_id)})
-        if not course:
-            raise HTTPException(status_code=404, detail="Course not found")
-        
-        # Check if already enrolled
-        existing = await enrollments_collection.find_one({
-            "course_id": ObjectId(course_id),
-            "student_id": ObjectId(student_id)
-        })
-        if existing:
-            return {"message": "Already enrolled"}
-        
-        # Create enrollment
-        enrollment_doc = {
-            "course_id": ObjectId(course_id),
-            "student_id": ObjectId(student_id),
-            "course_title": course["title"],
-            "student_name": student["name"],
-            "enrolled_at": datetime.utcnow(),
-            "progress": 0,
-            "completed": False,
-            "payment_status": "completed"
-        }
-        
-        await enrollments_collection.insert_one(enrollment_doc)
-        
-        # Update course enrolled count
-        await courses_collection.update_one(
-            {"_id": ObjectId(course_id)},
+        course_object_ids = [ObjectId(course_id) for course_id in course_ids]
+        courses = await courses_collection.find(
+            {"_id": {"$in": course_object_ids}}, {"title": 1}
+        ).to_list(length=None)
+        missing = set(course_object_ids) - {course["_id"] for course in courses}
+        if missing:
+            # One deleted course must not cost the student the rest of the cart
+            print(f"Paid courses no longer exist (student {student_id}, payment {payment_id}): {[str(course_id) for course_id in missing]}")
+            if payment_id is not None:
+                await db.payments.update_one(
+                    {"_id": payment_id},
+                    {"$addToSet": {"unfulfilled_course_ids": {"$each": list(missing)}}, "$set": {"needs_refund": True}}
+                )
+        if not courses:
+            return []
+        
+        # Upserts keyed on (student, course) leave existing enrollments untouched
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"course_id": course["_id"], "student_id": ObjectId(student_id)},
+                {"$setOnInsert": {
+                    "course_title": course["title"],
+                    "student_name": student["name"],
+                    "enrolled_at": now,
+                    "progress": 0,
+                    "completed": False,
+                    "payment_status": "completed"
+                }},
+                upsert=True
+            )
+            for course in courses
+        ]
+        try:
+            result = await enrollments_collection.bulk_write(operations, ordered=False)
+            upserted = result.upserted_ids
+        except BulkWriteError as e:
+            # Webhook worker and verify-session raced on some rows; the other one enrolled those
+            if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+            upserted = {item["index"]: item["_id"] for item in e.details.get("upserted", [])}
+        
+        enrolled = [courses[index] for index in upserted]
+        if not enrolled:
+            return []
+        
+        # Update course and student enrolled counts
+        await courses_collection.update_many(
+            {"_id": {"$in": [course["_id"] for course in enrolled]}},
             {"$inc": {"enrolled_count": 1}}
         )
+        await count_enrollments(ObjectId(student_id), len(enrolled))
         
-        return {"message": "Enrolled successfully"}
+        # Push to the student's open tabs so they don't need to poll
+        for course in enrolled:
+            await publish_user_event(student_id, "enrollment.completed", {
+                "course_id": str(course["_id"]),
+                "course_title": course["title"]
+            })
+        
+        return [str(course["_id"]) for course in enrolled]
         
     except Exception as e:
         print(f"Error in enrollment after payment: {e}")
-        raise
\ No newline at end of file
+        raise
+
+async def enroll_course_after_payment(course_id: str, student_id: str):
+    if await enroll_courses_after_payment([course_id], student_id):
+        return {"message": "Enrolled successfully"}
+    return {"message": "Already enrolled"}
@@ -0,0 +1,124 @@
+import asyncio
+import json
+from datetime import datetime
+from core.redis_client import publish_message, create_pubsub, get_online_users_count
+
+# Every worker listens on events:* and fans messages out to its own connected clients
+CHANNEL_PATTERN = "events:*"
+PRESENCE_CHANNEL = "events:presence"
+CLIENT_QUEUE_SIZE = 100
+
+_subscribers = {}  # channel -> set of asyncio.Queue
+_handlers = {}     # channel -> in-process callbacks (not forwarded to clients)
+_resubscribe_hooks = []  # async callbacks that catch up on messages missed while disconnected
+_hook_tasks = set()
+_listener_task = None
+
+def user_channel(user_id: str) -> str:
+    return f"events:user:{user_id}"
+
+async def publish_event(channel: str, event_type: str, data: dict):
+    message = json.dumps({
+        "type": event_type,
+        "data": data,
+        "timestamp": datetime.utcnow().isoformat()
+    }, default=str)
+    await publish_message(channel, message)
+
+async def publish_presence_delta(delta: int):
+    await publish_event(PRESENCE_CHANNEL, "presence", {
+        "delta": delta,
+        "online_users": await get_online_users_count()
+    })
+
+async def publish_user_event(user_id: str, event_type: str, data: dict):
+    await publish_event(user_channel(user_id), event_type, data)
+
+def subscribe(channels: list) -> asyncio.Queue:
+    queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+    for channel in channels:
+        _subscribers.setdefault(channel, set()).add(queue)
+    return queue
+
+def unsubscribe(queue: asyncio.Queue):
+    for channel in list(_subscribers):
+        _subscribers[channel].discard(queue)
+        if not _subscribers[channel]:
+            del _subscribers[channel]
+
+def add_handler(channel: str, handler):
+    _handlers.setdefault(channel, []).append(handler)
+
+def add_resubscribe_hook(hook):
+    """Run an async callback after every successful (re)subscribe; pub/sub doesn't replay what was missed"""
+    _resubscribe_hooks.append(hook)
+
+async def _run_hook(hook):
+    try:
+        await hook()
+    except Exception as e:
+        print(f"Resubscribe hook error: {e}")
+
+def _after_subscribe():
+    for hook in _resubscribe_hooks:
+        # Run beside the listener so catching up doesn't delay live messages
+        task = asyncio.create_task(_run_hook(hook))
+        _hook_tasks.add(task)
+        task.add_done_callback(_hook_tasks.discard)
+
+def _dispatch(channel: str, message: str):
+    for handler in _handlers.get(channel, ()):
+        try:
+            handler(message)
+        except Exception as e:
+            print(f"Event handler error on {channel}: {e}")
+    for queue in _subscribers.get(channel, ()):
+        if queue.full():
+            # Slow client: drop its oldest event rather than block the listener
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+async def _listen():
+    backoff = 1
+    while True:
+        pubsub = create_pubsub()
+        if pubsub is None:
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+            continue
+        try:
+            await pubsub.psubscribe(CHANNEL_PATTERN)
+            backoff = 1
+            # Subscribed first, so anything published from here on arrives live
+            _after_subscribe()
+            while True:
+                # Bounded waits keep the pool's socket timeout and health checks happy
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message and message["type"] == "pmessage":
+                    _dispatch(message["channel"], message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Event listener error: {e}")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+def start_event_listener():
+    global _listener_task
+    if _listener_task is None:
+        _listener_task = asyncio.create_task(_listen())
+
+async def stop_event_listener():
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
@@ -0,0 +1,8 @@
+from fastapi import APIRouter
+from events.views.stream import event_stream, event_socket
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+# EventSource and browser WebSockets can't set headers, so both take ?token=
+router.add_api_route("/stream", event_stream, methods=["GET"])
+router.add_api_websocket_route("/ws", event_socket)
@@ -0,0 +1,72 @@
+import asyncio
+import json
+from fastapi import Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from core.redis_client import get_online_users_count
+from events.broker import PRESENCE_CHANNEL, user_channel, subscribe, unsubscribe
+from middleware.user_auth import Principal, get_principal, verify_principal
+
+HEARTBEAT_SECONDS = 15
+
+async def _initial_event() -> str:
+    return json.dumps({"type": "presence", "data": {"delta": 0, "online_users": await get_online_users_count()}})
+
+async def event_stream(request: Request, principal: Principal = Depends(get_principal)):
+    """Server-Sent Events: presence deltas for everyone plus this user's own events"""
+    queue = subscribe([PRESENCE_CHANNEL, user_channel(principal.user_id)])
+
+    async def generate():
+        try:
+            yield f"data: {await _initial_event()}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            unsubscribe(queue)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def event_socket(websocket: WebSocket):
+    """WebSocket variant of the event stream; token comes from the query string"""
+    try:
+        principal = await verify_principal(websocket.query_params.get("token", ""))
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    queue = subscribe([PRESENCE_CHANNEL, user_channel(principal.user_id)])
+
+    async def drain_client():
+        # Clients don't send anything; this just notices the disconnect
+        while True:
+            await websocket.receive_text()
+
+    receiver = asyncio.create_task(drain_client())
+    getter = None
+    try:
+        await websocket.send_text(await _initial_event())
+        while True:
+            getter = asyncio.create_task(queue.get())
+            # Wake on whichever comes first, so a disconnect is noticed right away
+            await asyncio.wait({receiver, getter}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver.done():
+                break
+            await websocket.send_text(getter.result())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in (receiver, getter):
+            if task is not None:
+                task.cancel()
+        # Retrieve the receiver's WebSocketDisconnect so asyncio doesn't log it as unhandled
+        await asyncio.gather(receiver, *([getter] if getter is not None else []), return_exceptions=True)
+        unsubscribe(queue)
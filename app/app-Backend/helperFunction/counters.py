@@ -0,0 +1,116 @@
+import asyncio
+from pymongo import UpdateOne, UpdateMany
+from core.config import COUNTER_RECONCILE_SECONDS
+from core.database import db, courses_collection
+
+counters_collection = db.counters
+users_collection = db.Users
+enrollments_collection = db.enrollments
+
+USER_COUNTERS_ID = "users"
+
+_reconcile_task = None
+
+# Write side: every mutation bumps its counter with a single atomic $inc
+async def count_user_registered(role: str):
+    await counters_collection.update_one(
+        {"_id": USER_COUNTERS_ID},
+        {"$inc": {"total": 1, f"by_role.{role}": 1}},
+        upsert=True
+    )
+
+async def count_user_verified():
+    await counters_collection.update_one(
+        {"_id": USER_COUNTERS_ID},
+        {"$inc": {"verified": 1}},
+        upsert=True
+    )
+
+async def count_enrollments(student_id, delta: int = 1):
+    await users_collection.update_one(
+        {"_id": student_id},
+        {"$inc": {"stats.enrolled_courses": delta}}
+    )
+
+async def count_courses(teacher_id, delta: int = 1):
+    await users_collection.update_one(
+        {"_id": teacher_id},
+        {"$inc": {"stats.created_courses": delta}}
+    )
+
+# Read side
+async def get_user_counters() -> dict:
+    """Total, per-role and verified user counts from the counters document"""
+    counters = await counters_collection.find_one({"_id": USER_COUNTERS_ID})
+    if counters is None:
+        # First read after deploy: seed from the collections once
+        counters = await reconcile_counters()
+    return {
+        "total": counters.get("total", 0),
+        "by_role": counters.get("by_role", {}),
+        "verified": counters.get("verified", 0)
+    }
+
+def user_stat(user: dict, name: str) -> int:
+    return user.get("stats", {}).get(name, 0)
+
+async def _reconcile_user_stats(field: str, collection, group_key: str):
+    """Rewrite one per-user stat from a $group over its source collection"""
+    pipeline = [{"$group": {"_id": f"${group_key}", "count": {"$sum": 1}}}]
+    counts = {doc["_id"]: doc["count"] async for doc in collection.aggregate(pipeline) if doc["_id"] is not None}
+
+    operations = [
+        UpdateOne({"_id": user_id, field: {"$ne": count}}, {"$set": {field: count}})
+        for user_id, count in counts.items()
+    ]
+    # Anyone with no rows left (deleted courses, removed enrollments) goes back to zero
+    operations.append(UpdateMany(
+        {"_id": {"$nin": list(counts)}, field: {"$exists": True, "$ne": 0}},
+        {"$set": {field: 0}}
+    ))
+    result = await users_collection.bulk_write(operations, ordered=False)
+    return result.modified_count
+
+async def reconcile_counters() -> dict:
+    """Recompute every counter from source collections to fix drift"""
+    by_role = {}
+    total = 0
+    verified = 0
+    pipeline = [{"$group": {"_id": {"role": "$role", "verified": "$email_verified"}, "count": {"$sum": 1}}}]
+    async for doc in users_collection.aggregate(pipeline):
+        role = doc["_id"].get("role")
+        total += doc["count"]
+        if role:
+            by_role[role] = by_role.get(role, 0) + doc["count"]
+        if doc["_id"].get("verified"):
+            verified += doc["count"]
+
+    counters = {"total": total, "by_role": by_role, "verified": verified}
+    await counters_collection.update_one({"_id": USER_COUNTERS_ID}, {"$set": counters}, upsert=True)
+
+    await _reconcile_user_stats("stats.enrolled_courses", enrollments_collection, "student_id")
+    await _reconcile_user_stats("stats.created_courses", courses_collection, "teacher_id")
+    return counters
+
+async def _reconcile_loop():
+    while True:
+        try:
+            await reconcile_counters()
+        except Exception as e:
+            print(f"Counter reconcile error: {e}")
+        await asyncio.sleep(COUNTER_RECONCILE_SECONDS)
+
+def start_counter_reconciler():
+    global _reconcile_task
+    if _reconcile_task is None and COUNTER_RECONCILE_SECONDS > 0:
+        _reconcile_task = asyncio.create_task(_reconcile_loop())
+
+async def stop_counter_reconciler():
+    global _reconcile_task
+    if _reconcile_task is not None:
+        _reconcile_task.cancel()
+        try:
+            await _reconcile_task
+        except asyncio.CancelledError:
+            pass
+        _reconcile_task = None
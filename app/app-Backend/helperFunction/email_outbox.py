@@ -0,0 +1,182 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+import aiosmtplib
+from pymongo import UpdateOne
+from core.config import (
+    EMAIL_HOST, EMAIL_PORT, EMAIL_USER, EMAIL_PASSWORD, EMAIL_USE_TLS,
+    EMAIL_POOL_SIZE, EMAIL_BATCH_SIZE, EMAIL_MAX_ATTEMPTS
+)
+from core.database import db
+
+outbox_collection = db.email_outbox
+
+POLL_INTERVAL_SECONDS = 5
+CLAIM_TIMEOUT = timedelta(minutes=5)  # reclaim messages left "sending" by a dead worker
+RETRY_BASE_SECONDS = 30
+
+_wakeup = asyncio.Event()
+_sender_task = None
+_pool = None
+
+async def enqueue_email(to: str, subject: str, body: str, kind: str = "generic"):
+    """Persist a message for the background sender and return immediately"""
+    now = datetime.utcnow()
+    result = await outbox_collection.insert_one({
+        "to": to,
+        "subject": subject,
+        "body": body,
+        "kind": kind,
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+        "last_error": None
+    })
+    _wakeup.set()
+    return result.inserted_id
+
+async def enqueue_otp_email(email: str, otp: str):
+    return await enqueue_email(
+        email,
+        "Email Verification OTP",
+        f"Your OTP for email verification is: {otp}",
+        kind="otp"
+    )
+
+class SMTPConnectionPool:
+    """Small pool of authenticated SMTP connections reused across sends"""
+
+    def __init__(self, size: int):
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def _connect(self):
+        smtp = aiosmtplib.SMTP(hostname=EMAIL_HOST, port=EMAIL_PORT, start_tls=EMAIL_USE_TLS, timeout=30)
+        await smtp.connect()
+        if EMAIL_USER and EMAIL_PASSWORD:
+            await smtp.login(EMAIL_USER, EMAIL_PASSWORD)
+        return smtp
+
+    async def acquire(self):
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                smtp = self._idle.pop()
+                if smtp.is_connected:
+                    return smtp
+            return await self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    async def release(self, smtp, healthy: bool = True):
+        if healthy and smtp.is_connected:
+            self._idle.append(smtp)
+        else:
+            await self._discard(smtp)
+        self._slots.release()
+
+    async def _discard(self, smtp):
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    async def close(self):
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+async def _claim_batch():
+    """Claim up to EMAIL_BATCH_SIZE due messages with two round trips, safe across workers"""
+    now = datetime.utcnow()
+    due = {
+        "$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "sending", "claimed_at": {"$lt": now - CLAIM_TIMEOUT}}
+        ]
+    }
+    candidates = await outbox_collection.find(due, {"_id": 1}).sort("next_attempt_at", 1).to_list(length=EMAIL_BATCH_SIZE)
+    if not candidates:
+        return []
+
+    claim_id = uuid.uuid4().hex
+    await outbox_collection.update_many(
+        {"_id": {"$in": [doc["_id"] for doc in candidates]}, **due},
+        {"$set": {"status": "sending", "claim_id": claim_id, "claimed_at": now}}
+    )
+    return await outbox_collection.find({"claim_id": claim_id}).to_list(length=EMAIL_BATCH_SIZE)
+
+async def _deliver(message: dict) -> UpdateOne:
+    msg = MIMEText(message["body"])
+    msg['Subject'] = message["subject"]
+    msg['From'] = EMAIL_USER
+    msg['To'] = message["to"]
+
+    attempts = message.get("attempts", 0) + 1
+    smtp = None
+    try:
+        smtp = await _pool.acquire()
+        await smtp.send_message(msg)
+        await _pool.release(smtp)
+        return UpdateOne(
+            {"_id": message["_id"]},
+            {"$set": {"status": "sent", "attempts": attempts, "sent_at": datetime.utcnow(), "last_error": None}}
+        )
+    except Exception as e:
+        if smtp is not None:
+            await _pool.release(smtp, healthy=False)
+        print(f"Email error ({message['to']}, attempt {attempts}): {e}")
+
+        if attempts >= EMAIL_MAX_ATTEMPTS:
+            update = {"status": "failed", "attempts": attempts, "last_error": str(e)}
+        else:
+            backoff = timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+            update = {
+                "status": "pending",
+                "attempts": attempts,
+                "last_error": str(e),
+                "next_attempt_at": datetime.utcnow() + backoff
+            }
+        return UpdateOne({"_id": message["_id"]}, {"$set": update})
+
+async def _sender_loop():
+    while True:
+        try:
+            batch = await _claim_batch()
+            if batch:
+                # Sends fan out over the pool; delivery state is written in one bulk_write
+                updates = await asyncio.gather(*(_deliver(message) for message in batch))
+                await outbox_collection.bulk_write(updates, ordered=False)
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Email outbox error: {e}")
+
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+def start_email_sender():
+    global _sender_task, _pool
+    if _sender_task is None:
+        _pool = SMTPConnectionPool(EMAIL_POOL_SIZE)
+        _sender_task = asyncio.create_task(_sender_loop())
+        print("Email outbox sender started")
+
+async def stop_email_sender():
+    global _sender_task, _pool
+    if _sender_task is not None:
+        _sender_task.cancel()
+        try:
+            await _sender_task
+        except asyncio.CancelledError:
+            pass
+        _sender_task = None
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
@@ -0,0 +1,26 @@
+import uuid
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+from core.database import db
+
+leases_collection = db.job_leases  # _id is the job id
+
+# One holder per process; every uvicorn worker runs the same background loops
+HOLDER = uuid.uuid4().hex
+
+async def acquire_job_lease(job_id: str, seconds: float) -> bool:
+    """Hold the job's lease for the next `seconds`, so only one worker runs each pass.
+
+    The holder renews on every pass; anyone else takes over once a lease has expired.
+    """
+    now = datetime.utcnow()
+    try:
+        await leases_collection.update_one(
+            {"_id": job_id, "$or": [{"holder": HOLDER}, {"expires_at": {"$lt": now}}]},
+            {"$set": {"holder": HOLDER, "expires_at": now + timedelta(seconds=seconds)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Another worker holds a live lease, so the upsert tried to insert a second one
+        return False
+    return True
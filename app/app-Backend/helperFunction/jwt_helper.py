@@ -1,30 +1,108 @@
 import jwt
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from core.config import JWT_SECRET
+from core.config import JWT_SECRET, TOKEN_CACHE_SIZE
 from fastapi import HTTPException, status
 
 # JWT Configuration
 JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 480  # 8 hours
 
+class TokenCache:
+    """Bounded LRU of token digest -> verified payload, entries expire with the token's exp"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()  # sync endpoints verify from the threadpool
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, token: str, payload: dict):
+        expires_at = payload.get("exp")
+        if not expires_at or self.maxsize <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0
+        }
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
 def verify_token(token: str):
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has expired"
         )
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+    token_cache.put(token, payload)
+    return payload
+
+def get_user_from_token(token: str):
+    payload = verify_token(token)
+    user_id = payload.get("user_id")
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
-        )
\ No newline at end of file
+        )
+    return user_id
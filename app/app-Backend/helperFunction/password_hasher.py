@@ -0,0 +1,75 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from fastapi import HTTPException, status
+from werkzeug.security import generate_password_hash, check_password_hash
+from core.config import PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING
+
+# Dedicated pool so PBKDF2/scrypt never runs in anyio's shared threadpool
+_executor = None
+_pending = 0
+
+_metrics = {
+    op: {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "recent_ms": deque(maxlen=1024)}
+    for op in ("hash", "verify")
+}
+_shed_count = 0
+
+def start_password_hasher():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        print(f"Password hasher started with {PASSWORD_HASH_WORKERS} workers ({PASSWORD_HASH_METHOD.split(':')[0]})")
+
+def stop_password_hasher():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+async def _run_in_pool(op: str, func):
+    global _pending, _shed_count
+    # Shed load instead of queueing unboundedly during login storms
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        _shed_count += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+
+    start_password_hasher()
+    _pending += 1
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, func)
+    finally:
+        _pending -= 1
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        metric = _metrics[op]
+        metric["count"] += 1
+        metric["total_ms"] += elapsed_ms
+        metric["max_ms"] = max(metric["max_ms"], elapsed_ms)
+        metric["recent_ms"].append(elapsed_ms)
+
+async def hash_password(password: str) -> str:
+    return await _run_in_pool("hash", partial(generate_password_hash, password, method=PASSWORD_HASH_METHOD))
+
+async def verify_password(password_hash: str, password: str) -> bool:
+    return await _run_in_pool("verify", partial(check_password_hash, password_hash, password))
+
+def get_password_hash_metrics() -> dict:
+    """Latency per operation (queue wait included) plus shedding counters"""
+    result = {"pending": _pending, "max_pending": PASSWORD_HASH_MAX_PENDING, "shed": _shed_count}
+    for op, metric in _metrics.items():
+        recent = sorted(metric["recent_ms"])
+        result[op] = {
+            "count": metric["count"],
+            "avg_ms": metric["total_ms"] / metric["count"] if metric["count"] else 0.0,
+            "max_ms": metric["max_ms"],
+            "p50_ms": recent[len(recent) // 2] if recent else 0.0,
+            "p95_ms": recent[int(len(recent) * 0.95)] if recent else 0.0
+        }
+    return result
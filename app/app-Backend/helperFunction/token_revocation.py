@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import math
+import time
+from core.config import REVOCATION_BLOOM_CAPACITY, REVOCATION_BLOOM_ERROR_RATE, REVOCATION_REBUILD_SECONDS
+from core.redis_client import revoke_jti, is_jti_revoked, scan_revoked_jtis, publish_message
+from events.broker import add_handler, add_resubscribe_hook
+
+REVOCATION_CHANNEL = "events:revocations"
+
+class BloomFilter:
+    """Fixed-size Bloom filter; membership tests never touch the network"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+_bloom = BloomFilter(REVOCATION_BLOOM_CAPACITY, REVOCATION_BLOOM_ERROR_RATE)
+_added_during_rebuild = None  # jtis revoked while a rebuild scan is running
+_rebuild_task = None
+_rebuild_lock = asyncio.Lock()  # resubscribe and the periodic loop both rebuild
+
+def _remember(jti: str):
+    _bloom.add(jti)
+    if _added_during_rebuild is not None:
+        _added_during_rebuild.add(jti)
+
+async def revoke_token(payload: dict) -> bool:
+    """Revoke a token's jti for the rest of its lifetime and tell every worker"""
+    jti = payload.get("jti")
+    if not jti:
+        return False
+    ttl = int(payload["exp"] - time.time())
+    if ttl <= 0:
+        return False
+
+    _remember(jti)
+    if not await revoke_jti(jti, ttl):
+        return False
+    await publish_message(REVOCATION_CHANNEL, jti)
+    return True
+
+async def is_token_revoked(payload: dict) -> bool:
+    jti = payload.get("jti")
+    if not jti or jti not in _bloom:
+        # Common case: definitely not revoked, no round trip
+        return False
+    revoked = await is_jti_revoked(jti)
+    # Bloom hit but Redis can't confirm: fail closed
+    return True if revoked is None else revoked
+
+async def rebuild_bloom():
+    """Swap in a fresh filter built from Redis, dropping jtis whose tokens expired"""
+    global _bloom, _added_during_rebuild
+    async with _rebuild_lock:
+        _added_during_rebuild = set()
+        try:
+            fresh = BloomFilter(REVOCATION_BLOOM_CAPACITY, REVOCATION_BLOOM_ERROR_RATE)
+            async for jti in scan_revoked_jtis():
+                fresh.add(jti)
+            # Keep anything revoked while the scan was running
+            for jti in _added_during_rebuild:
+                fresh.add(jti)
+            _bloom = fresh
+        finally:
+            _added_during_rebuild = None
+
+async def _rebuild_loop():
+    while True:
+        try:
+            await rebuild_bloom()
+        except Exception as e:
+            print(f"Revocation filter rebuild error: {e}")
+        await asyncio.sleep(REVOCATION_REBUILD_SECONDS)
+
+def start_revocation_sync():
+    global _rebuild_task
+    if _rebuild_task is None:
+        add_handler(REVOCATION_CHANNEL, _remember)
+        # Revocations published while this worker's subscription was down only exist in Redis
+        add_resubscribe_hook(rebuild_bloom)
+        _rebuild_task = asyncio.create_task(_rebuild_loop())
+
+async def stop_revocation_sync():
+    global _rebuild_task
+    if _rebuild_task is not None:
+        _rebuild_task.cancel()
+        try:
+            await _rebuild_task
+        except asyncio.CancelledError:
+            pass
+        _rebuild_task = None
@@ -1,41 +1,86 @@
+import asyncio
 from core.database import get_database
-from core.redis_client import set_user_online, set_user_offline, is_user_online, get_online_users_count
+from core.config import ACTIVE_FLAG_SYNC_SECONDS
+from core.redis_client import set_user_online, set_user_offline, is_user_online, get_online_users_count, get_all_online_users, get_users_online_status
+from events.broker import publish_presence_delta
+from helperFunction.counters import get_user_counters
 from bson import ObjectId
+from pymongo import UpdateMany
 
 db = get_database()
 
+_sync_task = None
+
 async def user_login(user_id: str):
-    """Handle user login - set online in Redis and update DB"""
-    # Set user online in Redis
-    await set_user_online(user_id)
-    
-    # Update isActive to True in database
-    await db.Users.update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": {"isActive": True}}
-    )
+    """Handle user login - set online in Redis and broadcast the presence change"""
+    if await set_user_online(user_id):
+        await publish_presence_delta(1)
 
 async def user_logout(user_id: str):
-    """Handle user logout - remove from Redis and update DB"""
-    # Set user offline in Redis
-    await set_user_offline(user_id)
-    
-    # Update isActive to False in database
-    await db.Users.update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": {"isActive": False}}
-    )
+    """Handle user logout - remove from Redis and broadcast the presence change"""
+    if await set_user_offline(user_id):
+        await publish_presence_delta(-1)
 
 async def get_user_status(user_id: str):
     """Get user online status from Redis"""
     return await is_user_online(user_id)
 
+async def annotate_is_active(users: list):
+    """Set isActive on each user document from Redis presence with one batched lookup"""
+    statuses = await get_users_online_status([str(user["_id"]) for user in users])
+    for user in users:
+        user["isActive"] = statuses.get(str(user["_id"]), False)
+    return users
+
+async def sync_active_flags():
+    """Write the presence-derived isActive back to Users for readers that still need the field"""
+    # A failed read must not look like an empty online set and flip everyone to inactive
+    online_users = await get_all_online_users()
+    if online_users is None:
+        return None
+    online_ids = {ObjectId(user_id) for user_id in online_users if ObjectId.is_valid(user_id)}
+    flagged_ids = {doc["_id"] async for doc in db.Users.find({"isActive": True}, {"_id": 1})}
+
+    operations = []
+    went_offline = list(flagged_ids - online_ids)
+    came_online = list(online_ids - flagged_ids)
+    if went_offline:
+        operations.append(UpdateMany({"_id": {"$in": went_offline}}, {"$set": {"isActive": False}}))
+    if came_online:
+        operations.append(UpdateMany({"_id": {"$in": came_online}}, {"$set": {"isActive": True}}))
+    if operations:
+        await db.Users.bulk_write(operations, ordered=False)
+    return {"set_active": len(came_online), "set_inactive": len(went_offline)}
+
+async def _sync_loop():
+    while True:
+        await asyncio.sleep(ACTIVE_FLAG_SYNC_SECONDS)
+        try:
+            await sync_active_flags()
+        except Exception as e:
+            print(f"isActive sync error: {e}")
+
+def start_active_flag_sync():
+    global _sync_task
+    if _sync_task is None and ACTIVE_FLAG_SYNC_SECONDS > 0:
+        _sync_task = asyncio.create_task(_sync_loop())
+
+async def stop_active_flag_sync():
+    global _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except asyncio.CancelledError:
+            pass
+        _sync_task = None
+
 async def get_active_users_stats():
     """Get statistics of active users"""
     online_count = await get_online_users_count()
     
-    # Get total users from database
-    total_users = await db.Users.count_documents({})
+    # Get total users from the counters document
+    total_users = (await get_user_counters())["total"]
     
     # Get offline count
     offline_count = total_users - online_count
@@ -44,4 +89,4 @@ async def get_active_users_stats():
         "total_users": total_users,
         "online_users": online_count,
         "offline_users": offline_count
-    }
\ No newline at end of file
+    }
@@ -2,16 +2,57 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from core.database import connect_to_mongo, close_mongo_connection
+from core.redis_client import connect_redis, close_redis, redis_health, get_redis_metrics
 from core.routes import api_router
 from middleware.auth_middleware import AuthMiddleware
-from chatbot.enhanced_routes import router as chatbot_router
+from chatbot.enhanced_routes import router as chatbot_router, chatbot_service
+from helperFunction.password_hasher import start_password_hasher, stop_password_hasher, get_password_hash_metrics
+from helperFunction.jwt_helper import token_cache
+from helperFunction.email_outbox import start_email_sender, stop_email_sender
+from helperFunction.user_service import start_active_flag_sync, stop_active_flag_sync
+from events.broker import start_event_listener, stop_event_listener
+from helperFunction.token_revocation import start_revocation_sync, stop_revocation_sync
+from helperFunction.counters import start_counter_reconciler, stop_counter_reconciler
+from payment.stripe_gateway import connect_stripe, close_stripe
+from payment.webhook_queue import start_webhook_worker, stop_webhook_worker
+from payment.stripe_catalog import start_catalog_sync, stop_catalog_sync
+from payment.reconciler import start_payment_reconciler, stop_payment_reconciler
+from analytics.rollups import start_revenue_rollups, stop_revenue_rollups
+from chatbot.course_index import start_course_index, stop_course_index
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
+    await connect_redis()
+    await connect_stripe()
+    start_password_hasher()
+    start_email_sender()
+    start_active_flag_sync()
+    start_event_listener()
+    start_revocation_sync()
+    start_counter_reconciler()
+    start_webhook_worker()
+    start_catalog_sync()
+    start_payment_reconciler()
+    start_revenue_rollups()
+    start_course_index()
     yield
     # Shutdown
+    await stop_course_index()
+    await stop_revenue_rollups()
+    await stop_payment_reconciler()
+    await stop_catalog_sync()
+    await stop_webhook_worker()
+    await stop_counter_reconciler()
+    await stop_revocation_sync()
+    await stop_event_listener()
+    await stop_active_flag_sync()
+    await stop_email_sender()
+    stop_password_hasher()
+    await chatbot_service.close()
+    await close_stripe()
+    await close_redis()
     await close_mongo_connection()
 
 app = FastAPI(title="Learning Platform App Backend", version="1.0.0", lifespan=lifespan)
@@ -34,6 +75,16 @@ app.include_router(chatbot_router, prefix="/api/v1")
 async def root():
     return {"message": "Learning Platform App Backend API"}
 
+@app.get("/health")
+async def health():
+    return {
+        "status": "ok",
+        "redis": "up" if await redis_health() else "down",
+        "redis_metrics": get_redis_metrics(),
+        "password_hasher": get_password_hash_metrics(),
+        "token_cache": token_cache.stats()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
@@ -1,5 +1,79 @@
 from fastapi import Depends, HTTPException, status, Request
-from helperFunction.jwt_helper import get_user_from_token
+from pydantic import BaseModel
+from typing import Optional
+from helperFunction.jwt_helper import get_user_from_token, verify_token
+from helperFunction.token_revocation import is_token_revoked
+
+class Principal(BaseModel):
+    """Authenticated caller, decoded once per request and kept on request.state"""
+    user_id: str
+    email: Optional[str] = None
+    role: Optional[str] = None
+    name: Optional[str] = None
+    exp: int
+
+    class Config:
+        allow_mutation = False
+
+def principal_from_payload(payload: dict) -> Principal:
+    user_id = payload.get("user_id")
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+    return Principal(
+        user_id=user_id,
+        email=payload.get("email"),
+        role=payload.get("role"),
+        name=payload.get("name"),
+        exp=payload["exp"]
+    )
+
+async def verify_principal(token: str) -> Principal:
+    """Verify a token, reject it if it was revoked at logout, and build the Principal"""
+    payload = verify_token(token)
+    if await is_token_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+    return principal_from_payload(payload)
+
+async def _extract_token(request: Request) -> Optional[str]:
+    auth_header = request.headers.get("authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        return auth_header.split(" ")[1]
+
+    token = request.query_params.get("token")
+    if token:
+        return token
+
+    # Course and payment forms carry the token as a field; Starlette caches the parsed form
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith(("multipart/form-data", "application/x-www-form-urlencoded")):
+        form = await request.form()
+        token = form.get("token")
+        if isinstance(token, str) and token:
+            return token
+    return None
+
+async def get_principal(request: Request) -> Principal:
+    """Dependency returning the caller, reusing what the middleware already verified"""
+    principal = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal
+
+    token = await _extract_token(request)
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authorization token missing"
+        )
+
+    principal = await verify_principal(token)
+    request.state.principal = principal
+    return principal
 
 async def get_current_user(request: Request):
     auth_header = request.headers.get("authorization")
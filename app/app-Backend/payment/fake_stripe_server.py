@@ -0,0 +1,212 @@
+"""
+Local stand-in for the Stripe endpoints the payment views use, for offline
+load tests of checkout:
+
+    uvicorn payment.fake_stripe_server:app --port 12111
+    STRIPE_API_BASE=http://127.0.0.1:12111 uvicorn main:app --port 8001
+
+FAKE_STRIPE_LATENCY_MS adds a fixed delay per call to mimic the real round trip.
+Checkout sessions are created already paid unless FAKE_STRIPE_AUTO_PAY=false.
+"""
+import asyncio
+import os
+import re
+import time
+import uuid
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import JSONResponse
+
+LATENCY_SECONDS = float(os.getenv("FAKE_STRIPE_LATENCY_MS", "0")) / 1000
+AUTO_PAY = os.getenv("FAKE_STRIPE_AUTO_PAY", "true").lower() == "true"
+
+app = FastAPI(title="Fake Stripe")
+
+_objects = {}      # id -> object
+_idempotent = {}   # Idempotency-Key -> response body
+
+_KEY_PART = re.compile(r"\[([^\]]*)\]")
+
+def _decode(form) -> dict:
+    """Rebuild nested params from Stripe's a[b][0][c]=... form encoding"""
+    root = {}
+    for name, value in form.multi_items():
+        head = name.split("[", 1)[0]
+        keys = [head] + _KEY_PART.findall(name[len(head):])
+        node = root
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        node[keys[-1]] = value
+
+    def listify(node):
+        if isinstance(node, dict):
+            if node and all(key.isdigit() for key in node):
+                return [listify(node[key]) for key in sorted(node, key=int)]
+            return {key: listify(value) for key, value in node.items()}
+        return node
+
+    return listify(root)
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+def _not_found(object_id: str):
+    raise HTTPException(status_code=404, detail={"error": {"type": "invalid_request_error", "code": "resource_missing", "message": f"No such object: '{object_id}'"}})
+
+@app.exception_handler(HTTPException)
+async def stripe_error_shape(request: Request, exc: HTTPException):
+    return JSONResponse(exc.detail if isinstance(exc.detail, dict) else {"error": {"message": str(exc.detail)}}, status_code=exc.status_code)
+
+@app.middleware("http")
+async def latency_and_idempotency(request: Request, call_next):
+    if LATENCY_SECONDS:
+        await asyncio.sleep(LATENCY_SECONDS)
+    key = request.headers.get("idempotency-key")
+    if request.method == "POST" and key and key in _idempotent:
+        return JSONResponse(_idempotent[key], headers={"idempotent-replayed": "true"})
+    return await call_next(request)
+
+def _remember(request: Request, body: dict) -> dict:
+    key = request.headers.get("idempotency-key")
+    if key:
+        _idempotent[key] = body
+    _objects[body["id"]] = body
+    return body
+
+@app.post("/v1/checkout/sessions")
+async def create_checkout_session(request: Request):
+    params = _decode(await request.form())
+    session_id = _new_id("cs_test")
+    amount_total = 0
+    for item in params.get("line_items", []):
+        if "price" in item:
+            price = _objects.get(item["price"]) or _not_found(item["price"])
+            unit_amount = price["unit_amount"]
+        else:
+            unit_amount = int(item["price_data"]["unit_amount"])
+        amount_total += unit_amount * int(item.get("quantity", 1))
+
+    session = {
+        "id": session_id,
+        "object": "checkout.session",
+        "url": f"{request.base_url}pay/{session_id}",
+        "mode": params.get("mode", "payment"),
+        "status": "complete" if AUTO_PAY else "open",
+        "payment_status": "paid" if AUTO_PAY else "unpaid",
+        "payment_intent": _new_id("pi_test") if AUTO_PAY else None,
+        "amount_total": amount_total,
+        "currency": "usd",
+        "metadata": params.get("metadata", {}),
+        "success_url": params.get("success_url"),
+        "cancel_url": params.get("cancel_url"),
+        "created": int(time.time()),
+        "expires_at": int(params.get("expires_at", int(time.time()) + 24 * 3600))
+    }
+    return _remember(request, session)
+
+@app.get("/v1/checkout/sessions/{session_id}")
+async def retrieve_checkout_session(session_id: str):
+    return _objects.get(session_id) or _not_found(session_id)
+
+@app.post("/v1/setup_intents")
+async def create_setup_intent(request: Request):
+    params = _decode(await request.form())
+    setup_intent_id = _new_id("seti_test")
+    setup_intent = {
+        "id": setup_intent_id,
+        "object": "setup_intent",
+        "client_secret": f"{setup_intent_id}_secret_{uuid.uuid4().hex[:12]}",
+        # Card collection happens client-side; the fake skips straight to a saved card
+        "status": "succeeded",
+        "payment_method": _new_id("pm_test"),
+        "metadata": params.get("metadata", {}),
+        "created": int(time.time())
+    }
+    return _remember(request, setup_intent)
+
+@app.get("/v1/setup_intents/{setup_intent_id}")
+async def retrieve_setup_intent(setup_intent_id: str):
+    return _objects.get(setup_intent_id) or _not_found(setup_intent_id)
+
+@app.post("/v1/payment_intents")
+async def create_payment_intent(request: Request):
+    params = _decode(await request.form())
+    confirmed = params.get("confirm") == "true"
+    payment_intent = {
+        "id": _new_id("pi_test"),
+        "object": "payment_intent",
+        "amount": int(params.get("amount", 0)),
+        "currency": params.get("currency", "usd"),
+        "payment_method": params.get("payment_method"),
+        "status": "succeeded" if confirmed else "requires_confirmation",
+        "metadata": params.get("metadata", {}),
+        "created": int(time.time())
+    }
+    return _remember(request, payment_intent)
+
+@app.post("/v1/products")
+async def create_product(request: Request):
+    params = _decode(await request.form())
+    product = {
+        "id": _new_id("prod_test"),
+        "object": "product",
+        "active": True,
+        "name": params.get("name"),
+        "description": params.get("description"),
+        "images": params.get("images", []),
+        "metadata": params.get("metadata", {}),
+        "created": int(time.time())
+    }
+    return _remember(request, product)
+
+@app.post("/v1/products/{product_id}")
+async def update_product(product_id: str, request: Request):
+    product = _objects.get(product_id) or _not_found(product_id)
+    product.update(_decode(await request.form()))
+    return product
+
+@app.post("/v1/prices")
+async def create_price(request: Request):
+    params = _decode(await request.form())
+    _objects.get(params.get("product")) or _not_found(params.get("product"))
+    price = {
+        "id": _new_id("price_test"),
+        "object": "price",
+        "active": True,
+        "product": params["product"],
+        "unit_amount": int(params["unit_amount"]),
+        "currency": params.get("currency", "usd"),
+        "created": int(time.time())
+    }
+    return _remember(request, price)
+
+@app.post("/v1/prices/{price_id}")
+async def update_price(price_id: str, request: Request):
+    price = _objects.get(price_id) or _not_found(price_id)
+    params = _decode(await request.form())
+    if "active" in params:
+        price["active"] = params["active"] == "true"
+    return price
+
+def _list(request: Request, object_type: str) -> dict:
+    """Stripe-style list: newest first, created[gte] filter, starting_after cursor"""
+    params = request.query_params
+    created_gte = int(params.get("created[gte]", 0))
+    limit = min(int(params.get("limit", 10)), 100)
+    matches = sorted(
+        (obj for obj in _objects.values() if obj["object"] == object_type and obj["created"] >= created_gte),
+        key=lambda obj: obj["created"],
+        reverse=True
+    )
+    starting_after = params.get("starting_after")
+    if starting_after:
+        ids = [obj["id"] for obj in matches]
+        matches = matches[ids.index(starting_after) + 1:] if starting_after in ids else []
+    return {"object": "list", "data": matches[:limit], "has_more": len(matches) > limit}
+
+@app.get("/v1/checkout/sessions")
+async def list_checkout_sessions(request: Request):
+    return _list(request, "checkout.session")
+
+@app.get("/v1/payment_intents")
+async def list_payment_intents(request: Request):
+    return _list(request, "payment_intent")
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from payment.views.payment_handler import (
     create_checkout_session,
+    create_cart_checkout_session,
     handle_webhook,
     verify_session_payment,
     get_payment_status
@@ -11,6 +12,7 @@ router = APIRouter(prefix="/payment", tags=["Payment"])
 
 # Stripe Checkout Session routes
 router.add_api_route("/create-checkout-session", create_checkout_session, methods=["POST"])
+router.add_api_route("/create-cart-checkout-session", create_cart_checkout_session, methods=["POST"])
 router.add_api_route("/webhook", handle_webhook, methods=["POST"])
 router.add_api_route("/verify-session", verify_session_payment, methods=["POST"])
 router.add_api_route("/status/{payment_id}", get_payment_status, methods=["GET"])
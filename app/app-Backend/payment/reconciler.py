@@ -0,0 +1,180 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import UpdateOne
+from core.config import PAYMENT_RECONCILE_SECONDS
+from core.database import db
+from core.redis_client import clear_open_checkout
+from helperFunction.job_lease import acquire_job_lease
+from payment import stripe_gateway
+from payment.webhook_queue import payment_course_ids
+
+payments_collection = db.payments
+job_state_collection = db.job_state
+
+JOB_ID = "payment_reconciler"
+PAGE_SIZE = 100
+# A checkout session can stay open for up to 24 hours, so a run looks back at most that far past the watermark
+LOOKBACK_SECONDS = 24 * 3600
+# Payments are written around session creation; their timestamps and Stripe's can differ slightly
+CREATED_SKEW_SECONDS = 300
+
+_reconcile_task = None
+
+async def _pages(list_call, created_gte: int):
+    """Yield pages of a Stripe list created since created_gte"""
+    params = {"limit": PAGE_SIZE, "created": {"gte": created_gte}}
+    while True:
+        page = await list_call(params)
+        if page["data"]:
+            yield page["data"]
+        if not page.get("has_more") or not page["data"]:
+            return
+        params["starting_after"] = page["data"][-1]["id"]
+
+async def _enroll(payments: list):
+    from course.views.enrollment import enroll_courses_after_payment
+    for payment in payments:
+        student_id = str(payment["student_id"])
+        course_ids = payment_course_ids(payment)
+        for course_id in course_ids:
+            await clear_open_checkout(student_id, course_id)
+        await enroll_courses_after_payment(course_ids, student_id, payment.get("_id"))
+
+async def _reconcile_sessions(sessions: list) -> dict:
+    """Settle one page of checkout sessions against payments with a single $in"""
+    by_id = {session["id"]: session for session in sessions}
+    pending = await payments_collection.find(
+        {"stripe_session_id": {"$in": list(by_id)}, "status": "pending"}
+    ).to_list(length=None)
+
+    now = datetime.utcnow()
+    operations = []
+    completed = []
+    expired = 0
+    for payment in pending:
+        session = by_id[payment["stripe_session_id"]]
+        if session.get("payment_status") in ("paid", "no_payment_required"):
+            operations.append(UpdateOne(
+                {"_id": payment["_id"], "status": "pending"},
+                {"$set": {"status": "completed", "completed_at": now, "stripe_payment_intent_id": session.get("payment_intent")}}
+            ))
+            completed.append(payment)
+        elif session.get("status") == "expired":
+            operations.append(UpdateOne(
+                {"_id": payment["_id"], "status": "pending"},
+                {"$set": {"status": "expired", "expired_at": now}}
+            ))
+            expired += 1
+
+    if operations:
+        await payments_collection.bulk_write(operations, ordered=False)
+    await _enroll(completed)
+    return {"completed": len(completed), "expired": expired}
+
+async def _reconcile_payment_intents(payment_intents: list) -> int:
+    """Record setup-flow charges that succeeded in Stripe but never reached payments"""
+    succeeded = {
+        intent["id"]: intent for intent in payment_intents
+        if intent.get("status") == "succeeded" and (intent.get("metadata") or {}).get("source") == "setup_intent"
+    }
+    if not succeeded:
+        return 0
+
+    known = {
+        payment["stripe_payment_intent_id"]
+        async for payment in payments_collection.find(
+            {"stripe_payment_intent_id": {"$in": list(succeeded)}}, {"stripe_payment_intent_id": 1}
+        )
+    }
+    missing = [intent for intent_id, intent in succeeded.items() if intent_id not in known]
+    if not missing:
+        return 0
+
+    now = datetime.utcnow()
+    payments = []
+    for intent in missing:
+        metadata = intent["metadata"]
+        payments.append({
+            "stripe_payment_intent_id": intent["id"],
+            "course_id": ObjectId(metadata["course_id"]),
+            "student_id": ObjectId(metadata["student_id"]),
+            "amount": intent["amount"] / 100,
+            "amount_cents": intent["amount"],
+            "currency": intent.get("currency", "usd"),
+            "status": "completed",
+            "created_at": datetime.utcfromtimestamp(intent["created"]),
+            "completed_at": now,
+            "reconciled": True
+        })
+    await payments_collection.bulk_write([
+        UpdateOne({"stripe_payment_intent_id": payment["stripe_payment_intent_id"]}, {"$setOnInsert": payment}, upsert=True)
+        for payment in payments
+    ], ordered=False)
+    await _enroll(payments)
+    return len(payments)
+
+async def _window_start(watermark: int) -> int:
+    """The watermark, moved back to the oldest still-pending checkout (at most LOOKBACK_SECONDS)"""
+    oldest = await payments_collection.find_one(
+        {"status": "pending", "stripe_session_id": {"$exists": True}},
+        {"created_at": 1},
+        sort=[("created_at", 1)]
+    )
+    if not oldest:
+        return watermark
+    pending_since = int(oldest["created_at"].replace(tzinfo=timezone.utc).timestamp()) - CREATED_SKEW_SECONDS
+    return min(watermark, max(pending_since, watermark - LOOKBACK_SECONDS))
+
+async def reconcile_payments() -> dict:
+    """Settle pending payments from Stripe's lists since the last run"""
+    started = int(time.time())
+    state = await job_state_collection.find_one({"_id": JOB_ID}) or {}
+    watermark = state.get("watermark", started)
+    created_gte = await _window_start(watermark)
+
+    totals = {"sessions": 0, "completed": 0, "expired": 0, "payment_intents": 0, "recovered": 0}
+    async for sessions in _pages(stripe_gateway.list_checkout_sessions, created_gte):
+        totals["sessions"] += len(sessions)
+        result = await _reconcile_sessions(sessions)
+        totals["completed"] += result["completed"]
+        totals["expired"] += result["expired"]
+
+    async for payment_intents in _pages(stripe_gateway.list_payment_intents, created_gte):
+        totals["payment_intents"] += len(payment_intents)
+        totals["recovered"] += await _reconcile_payment_intents(payment_intents)
+
+    await job_state_collection.update_one(
+        {"_id": JOB_ID},
+        {"$set": {"watermark": started, "last_run_at": datetime.utcnow(), "last_result": totals}},
+        upsert=True
+    )
+    return totals
+
+async def _reconcile_loop():
+    while True:
+        await asyncio.sleep(PAYMENT_RECONCILE_SECONDS)
+        try:
+            if not await acquire_job_lease(JOB_ID, PAYMENT_RECONCILE_SECONDS * 2):
+                continue
+            totals = await reconcile_payments()
+            if totals["completed"] or totals["expired"] or totals["recovered"]:
+                print(f"Payment reconcile: {totals}")
+        except Exception as e:
+            print(f"Payment reconcile error: {e}")
+
+def start_payment_reconciler():
+    global _reconcile_task
+    if _reconcile_task is None and PAYMENT_RECONCILE_SECONDS > 0:
+        _reconcile_task = asyncio.create_task(_reconcile_loop())
+
+async def stop_payment_reconciler():
+    global _reconcile_task
+    if _reconcile_task is not None:
+        _reconcile_task.cancel()
+        try:
+            await _reconcile_task
+        except asyncio.CancelledError:
+            pass
+        _reconcile_task = None
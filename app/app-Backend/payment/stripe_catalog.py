@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime
+from bson import ObjectId
+from core.config import STRIPE_CATALOG_SYNC_SECONDS
+from core.database import courses_collection
+from helperFunction.job_lease import acquire_job_lease
+from payment import stripe_gateway
+
+JOB_ID = "stripe_catalog_sync"
+
+_sync_task = None
+
+def price_cents(course: dict) -> int:
+    return int(course["price"] * 100)
+
+def cached_price_id(course: dict):
+    """The course's Stripe Price id when it still matches the course price"""
+    if course.get("stripe_price_id") and course.get("stripe_price_cents") == price_cents(course):
+        return course["stripe_price_id"]
+    return None
+
+def _product_params(course: dict) -> dict:
+    params = {
+        "name": course["title"],
+        "description": course.get("description") or None,
+        "metadata": {"course_id": str(course["_id"])}
+    }
+    if course.get("thumbnail_url"):
+        params["images"] = [course["thumbnail_url"]]
+    return params
+
+async def sync_course_price(course_id: str):
+    """Create or refresh the Stripe Product and Price for one course"""
+    try:
+        course = await courses_collection.find_one({"_id": ObjectId(course_id)})
+        if not course:
+            return None
+
+        update = {}
+        product_id = course.get("stripe_product_id")
+        if not product_id:
+            product = await stripe_gateway.create_product(_product_params(course), idempotency_key=f"product-{course_id}")
+            product_id = update["stripe_product_id"] = product["id"]
+        elif course.get("updated_date") and course["updated_date"] > course.get("stripe_synced_at", datetime.min):
+            await stripe_gateway.update_product(product_id, _product_params(course))
+
+        cents = price_cents(course)
+        if course.get("stripe_price_cents") != cents or not course.get("stripe_price_id"):
+            # Stripe Prices are immutable: a new amount gets a new Price and the old one is archived.
+            # The key names the Price being replaced, so returning to an earlier amount creates a
+            # fresh Price instead of replaying the one already archived.
+            price = await stripe_gateway.create_price(
+                {"product": product_id, "unit_amount": cents, "currency": "usd"},
+                idempotency_key=f"price-{course_id}-{cents}-{course.get('stripe_price_id') or 'new'}"
+            )
+            if course.get("stripe_price_id") and course["stripe_price_id"] != price["id"]:
+                await stripe_gateway.update_price(course["stripe_price_id"], {"active": False})
+            update["stripe_price_id"] = price["id"]
+            update["stripe_price_cents"] = cents
+
+        update["stripe_synced_at"] = datetime.utcnow()
+        await courses_collection.update_one({"_id": course["_id"]}, {"$set": update})
+        return update
+    except Exception as e:
+        # Checkout falls back to inline price_data until the next sync succeeds
+        print(f"Stripe catalog sync error ({course_id}): {e}")
+        return None
+
+async def sync_stale_courses():
+    """Sync every course without a Price or whose Price no longer matches"""
+    stale = {
+        "$or": [
+            {"stripe_price_id": {"$exists": False}},
+            {"$expr": {"$ne": ["$stripe_price_cents", {"$toInt": {"$multiply": ["$price", 100]}}]}},
+            {"$expr": {"$gt": ["$updated_date", "$stripe_synced_at"]}}
+        ]
+    }
+    synced = 0
+    async for course in courses_collection.find(stale, {"_id": 1}):
+        if await sync_course_price(str(course["_id"])):
+            synced += 1
+    return synced
+
+async def _sync_loop():
+    while True:
+        try:
+            if await acquire_job_lease(JOB_ID, STRIPE_CATALOG_SYNC_SECONDS * 2):
+                await sync_stale_courses()
+        except Exception as e:
+            print(f"Stripe catalog sync error: {e}")
+        await asyncio.sleep(STRIPE_CATALOG_SYNC_SECONDS)
+
+def start_catalog_sync():
+    global _sync_task
+    if _sync_task is None and STRIPE_CATALOG_SYNC_SECONDS > 0:
+        _sync_task = asyncio.create_task(_sync_loop())
+
+async def stop_catalog_sync():
+    global _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except asyncio.CancelledError:
+            pass
+        _sync_task = None
@@ -0,0 +1,136 @@
+import asyncio
+import random
+import uuid
+import httpx
+from core.config import (
+    STRIPE_SECRET_KEY, STRIPE_API_BASE, STRIPE_TIMEOUT_SECONDS,
+    STRIPE_MAX_RETRIES, STRIPE_MAX_CONNECTIONS
+)
+
+# Shared async client over one connection pool, created in lifespan
+_client = None
+
+RETRY_BASE_SECONDS = 0.5
+RETRYABLE_STATUS = {409, 429, 500, 502, 503, 504}
+
+class StripeError(Exception):
+    """Stripe API error carrying the HTTP status and Stripe's error body"""
+
+    def __init__(self, message: str, status_code: int = None, code: str = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+
+def _encode(params: dict, prefix: str = "") -> list:
+    """Flatten nested params into Stripe's form encoding (a[b][0][c]=...)"""
+    pairs = []
+    items = params.items() if isinstance(params, dict) else enumerate(params)
+    for key, value in items:
+        name = f"{prefix}[{key}]" if prefix else str(key)
+        if value is None:
+            continue
+        if isinstance(value, (dict, list, tuple)):
+            pairs.extend(_encode(value, name))
+        elif isinstance(value, bool):
+            pairs.append((name, "true" if value else "false"))
+        else:
+            pairs.append((name, str(value)))
+    return pairs
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=STRIPE_API_BASE,
+        headers={"Authorization": f"Bearer {STRIPE_SECRET_KEY}"},
+        timeout=httpx.Timeout(STRIPE_TIMEOUT_SECONDS, connect=min(STRIPE_TIMEOUT_SECONDS, 5)),
+        limits=httpx.Limits(max_connections=STRIPE_MAX_CONNECTIONS, max_keepalive_connections=STRIPE_MAX_CONNECTIONS)
+    )
+
+async def connect_stripe():
+    global _client
+    if _client is None:
+        _client = _new_client()
+
+async def close_stripe():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def _request(method: str, path: str, params: dict = None, idempotency_key: str = None) -> dict:
+    """One Stripe call with timeouts and retries; POSTs always carry an idempotency key"""
+    if _client is None:
+        await connect_stripe()
+
+    headers = {}
+    if method == "POST":
+        # Same key on every retry, so a request Stripe already applied is not applied twice
+        headers["Idempotency-Key"] = idempotency_key or uuid.uuid4().hex
+
+    kwargs = {"headers": headers}
+    if params:
+        if method == "POST":
+            kwargs["data"] = _encode(params)
+        else:
+            kwargs["params"] = _encode(params)
+
+    for attempt in range(STRIPE_MAX_RETRIES + 1):
+        try:
+            response = await _client.request(method, path, **kwargs)
+        except httpx.TransportError as e:
+            if attempt == STRIPE_MAX_RETRIES:
+                raise StripeError(f"Stripe unreachable: {e}") from e
+        else:
+            if response.status_code < 400:
+                return response.json()
+            retry_header = response.headers.get("stripe-should-retry")
+            should_retry = retry_header == "true" if retry_header else response.status_code in RETRYABLE_STATUS
+            if not should_retry or attempt == STRIPE_MAX_RETRIES:
+                try:
+                    error = response.json().get("error", {})
+                except ValueError:
+                    error = {}
+                raise StripeError(
+                    error.get("message", f"Stripe request failed with status {response.status_code}"),
+                    status_code=response.status_code,
+                    code=error.get("code")
+                )
+
+        # Exponential backoff with full jitter
+        await asyncio.sleep(random.uniform(0, RETRY_BASE_SECONDS * 2 ** attempt))
+
+# Checkout Sessions
+async def create_checkout_session(params: dict, idempotency_key: str = None) -> dict:
+    return await _request("POST", "/v1/checkout/sessions", params, idempotency_key)
+
+async def retrieve_checkout_session(session_id: str) -> dict:
+    return await _request("GET", f"/v1/checkout/sessions/{session_id}")
+
+# Setup and Payment Intents
+async def create_setup_intent(params: dict, idempotency_key: str = None) -> dict:
+    return await _request("POST", "/v1/setup_intents", params, idempotency_key)
+
+async def retrieve_setup_intent(setup_intent_id: str) -> dict:
+    return await _request("GET", f"/v1/setup_intents/{setup_intent_id}")
+
+async def create_payment_intent(params: dict, idempotency_key: str = None) -> dict:
+    return await _request("POST", "/v1/payment_intents", params, idempotency_key)
+
+# Products and Prices
+async def create_product(params: dict, idempotency_key: str = None) -> dict:
+    return await _request("POST", "/v1/products", params, idempotency_key)
+
+async def update_product(product_id: str, params: dict) -> dict:
+    return await _request("POST", f"/v1/products/{product_id}", params)
+
+async def create_price(params: dict, idempotency_key: str = None) -> dict:
+    return await _request("POST", "/v1/prices", params, idempotency_key)
+
+async def update_price(price_id: str, params: dict) -> dict:
+    return await _request("POST", f"/v1/prices/{price_id}", params)
+
+# Lists (newest first; page with starting_after)
+async def list_checkout_sessions(params: dict) -> dict:
+    return await _request("GET", "/v1/checkout/sessions", params)
+
+async def list_payment_intents(params: dict) -> dict:
+    return await _request("GET", "/v1/payment_intents", params)
@@ -1,69 +1,142 @@
-from fastapi import HTTPException, Form, Request
+from fastapi import HTTPException, Form, Request, Depends
+from typing import List
 from pydantic import BaseModel
 from core.database import courses_collection, db
-from helperFunction.jwt_helper import verify_token
+from middleware.user_auth import Principal, get_principal
+from payment import stripe_gateway
+from payment.webhook_queue import enqueue_event, apply_checkout_completed
+from payment.stripe_catalog import cached_price_id
+from core.config import STRIPE_WEBHOOK_SECRET, CHECKOUT_SESSION_TTL_SECONDS
+from core.redis_client import get_open_checkout, cache_open_checkout
 from bson import ObjectId
+import calendar
+import hashlib
 import stripe
-from datetime import datetime
-from core.config import STRIPE_SECRET_KEY
+import time
+from datetime import datetime, timedelta
 
 # Create payments collection
 payments_collection = db.payments
+enrollments_collection = db.enrollments
 
-# Initialize Stripe
-stripe.api_key = STRIPE_SECRET_KEY
+# Don't hand out a session that expires before the student can finish paying
+CHECKOUT_REUSE_MARGIN_SECONDS = 300
+# Course ids travel in Stripe metadata, whose values are capped at 500 characters
+MAX_CART_COURSES = 20
+
+SUCCESS_URL = "http://127.0.0.1:5500/app/app-Frontend/index.html?session_id={CHECKOUT_SESSION_ID}&payment=success"
+CANCEL_URL = "http://127.0.0.1:5500/app/app-Frontend/index.html?payment=cancelled"
 
 class CheckoutResponse(BaseModel):
     checkout_url: str
     session_id: str
     status: str
 
+def _line_item(course: dict) -> dict:
+    price_id = cached_price_id(course)
+    if price_id:
+        return {"price": price_id, "quantity": 1}
+    # Not synced to Stripe yet (or the price just changed): send the price inline
+    return {
+        "price_data": {
+            "currency": "usd",
+            "unit_amount": int(course["price"] * 100),  # Convert to cents
+            "product_data": {
+                "name": course["title"],
+                "description": course["description"],
+                "images": [course.get("thumbnail", "https://via.placeholder.com/300x200")]
+            }
+        },
+        "quantity": 1
+    }
+
+def _checkout_window():
+    """Requests racing within the same minute share an idempotency key and expiry,
+    so Stripe hands all of them the same session"""
+    window = int(time.time()) // 60
+    return window, (window + 1) * 60 + CHECKOUT_SESSION_TTL_SECONDS
+
+async def _remember_open_checkout(student_id: str, course_id: str, checkout: dict):
+    ttl = checkout["expires_at"] - int(time.time()) - CHECKOUT_REUSE_MARGIN_SECONDS
+    await cache_open_checkout(student_id, course_id, checkout, ttl)
+
+async def _find_open_checkout(student_id: str, course_id: str):
+    """Unexpired pending session for this student and course: Redis first, then payments"""
+    cached = await get_open_checkout(student_id, course_id)
+    if cached:
+        return cached
+
+    payment = await payments_collection.find_one(
+        {
+            "student_id": ObjectId(student_id),
+            "course_id": ObjectId(course_id),
+            "status": "pending",
+            "checkout_url": {"$exists": True},
+            "expires_at": {"$gt": datetime.utcnow() + timedelta(seconds=CHECKOUT_REUSE_MARGIN_SECONDS)}
+        },
+        {"stripe_session_id": 1, "checkout_url": 1, "expires_at": 1},
+        sort=[("expires_at", -1)]
+    )
+    if not payment:
+        return None
+
+    checkout = {
+        "session_id": payment["stripe_session_id"],
+        "checkout_url": payment["checkout_url"],
+        "expires_at": calendar.timegm(payment["expires_at"].utctimetuple())
+    }
+    await _remember_open_checkout(student_id, course_id, checkout)
+    return checkout
+
 async def create_checkout_session(
-    token: str = Form(...),
     course_id: str = Form(...),
-    student_id: str = Form(...)
+    student_id: str = Form(...),
+    principal: Principal = Depends(get_principal)
 ):
     try:
-        # Verify token
-        payload = verify_token(token)
-        
-        if payload.get("user_id") != student_id:
+        if principal.user_id != student_id:
             raise HTTPException(status_code=403, detail="Unauthorized")
         
+        if await enrollments_collection.find_one(
+            {"student_id": ObjectId(student_id), "course_id": ObjectId(course_id)}, {"_id": 1}
+        ):
+            raise HTTPException(status_code=409, detail="Already enrolled in this course")
+        
+        # Double clicks and back-button retries get the session that's already open
+        existing = await _find_open_checkout(student_id, course_id)
+        if existing:
+            return CheckoutResponse(
+                checkout_url=existing["checkout_url"],
+                session_id=existing["session_id"],
+                status="existing"
+            )
+        
         # Get course details
         course = await courses_collection.find_one({"_id": ObjectId(course_id)})
         if not course:
             raise HTTPException(status_code=404, detail="Course not found")
         
-        # Create line items for Stripe Checkout
-        line_items = [{
-            "price_data": {
-                "currency": "usd",
-                "unit_amount": int(course["price"] * 100),  # Convert to cents
-                "product_data": {
-                    "name": course["title"],
-                    "description": course["description"],
-                    "images": [course.get("thumbnail", "https://via.placeholder.com/300x200")]
+        window, expires_at = _checkout_window()
+        
+        # Create Stripe Checkout Session without blocking the event loop
+        checkout_session = await stripe_gateway.create_checkout_session(
+            {
+                "payment_method_types": ["card"],
+                "line_items": [_line_item(course)],
+                "mode": "payment",
+                "expires_at": expires_at,
+                "success_url": SUCCESS_URL,
+                "cancel_url": CANCEL_URL,
+                "metadata": {
+                    "course_id": course_id,
+                    "student_id": student_id,
+                    "course_title": course["title"]
                 }
             },
-            "quantity": 1
-        }]
-        
-        # Create Stripe Checkout Session
-        checkout_session = stripe.checkout.Session.create(
-            payment_method_types=["card"],
-            line_items=line_items,
-            mode="payment",
-            success_url="http://127.0.0.1:5500/app/app-Frontend/index.html?session_id={CHECKOUT_SESSION_ID}&payment=success",
-            cancel_url="http://127.0.0.1:5500/app/app-Frontend/index.html?payment=cancelled",
-            metadata={
-                "course_id": course_id,
-                "student_id": student_id,
-                "course_title": course["title"]
-            }
+            idempotency_key=f"checkout-{student_id}-{course_id}-{window}"
         )
         
-        # Store checkout session in database
+        # Store checkout session in database (once, even if Stripe replayed the session)
         payment_data = {
             "stripe_session_id": checkout_session["id"],
             "course_id": ObjectId(course_id),
@@ -72,10 +145,21 @@ async def create_checkout_session(
             "amount_cents": int(course["price"] * 100),
             "currency": "usd",
             "status": "pending",
+            "checkout_url": checkout_session["url"],
+            "expires_at": datetime.utcfromtimestamp(expires_at),
             "created_at": datetime.utcnow()
         }
         
-        await payments_collection.insert_one(payment_data)
+        await payments_collection.update_one(
+            {"stripe_session_id": checkout_session["id"]},
+            {"$setOnInsert": payment_data},
+            upsert=True
+        )
+        await _remember_open_checkout(student_id, course_id, {
+            "session_id": checkout_session["id"],
+            "checkout_url": checkout_session["url"],
+            "expires_at": expires_at
+        })
         
         return CheckoutResponse(
             checkout_url=checkout_session["url"],
@@ -83,46 +167,120 @@ async def create_checkout_session(
             status="created"
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Checkout session creation failed: {str(e)}")
 
+async def create_cart_checkout_session(
+    course_ids: List[str] = Form(...),
+    student_id: str = Form(...),
+    principal: Principal = Depends(get_principal)
+):
+    """One Stripe session covering every course in the cart"""
+    try:
+        if principal.user_id != student_id:
+            raise HTTPException(status_code=403, detail="Unauthorized")
+        
+        # Keep cart order, drop repeats
+        course_ids = list(dict.fromkeys(course_ids))
+        if len(course_ids) > MAX_CART_COURSES:
+            raise HTTPException(status_code=400, detail=f"A cart can hold at most {MAX_CART_COURSES} courses")
+        if not all(ObjectId.is_valid(course_id) for course_id in course_ids):
+            raise HTTPException(status_code=400, detail="Invalid course id")
+        
+        course_object_ids = [ObjectId(course_id) for course_id in course_ids]
+        courses = await courses_collection.find({"_id": {"$in": course_object_ids}}).to_list(length=None)
+        if len(courses) != len(course_object_ids):
+            raise HTTPException(status_code=404, detail="Course not found")
+        
+        enrolled = {
+            enrollment["course_id"]
+            async for enrollment in enrollments_collection.find(
+                {"student_id": ObjectId(student_id), "course_id": {"$in": course_object_ids}},
+                {"course_id": 1}
+            )
+        }
+        courses_by_id = {course["_id"]: course for course in courses}
+        courses = [courses_by_id[course_id] for course_id in course_object_ids if course_id not in enrolled]
+        if not courses:
+            raise HTTPException(status_code=409, detail="Already enrolled in every course in the cart")
+        
+        purchased_ids = [str(course["_id"]) for course in courses]
+        window, expires_at = _checkout_window()
+        cart_key = hashlib.sha256(",".join(sorted(purchased_ids)).encode()).hexdigest()[:16]
+        
+        checkout_session = await stripe_gateway.create_checkout_session(
+            {
+                "payment_method_types": ["card"],
+                "line_items": [_line_item(course) for course in courses],
+                "mode": "payment",
+                "expires_at": expires_at,
+                "success_url": SUCCESS_URL,
+                "cancel_url": CANCEL_URL,
+                "metadata": {
+                    "student_id": student_id,
+                    "course_ids": ",".join(purchased_ids)
+                }
+            },
+            idempotency_key=f"cart-{student_id}-{cart_key}-{window}"
+        )
+        
+        items = [
+            {
+                "course_id": course["_id"],
+                "teacher_id": course.get("teacher_id"),
+                "amount": course["price"],
+                "amount_cents": int(course["price"] * 100)
+            }
+            for course in courses
+        ]
+        payment_data = {
+            "stripe_session_id": checkout_session["id"],
+            "course_ids": [item["course_id"] for item in items],
+            "items": items,
+            "student_id": ObjectId(student_id),
+            "amount": sum(item["amount"] for item in items),
+            "amount_cents": sum(item["amount_cents"] for item in items),
+            "currency": "usd",
+            "status": "pending",
+            "checkout_url": checkout_session["url"],
+            "expires_at": datetime.utcfromtimestamp(expires_at),
+            "created_at": datetime.utcnow()
+        }
+        
+        await payments_collection.update_one(
+            {"stripe_session_id": checkout_session["id"]},
+            {"$setOnInsert": payment_data},
+            upsert=True
+        )
+        
+        return CheckoutResponse(
+            checkout_url=checkout_session["url"],
+            session_id=checkout_session["id"],
+            status="created"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Cart checkout session creation failed: {str(e)}")
+
 async def verify_session_payment(
     session_id: str = Form(...),
-    token: str = Form(...)
+    principal: Principal = Depends(get_principal)
 ):
     try:
-        # Verify token
-        verify_token(token)
-        
         # Retrieve session from Stripe
-        session = stripe.checkout.Session.retrieve(session_id)
+        session = await stripe_gateway.retrieve_checkout_session(session_id)
         
-        if session.payment_status != "paid":
+        if session["payment_status"] != "paid":
             raise HTTPException(status_code=400, detail="Payment not completed")
         
-        # Update local payment record
-        payment = await payments_collection.find_one({"stripe_session_id": session_id})
-        if not payment:
+        # Same idempotent path the webhook worker uses, whichever gets there first
+        if not await payments_collection.find_one({"stripe_session_id": session_id}, {"_id": 1}):
             raise HTTPException(status_code=404, detail="Payment record not found")
-        
-        if payment["status"] != "completed":
-            await payments_collection.update_one(
-                {"_id": payment["_id"]},
-                {
-                    "$set": {
-                        "status": "completed",
-                        "completed_at": datetime.utcnow(),
-                        "stripe_payment_intent_id": session.payment_intent
-                    }
-                }
-            )
-            
-            # Auto-enroll student
-            from course.views.enrollment import enroll_course_after_payment
-            await enroll_course_after_payment(
-                str(payment["course_id"]), 
-                str(payment["student_id"])
-            )
+        await apply_checkout_completed(session)
         
         return {
             "message": "Payment verified and course enrolled successfully",
@@ -134,48 +292,28 @@ async def verify_session_payment(
         raise HTTPException(status_code=500, detail=f"Session verification failed: {str(e)}")
 
 async def handle_webhook(request: Request):
+    """Verify, persist and acknowledge; the webhook worker applies the event"""
+    payload = await request.body()
+    sig_header = request.headers.get('stripe-signature')
+    
+    if not STRIPE_WEBHOOK_SECRET:
+        # Not a bad request: Stripe keeps retrying a 5xx, so events arrive once the secret is set
+        print("Stripe webhook rejected: STRIPE_WEBHOOK_SECRET is not configured")
+        raise HTTPException(status_code=503, detail="Webhook endpoint is not configured")
+    
     try:
-        payload = await request.body()
-        sig_header = request.headers.get('stripe-signature')
-        
-        # Verify webhook signature (in production, use webhook secret)
-        event = stripe.Webhook.construct_event(
-            payload, sig_header, "whsec_your_webhook_secret_here"
-        )
-        
-        if event['type'] == 'checkout.session.completed':
-            session = event['data']['object']
-            
-            # Update payment status
-            await payments_collection.update_one(
-                {"stripe_session_id": session['id']},
-                {
-                    "$set": {
-                        "status": "completed",
-                        "completed_at": datetime.utcnow(),
-                        "stripe_payment_intent_id": session.get('payment_intent')
-                    }
-                }
-            )
-            
-            # Get payment record for enrollment
-            payment = await payments_collection.find_one({"stripe_session_id": session['id']})
-            if payment:
-                # Auto-enroll student
-                from course.views.enrollment import enroll_course_after_payment
-                await enroll_course_after_payment(
-                    str(payment["course_id"]), 
-                    str(payment["student_id"])
-                )
-        
-        return {"status": "success"}
-        
-    except Exception as e:
+        event = stripe.Webhook.construct_event(payload, sig_header, STRIPE_WEBHOOK_SECRET)
+    except (ValueError, stripe.error.SignatureVerificationError) as e:
         raise HTTPException(status_code=400, detail=f"Webhook error: {str(e)}")
+    
+    # Stripe retries until it sees a 2xx, so a re-delivered event is acknowledged, not re-applied
+    if not await enqueue_event(event.to_dict_recursive()):
+        return {"status": "duplicate"}
+    
+    return {"status": "received"}
 
-async def get_payment_status(payment_id: str, token: str = Form(...)):
+async def get_payment_status(payment_id: str, principal: Principal = Depends(get_principal)):
     try:
-        verify_token(token)
         payment = await payments_collection.find_one({"_id": ObjectId(payment_id)})
         if not payment:
             raise HTTPException(status_code=404, detail="Payment not found")
@@ -1,15 +1,12 @@
-from fastapi import HTTPException, Form
+from fastapi import HTTPException, Form, Depends
 from pydantic import BaseModel
 from core.database import courses_collection, db
-from helperFunction.jwt_helper import verify_token
-from core.config import STRIPE_PUBLISHABLE_KEY, STRIPE_SECRET_KEY
+from middleware.user_auth import Principal, get_principal
+from core.config import STRIPE_PUBLISHABLE_KEY
+from payment import stripe_gateway
 from bson import ObjectId
-import stripe
 from datetime import datetime
 
-# Initialize Stripe
-stripe.api_key = STRIPE_SECRET_KEY
-
 # Create payments collection
 payments_collection = db.payments
 
@@ -19,15 +16,12 @@ class SetupResponse(BaseModel):
     publishable_key: str
 
 async def create_setup_intent(
-    token: str = Form(...),
     course_id: str = Form(...),
-    student_id: str = Form(...)
+    student_id: str = Form(...),
+    principal: Principal = Depends(get_principal)
 ):
     try:
-        # Verify token
-        payload = verify_token(token)
-        
-        if payload.get("user_id") != student_id:
+        if principal.user_id != student_id:
             raise HTTPException(status_code=403, detail="Unauthorized")
         
         # Get course details
@@ -36,14 +30,14 @@ async def create_setup_intent(
             raise HTTPException(status_code=404, detail="Course not found")
         
         # Create Setup Intent for card collection
-        setup_intent = stripe.SetupIntent.create(
-            payment_method_types=["card"],
-            metadata={
+        setup_intent = await stripe_gateway.create_setup_intent({
+            "payment_method_types": ["card"],
+            "metadata": {
                 "course_id": course_id,
                 "student_id": student_id,
                 "amount": str(int(course["price"] * 100))
             }
-        )
+        })
         
         return SetupResponse(
             setup_intent_id=setup_intent["id"],
@@ -55,19 +49,16 @@ async def create_setup_intent(
         raise HTTPException(status_code=500, detail=f"Setup intent creation failed: {str(e)}")
 
 async def process_payment_with_setup(
-    token: str = Form(...),
     setup_intent_id: str = Form(...),
-    student_id: str = Form(...)
+    student_id: str = Form(...),
+    principal: Principal = Depends(get_principal)
 ):
     try:
-        # Verify token
-        payload = verify_token(token)
-        
-        if payload.get("user_id") != student_id:
+        if principal.user_id != student_id:
             raise HTTPException(status_code=403, detail="Unauthorized")
         
         # Retrieve Setup Intent
-        setup_intent = stripe.SetupIntent.retrieve(setup_intent_id)
+        setup_intent = await stripe_gateway.retrieve_setup_intent(setup_intent_id)
         
         print(f"Setup Intent Status: {setup_intent['status']}")
         
@@ -83,13 +74,24 @@ async def process_payment_with_setup(
         course_id = setup_intent["metadata"]["course_id"]
         amount_cents = int(setup_intent["metadata"]["amount"])
         
-        # Create and confirm payment intent with the saved payment method
-        payment_intent = stripe.PaymentIntent.create(
-            amount=amount_cents,
-            currency="usd",
-            payment_method=payment_method_id,
-            confirmation_method="automatic",
-            confirm=True
+        # Create and confirm payment intent with the saved payment method.
+        # Keyed on the setup intent so a double submit can't charge twice.
+        payment_intent = await stripe_gateway.create_payment_intent(
+            {
+                "amount": amount_cents,
+                "currency": "usd",
+                "payment_method": payment_method_id,
+                "confirmation_method": "automatic",
+                "confirm": True,
+                # Lets the reconciler rebuild the payment if we crash before recording it
+                "metadata": {
+                    "source": "setup_intent",
+                    "setup_intent_id": setup_intent_id,
+                    "course_id": course_id,
+                    "student_id": student_id
+                }
+            },
+            idempotency_key=f"setup-payment-{setup_intent_id}"
         )
         
         if payment_intent["status"] == "succeeded":
@@ -106,7 +108,11 @@ async def process_payment_with_setup(
                 "completed_at": datetime.utcnow()
             }
             
-            await payments_collection.insert_one(payment_data)
+            await payments_collection.update_one(
+                {"stripe_payment_intent_id": payment_intent["id"]},
+                {"$setOnInsert": payment_data},
+                upsert=True
+            )
             
             # Auto-enroll student
             from course.views.enrollment import enroll_course_after_payment
@@ -0,0 +1,264 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from itertools import groupby
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from core.config import WEBHOOK_BATCH_SIZE, WEBHOOK_MAX_ATTEMPTS
+from core.database import db
+from core.redis_client import clear_open_checkout
+
+events_collection = db.stripe_events
+payments_collection = db.payments
+leases_collection = db.stripe_event_leases  # _id is the session key
+
+POLL_INTERVAL_SECONDS = 5
+CLAIM_TIMEOUT = timedelta(minutes=5)  # reclaim events left "processing" by a dead worker
+RETRY_BASE_SECONDS = 10
+
+_wakeup = asyncio.Event()
+_worker_task = None
+
+def _session_key(event: dict) -> str:
+    # Events are ordered per checkout session; refunds per payment intent
+    obj = event["data"]["object"]
+    if obj.get("object") == "charge" and obj.get("payment_intent"):
+        return obj["payment_intent"]
+    return obj.get("id", event["id"])
+
+async def enqueue_event(event: dict) -> bool:
+    """Persist a verified Stripe event once; False when Stripe is re-delivering it"""
+    now = datetime.utcnow()
+    try:
+        await events_collection.insert_one({
+            "event_id": event["id"],
+            "type": event["type"],
+            "session_key": _session_key(event),
+            "stripe_created": event.get("created", 0),
+            "payload": event,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "received_at": now,
+            "last_error": None
+        })
+    except DuplicateKeyError:
+        return False
+    _wakeup.set()
+    return True
+
+def payment_course_ids(payment: dict) -> list:
+    # Cart payments carry every course; single checkouts carry one
+    return [str(course_id) for course_id in payment.get("course_ids", [payment.get("course_id")])]
+
+async def apply_checkout_completed(session: dict) -> bool:
+    """Mark the session's payment completed and enroll once; safe to repeat"""
+    # A refunded payment stays refunded when Stripe re-delivers the checkout event
+    result = await payments_collection.update_one(
+        {"stripe_session_id": session["id"], "status": {"$nin": ["completed", "refunded"]}},
+        {
+            "$set": {
+                "status": "completed",
+                "completed_at": datetime.utcnow(),
+                "stripe_payment_intent_id": session.get("payment_intent")
+            }
+        }
+    )
+    payment = await payments_collection.find_one({"stripe_session_id": session["id"]})
+    if not payment or payment["status"] == "refunded":
+        return False
+
+    course_ids = payment_course_ids(payment)
+    student_id = str(payment["student_id"])
+    for course_id in course_ids:
+        await clear_open_checkout(student_id, course_id)
+
+    # Enrollment is idempotent too, so a retry after a crash between the two writes still enrolls
+    from course.views.enrollment import enroll_courses_after_payment
+    await enroll_courses_after_payment(course_ids, student_id, payment["_id"])
+    return result.modified_count == 1
+
+async def _apply_session_status(session: dict, status: str):
+    # Only pending payments move; a completed payment is never downgraded by a late event
+    await payments_collection.update_one(
+        {"stripe_session_id": session["id"], "status": "pending"},
+        {"$set": {"status": status, f"{status}_at": datetime.utcnow()}}
+    )
+    metadata = session.get("metadata") or {}
+    if metadata.get("student_id") and metadata.get("course_id"):
+        await clear_open_checkout(metadata["student_id"], metadata["course_id"])
+
+async def _apply_refund(event: dict):
+    """Record the newly refunded amount as its own entry so rollups can bucket it by refund date"""
+    charge = event["data"]["object"]
+    payment = await payments_collection.find_one(
+        {"stripe_payment_intent_id": charge.get("payment_intent")},
+        {"amount_cents": 1, "refunds": 1}
+    )
+    if not payment:
+        # The refund's session key differs from the checkout's, so it can arrive before the
+        # payment intent is recorded; failing here retries it instead of dropping the refund
+        raise LookupError(f"No payment for payment intent {charge.get('payment_intent')}")
+
+    # amount_refunded is cumulative on the charge; store only what we haven't seen yet
+    recorded = sum(refund["amount_cents"] for refund in payment.get("refunds", []))
+    delta = charge.get("amount_refunded", 0) - recorded
+    if delta <= 0:
+        return
+
+    fully_refunded = charge["amount_refunded"] >= payment["amount_cents"]
+    await payments_collection.update_one(
+        {"_id": payment["_id"], "refunds.event_id": {"$ne": event["id"]}},
+        {
+            "$push": {"refunds": {"event_id": event["id"], "amount_cents": delta, "refunded_at": datetime.utcnow()}},
+            "$set": {
+                "refunded_cents": charge["amount_refunded"],
+                "status": "refunded" if fully_refunded else "completed"
+            }
+        }
+    )
+
+async def _apply(event: dict):
+    session = event["data"]["object"]
+    if event["type"] in ("checkout.session.completed", "checkout.session.async_payment_succeeded"):
+        if session.get("payment_status") in ("paid", "no_payment_required"):
+            await apply_checkout_completed(session)
+    elif event["type"] == "checkout.session.async_payment_failed":
+        await _apply_session_status(session, "failed")
+    elif event["type"] == "checkout.session.expired":
+        await _apply_session_status(session, "expired")
+    elif event["type"] == "charge.refunded":
+        await _apply_refund(event)
+
+async def _lease_sessions(keys: list, claim_id: str, now: datetime) -> list:
+    """Take the per-session lease for each key we can; a session is worked on by one claim at a time"""
+    expires_at = now + CLAIM_TIMEOUT
+    contested = set()
+    try:
+        await leases_collection.insert_many(
+            [{"_id": key, "claim_id": claim_id, "expires_at": expires_at} for key in keys],
+            ordered=False
+        )
+    except BulkWriteError as e:
+        contested = {keys[error["index"]] for error in e.details["writeErrors"] if error["code"] == 11000}
+
+    leased = [key for key in keys if key not in contested]
+    for key in contested:
+        # Take over a lease left behind by a dead worker
+        result = await leases_collection.update_one(
+            {"_id": key, "expires_at": {"$lt": now}},
+            {"$set": {"claim_id": claim_id, "expires_at": expires_at}}
+        )
+        if result.modified_count:
+            leased.append(key)
+    return leased
+
+async def _release_sessions(claim_id: str):
+    await leases_collection.delete_many({"claim_id": claim_id})
+
+async def _claim_batch(claim_id: str):
+    """Lease up to WEBHOOK_BATCH_SIZE sessions with due events and claim all of their due events"""
+    now = datetime.utcnow()
+    due = {
+        "$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "processing", "claimed_at": {"$lt": now - CLAIM_TIMEOUT}}
+        ]
+    }
+    candidates = await events_collection.find(due, {"session_key": 1}).sort("received_at", 1).to_list(length=WEBHOOK_BATCH_SIZE)
+    keys = list(dict.fromkeys(doc["session_key"] for doc in candidates))
+    if not keys:
+        return []
+
+    # An event backing off holds back everything after it in its session
+    waiting = set(await events_collection.distinct(
+        "session_key",
+        {"session_key": {"$in": keys}, "status": "pending", "next_attempt_at": {"$gt": now}}
+    ))
+    leased = await _lease_sessions([key for key in keys if key not in waiting], claim_id, now)
+    if not leased:
+        return []
+
+    await events_collection.update_many(
+        {"session_key": {"$in": leased}, **due},
+        {"$set": {"status": "processing", "claim_id": claim_id, "claimed_at": now}}
+    )
+    return await events_collection.find({"claim_id": claim_id}).to_list(length=None)
+
+async def _process_session(events: list) -> list:
+    """Apply one session's events in Stripe order; stop at the first failure to keep that order"""
+    updates = []
+    retry_at = None
+    for stored in events:
+        attempts = stored.get("attempts", 0) + 1
+        if retry_at is not None:
+            # Hold later events back until the one that failed has been retried
+            updates.append(UpdateOne({"_id": stored["_id"]}, {"$set": {"status": "pending", "next_attempt_at": retry_at}}))
+            continue
+        try:
+            await _apply(stored["payload"])
+            updates.append(UpdateOne(
+                {"_id": stored["_id"]},
+                {"$set": {"status": "done", "attempts": attempts, "processed_at": datetime.utcnow(), "last_error": None}}
+            ))
+        except Exception as e:
+            print(f"Webhook event error ({stored['event_id']}, attempt {attempts}): {e}")
+            if attempts >= WEBHOOK_MAX_ATTEMPTS:
+                # Give up on this one so the rest of the session isn't stuck behind it
+                retry_at = datetime.utcnow()
+                update = {"status": "failed", "attempts": attempts, "last_error": str(e)}
+            else:
+                retry_at = datetime.utcnow() + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+                update = {
+                    "status": "pending",
+                    "attempts": attempts,
+                    "last_error": str(e),
+                    "next_attempt_at": retry_at
+                }
+            updates.append(UpdateOne({"_id": stored["_id"]}, {"$set": update}))
+    return updates
+
+async def _worker_loop():
+    while True:
+        claim_id = uuid.uuid4().hex
+        try:
+            batch = await _claim_batch(claim_id)
+            if batch:
+                # Different sessions run concurrently; events within a session run in order
+                batch.sort(key=lambda stored: (stored["session_key"], stored["stripe_created"]))
+                groups = [list(events) for _, events in groupby(batch, key=lambda stored: stored["session_key"])]
+                results = await asyncio.gather(*(_process_session(events) for events in groups))
+                await events_collection.bulk_write([update for updates in results for update in updates], ordered=False)
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Webhook worker error: {e}")
+        finally:
+            try:
+                await _release_sessions(claim_id)
+            except Exception as e:
+                # Unreleased leases expire after CLAIM_TIMEOUT
+                print(f"Webhook lease release error: {e}")
+
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+def start_webhook_worker():
+    global _worker_task
+    if _worker_task is None:
+        _worker_task = asyncio.create_task(_worker_loop())
+        print("Stripe webhook worker started")
+
+async def stop_webhook_worker():
+    global _worker_task
+    if _worker_task is not None:
+        _worker_task.cancel()
+        try:
+            await _worker_task
+        except asyncio.CancelledError:
+            pass
+        _worker_task = None
@@ -0,0 +1,50 @@
+import os
+import sys
+
+# Tests import app modules the way main.py does, from the backend root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# core.config reads these at import; motor doesn't connect until a query runs
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "learning_platform_test")
+
+import pytest
+
+@pytest.fixture
+def chat_cache(monkeypatch):
+    """Exact-match response cache in a dict instead of Redis; the semantic cache is left out"""
+    from chatbot import response_cache
+    from chatbot.config import chatbot_config
+    store = {}
+
+    async def get_catalog_version():
+        return "1"
+
+    async def get_chat_response(key):
+        return store.get(key)
+
+    async def cache_chat_response(key, response, ttl_seconds):
+        store[key] = response
+        return True
+
+    monkeypatch.setattr(response_cache, "get_catalog_version", get_catalog_version)
+    monkeypatch.setattr(response_cache, "get_chat_response", get_chat_response)
+    monkeypatch.setattr(response_cache, "cache_chat_response", cache_chat_response)
+    monkeypatch.setattr(chatbot_config, "ENABLE_CACHE", True)
+    monkeypatch.setattr(chatbot_config, "ENABLE_SEMANTIC_CACHE", False)
+    return store
+
+@pytest.fixture
+def loaded_index(monkeypatch):
+    """A small in-memory catalog so course context never reaches Mongo"""
+    from bson import ObjectId
+    from chatbot import simple_service
+    from chatbot.course_index import CourseIndex
+    courses = [
+        {"_id": ObjectId(), "title": "Python for Data Analysis", "description": "Pandas and NumPy projects", "category": "data", "price": 49},
+        {"_id": ObjectId(), "title": "React from Scratch", "description": "Components, hooks and state", "category": "web", "price": 29}
+    ]
+    index = CourseIndex(backend="numpy")
+    index.load(courses, "1")
+    monkeypatch.setattr(simple_service, "course_index", index)
+    return index
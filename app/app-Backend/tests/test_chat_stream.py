@@ -0,0 +1,120 @@
+import asyncio
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from chatbot import enhanced_routes
+from chatbot.enhanced_routes import ChatMessage, chat_stream
+from chatbot.llm_client import FakeLLMProvider
+from chatbot.simple_service import SimpleChatbotService
+
+QUESTION = "which python course should I learn"
+
+class EmptyProvider(FakeLLMProvider):
+    """A stream that ends without text, like a safety block"""
+
+    async def stream(self, prompt: str):
+        self.calls += 1
+        return
+        yield
+
+class EndlessProvider(FakeLLMProvider):
+    """Streams until closed and records that it was"""
+
+    def __init__(self):
+        super().__init__()
+        self.closed = False
+
+    async def stream(self, prompt: str):
+        self.calls += 1
+        try:
+            while True:
+                await asyncio.sleep(0)
+                yield "word "
+        finally:
+            self.closed = True
+
+class ConnectedRequest:
+    async def is_disconnected(self) -> bool:
+        return False
+
+def _service(monkeypatch, provider) -> SimpleChatbotService:
+    service = SimpleChatbotService(provider=provider)
+    monkeypatch.setattr(enhanced_routes, "chatbot_service", service)
+    return service
+
+def _events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n", 1)
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+@pytest.fixture
+def client(chat_cache, loaded_index):
+    app = FastAPI()
+    app.include_router(enhanced_routes.router)
+    with TestClient(app) as client:
+        yield client
+
+def _stream(client: TestClient, message: str = QUESTION) -> list:
+    response = client.post("/chatbot/chat/stream", json={"message": message, "session_id": "s1"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return _events(response.text)
+
+def test_meta_comes_first_then_tokens(client, monkeypatch, chat_cache):
+    _service(monkeypatch, FakeLLMProvider(reply="Python for Data Analysis fits."))
+
+    events = _stream(client)
+
+    names = [name for name, _ in events]
+    assert names[0] == "meta"
+    assert events[0][1]["intent"] == "course_inquiry"
+    assert events[0][1]["session_id"] == "s1"
+    assert events[0][1]["sources"][0]["title"] == "Python for Data Analysis"
+    assert names[-1] == "done"
+    assert set(names[1:-1]) == {"token"}
+    assert "".join(data["text"] for name, data in events if name == "token") == "Python for Data Analysis fits."
+    assert len(chat_cache) == 1
+
+def test_mid_stream_failure_falls_back_and_is_not_cached(client, monkeypatch, chat_cache):
+    _service(monkeypatch, FakeLLMProvider(fail=True, reply="one two three four"))
+
+    events = _stream(client)
+
+    names = [name for name, _ in events]
+    assert names[0] == "meta"
+    assert "token" in names
+    assert names[-2:] == ["fallback", "done"]
+    assert events[-2][1]["text"].startswith("Here are some courses")
+    assert chat_cache == {}
+
+def test_empty_stream_falls_back_and_is_not_cached(client, monkeypatch, chat_cache):
+    _service(monkeypatch, EmptyProvider())
+
+    events = _stream(client)
+
+    assert [name for name, _ in events] == ["meta", "fallback", "done"]
+    assert chat_cache == {}
+    response = client.post("/chatbot/chat", json={"message": QUESTION}).json()
+    assert response["cached"] is False
+
+def test_closing_the_client_closes_the_upstream_stream(chat_cache, loaded_index, monkeypatch):
+    provider = EndlessProvider()
+    _service(monkeypatch, provider)
+
+    async def run():
+        response = await chat_stream(ChatMessage(message=QUESTION), ConnectedRequest())
+        body = response.body_iterator
+        first = await body.__anext__()
+        second = await body.__anext__()
+        await body.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first.startswith("event: meta")
+    assert second.startswith("event: token")
+    assert provider.closed
+    assert chat_cache == {}
@@ -0,0 +1,88 @@
+import asyncio
+import socket
+from datetime import datetime
+import pytest
+from aiosmtpd.controller import Controller
+from helperFunction import email_outbox
+
+class RecordingHandler:
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return "250 Message accepted for delivery"
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    monkeypatch.setattr(email_outbox, "EMAIL_HOST", "127.0.0.1")
+    monkeypatch.setattr(email_outbox, "EMAIL_PORT", controller.port)
+    monkeypatch.setattr(email_outbox, "EMAIL_USE_TLS", False)
+    monkeypatch.setattr(email_outbox, "EMAIL_USER", "noreply@example.com")
+    monkeypatch.setattr(email_outbox, "EMAIL_PASSWORD", None)
+    yield handler
+    controller.stop()
+
+def _message(to: str = "student@example.com", attempts: int = 0) -> dict:
+    return {"_id": to, "to": to, "subject": "Email Verification OTP", "body": "Your OTP is: 123456", "attempts": attempts}
+
+async def _deliver_all(messages: list, pool_size: int = 2) -> list:
+    email_outbox._pool = email_outbox.SMTPConnectionPool(pool_size)
+    try:
+        return await asyncio.gather(*(email_outbox._deliver(message) for message in messages))
+    finally:
+        await email_outbox._pool.close()
+        email_outbox._pool = None
+
+def test_delivers_and_marks_sent(smtp_server):
+    [update] = asyncio.run(_deliver_all([_message()]))
+
+    assert update._doc["$set"]["status"] == "sent"
+    assert update._doc["$set"]["attempts"] == 1
+    [envelope] = smtp_server.envelopes
+    assert envelope.rcpt_tos == ["student@example.com"]
+    assert b"Your OTP is: 123456" in envelope.content
+
+def test_batch_reuses_pooled_connections(smtp_server):
+    connects = 0
+    original = email_outbox.SMTPConnectionPool._connect
+
+    async def counting_connect(self):
+        nonlocal connects
+        connects += 1
+        return await original(self)
+
+    email_outbox.SMTPConnectionPool._connect = counting_connect
+    try:
+        messages = [_message(f"student{i}@example.com") for i in range(6)]
+        updates = asyncio.run(_deliver_all(messages, pool_size=2))
+    finally:
+        email_outbox.SMTPConnectionPool._connect = original
+
+    assert all(update._doc["$set"]["status"] == "sent" for update in updates)
+    assert len(smtp_server.envelopes) == 6
+    assert connects <= 2
+
+def test_unreachable_server_schedules_retry(smtp_server, monkeypatch):
+    monkeypatch.setattr(email_outbox, "EMAIL_PORT", _free_port())
+    [update] = asyncio.run(_deliver_all([_message()]))
+
+    fields = update._doc["$set"]
+    assert fields["status"] == "pending"
+    assert fields["attempts"] == 1
+    assert fields["next_attempt_at"] > datetime.utcnow()
+    assert fields["last_error"]
+
+def test_last_attempt_marks_failed(smtp_server, monkeypatch):
+    monkeypatch.setattr(email_outbox, "EMAIL_PORT", _free_port())
+    [update] = asyncio.run(_deliver_all([_message(attempts=email_outbox.EMAIL_MAX_ATTEMPTS - 1)]))
+
+    assert update._doc["$set"]["status"] == "failed"
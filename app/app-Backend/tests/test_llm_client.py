@@ -0,0 +1,109 @@
+import asyncio
+import json
+import httpx
+import pytest
+from chatbot import llm_client
+from chatbot.config import chatbot_config
+from chatbot.llm_client import FakeLLMProvider, GeminiClient, LLMError
+from chatbot.simple_service import SimpleChatbotService
+
+OK_BODY = {"candidates": [{"content": {"parts": [{"text": "Try Python for Data Analysis."}]}}]}
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(llm_client, "RETRY_BASE_SECONDS", 0)
+
+def _client(handler, **kwargs) -> GeminiClient:
+    client = GeminiClient("test-key", api_base="https://gemini.test", **kwargs)
+    client._client = httpx.AsyncClient(base_url=client.api_base, transport=httpx.MockTransport(handler))
+    return client
+
+def _generate(client: GeminiClient, prompt: str = "hello") -> str:
+    async def run():
+        try:
+            return await client.generate(prompt)
+        finally:
+            await client.aclose()
+    return asyncio.run(run())
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_retryable_status_is_retried_with_same_payload(status):
+    payloads = []
+
+    def handler(request):
+        payloads.append(json.loads(request.content))
+        if len(payloads) == 1:
+            return httpx.Response(status, text="busy")
+        return httpx.Response(200, json=OK_BODY)
+
+    assert _generate(_client(handler)) == "Try Python for Data Analysis."
+    assert len(payloads) == 2
+    assert payloads[0] == payloads[1]
+
+def test_client_error_is_not_retried():
+    calls = 0
+
+    def handler(request):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(400, text="bad request")
+
+    with pytest.raises(LLMError, match="400"):
+        _generate(_client(handler))
+    assert calls == 1
+
+def test_retries_stop_after_max_retries():
+    calls = 0
+
+    def handler(request):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(503, text="unavailable")
+
+    with pytest.raises(LLMError, match="503"):
+        _generate(_client(handler, max_retries=2))
+    assert calls == 3
+
+def test_concurrency_is_bounded():
+    in_flight = peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json=OK_BODY)
+
+    client = _client(handler)
+
+    async def run():
+        try:
+            await asyncio.gather(*(client.generate(f"question {i}") for i in range(chatbot_config.LLM_MAX_CONCURRENCY * 3)))
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+    assert peak == chatbot_config.LLM_MAX_CONCURRENCY
+
+def test_failed_provider_falls_back_without_caching(chat_cache, loaded_index):
+    service = SimpleChatbotService(provider=FakeLLMProvider(fail=True))
+
+    first = asyncio.run(service.get_response("which python course should I learn"))
+    second = asyncio.run(service.get_response("which python course should I learn"))
+
+    assert first["intent"] == "course_inquiry"
+    assert first["response"].startswith("Here are some courses")
+    assert "cached" not in second
+    assert chat_cache == {}
+    assert service.provider.calls == 2
+
+def test_provider_answer_is_cached(chat_cache, loaded_index):
+    service = SimpleChatbotService(provider=FakeLLMProvider(reply="Python for Data Analysis fits."))
+
+    asyncio.run(service.get_response("which python course should I learn"))
+    second = asyncio.run(service.get_response("which python course should I learn"))
+
+    assert second["cached"] is True
+    assert second["response"] == "Python for Data Analysis fits."
+    assert service.provider.calls == 1
@@ -4,6 +4,7 @@ const API_BASE_URL = 'http://localhost:8001/api/v1';
 // Global state
 let currentUser = null;
 let currentPage = 'login-page';
+let eventSource = null;
 
 // Utility Functions
 function showLoading() {
@@ -115,6 +116,7 @@ async function login(credentials) {
         
         showPage('dashboard-page');
         showRoleBasedDashboard(result.user.role);
+        connectEvents();
         
         // Check for pending payment verification
         setTimeout(() => {
@@ -509,9 +511,10 @@ async function logout() {
     if (!currentUser) return;
     
     try {
-        await apiCall('/auth/logout', 'POST', { user_id: currentUser.id });
+        await apiCall('/auth/logout', 'POST', { user_id: currentUser.id, token: localStorage.getItem('token') });
         showToast('Logged out successfully', 'success');
         
+        disconnectEvents();
         currentUser = null;
         localStorage.removeItem('token');
         localStorage.removeItem('currentUser');
@@ -657,6 +660,7 @@ document.addEventListener('DOMContentLoaded', function() {
             
             showPage('dashboard-page');
             showRoleBasedDashboard(currentUser.role);
+            connectEvents();
         } catch (error) {
             // Clear invalid data
             localStorage.removeItem('token');
@@ -723,19 +727,43 @@ document.addEventListener('DOMContentLoaded', function() {
         // You can add visual feedback here
     });
     
-    // Auto-refresh stats every 30 seconds when on dashboard
-    setInterval(() => {
-        if (currentPage === 'dashboard-page' && currentUser) {
-            if (currentUser.role === 'Teacher') {
-                loadTeacherData();
-            } else if (currentUser.role === 'student') {
-                loadStudentData();
-            } else {
+});
+
+// Server push: presence changes and per-user events replace dashboard polling
+function connectEvents() {
+    disconnectEvents();
+    const token = localStorage.getItem('token');
+    if (!token || !window.EventSource) return;
+    
+    eventSource = new EventSource(`${API_BASE_URL}/events/stream?token=${encodeURIComponent(token)}`);
+    
+    eventSource.onmessage = function(event) {
+        const message = JSON.parse(event.data);
+        
+        if (message.type === 'presence') {
+            const onlineUsers = document.getElementById('online-users');
+            if (onlineUsers) {
+                onlineUsers.textContent = message.data.online_users;
+            }
+            if (message.data.delta !== 0 && currentPage === 'dashboard-page' && currentUser
+                && currentUser.role !== 'Teacher' && currentUser.role !== 'student') {
                 loadUserStats();
             }
+        } else if (message.type === 'enrollment.completed') {
+            showToast(`Enrolled in ${message.data.course_title}`, 'success');
+            if (currentUser && currentUser.role === 'student') {
+                loadStudentData();
+            }
         }
-    }, 30000);
-});
+    };
+}
+
+function disconnectEvents() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+}
 
 // Form Handlers
 function handleCourseForm(event) {